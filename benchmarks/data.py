@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic data for the benchmarks.
+
+All data is generated from a seeded random number generator so that runs on
+different commits operate on identical catalogs.
+"""
+
+from __future__ import unicode_literals
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import random
+
+from django.core.management import call_command
+from publications.models import List, Publication, Style, StyleTemplate, Type
+
+FORENAMES = ['Anna', 'Bernd', 'Carl Friedrich', 'Dörte', 'Erik', 'Françoise',
+    'Günther', 'Hans-Peter', 'Ingrid', 'Jürgen', 'Karl', 'Lucas', 'Maria',
+    'Nils', 'Øystein', 'Paul', 'Renée', 'Søren', 'Till', 'Ursula']
+
+SURNAMES = ['Müller', 'Mueller', 'Schmidt', 'Gauß', 'Theis', 'van der Berg',
+    'Swyngedouw', 'Kaika', 'Łukasiewicz', 'Dvořák', 'Núñez', 'Smith',
+    'Jones', 'Weiß', 'Böhm', 'Fischer', 'Meyer', 'Wagner', 'Becker', 'Hoffmann']
+
+WORDS = ['learning', 'natural', 'images', 'statistics', 'water', 'power',
+    'urban', 'networks', 'models', 'inference', 'Bayesian', 'deep', 'neural',
+    'coding', 'entropy', 'theory', 'ecology', 'political', 'analysis', 'data']
+
+TITLE_MATH = ['$\\alpha$-stable', '$L_2$', '$x^2$', '$\\beta_{1}$']
+
+DEFAULT_TEMPLATE = '{{ authors }} ({{ year }}). {{ title }}. <i>{{ journal }}</i>.'
+
+
+def make_authors(rng, n_authors):
+    """
+    Returns a pool of C{n_authors} distinct author names.
+    """
+
+    names = ['%s %s' % (f, s) for f in FORENAMES for s in SURNAMES]
+    rng.shuffle(names)
+    while len(names) < n_authors:
+        names.append('%s %s' % (rng.choice(FORENAMES), rng.choice(SURNAMES) + str(len(names))))
+    return names[:n_authors]
+
+
+def make_title(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 12))]
+    if rng.random() < 0.2:
+        words.insert(rng.randint(0, len(words)), rng.choice(TITLE_MATH))
+    return ' '.join(words).capitalize()
+
+
+def publication_fields(rng, i, authors, keywords):
+    return {
+        'citekey': 'key%d' % i,
+        'title': make_title(rng),
+        'authors': ', '.join(rng.sample(authors, rng.randint(1, min(6, len(authors))))),
+        'year': rng.randint(1990, 2014),
+        'month': rng.randint(1, 12),
+        'journal': 'Journal of %s' % rng.choice(WORDS).capitalize(),
+        'volume': rng.randint(1, 50),
+        'number': rng.randint(1, 12),
+        'pages': '%d-%d' % (i % 100, i % 100 + 10),
+        'keywords': ', '.join(rng.sample(keywords, rng.randint(0, min(4, len(keywords))))),
+        'doi': '10.1000/bench.%d' % i,
+        'abstract': ' '.join(rng.choice(WORDS) for _ in range(60)),
+        'external': rng.random() < 0.1,
+    }
+
+
+def generate(n_publications=1000, n_authors=200, n_keywords=50, n_lists=10,
+        n_styles=5, seed=0):
+    """
+    Populates the database with a synthetic catalog.
+
+    @rtype: dict
+    @return: names of an author, keyword and list occurring in the catalog
+    """
+
+    rng = random.Random(seed)
+
+    call_command('loaddata', 'commencedata', verbosity=0)
+    types = list(Type.objects.all())
+
+    for i in range(n_styles):
+        Style.objects.create(name='Style%d' % i)
+    Style.objects.get_or_create(name='Harvard')
+    call_command('sync_style_templates', verbosity=0)
+    StyleTemplate.objects.all().update(template=DEFAULT_TEMPLATE)
+
+    List.objects.bulk_create([
+        List(list='list%d' % i, description='List %d' % i) for i in range(n_lists)])
+    lists = list(List.objects.all())
+
+    authors = make_authors(rng, n_authors)
+    keywords = ['%s %s' % (rng.choice(WORDS), rng.choice(WORDS)) for _ in range(n_keywords)]
+
+    Publication.objects.bulk_create([
+        Publication(type=rng.choice(types), **publication_fields(rng, i, authors, keywords))
+        for i in range(n_publications)])
+
+    # publications created in bulk are indexed separately
+    call_command('rebuild_authors', verbosity=0)
+    call_command('rebuild_blocking_keys', verbosity=0)
+
+    through = Publication.lists.through
+    through.objects.bulk_create([
+        through(publication_id=pk, list_id=rng.choice(lists).pk)
+        for pk in Publication.objects.values_list('pk', flat=True)
+        if rng.random() < 0.5])
+
+    publication = Publication.objects.filter(external=False).exclude(keywords='')[0]
+
+    return {
+        'publication': publication.pk,
+        'year': publication.year,
+        'author': publication.authors_escaped()[0][1],
+        'keyword': publication.keywords_escaped()[0][1],
+        'list': lists[0].list,
+    }
+
+
+def generate_bibtex(n_entries=1000, n_authors=200, seed=0):
+    """
+    Returns a bibliography in BibTex format with C{n_entries} entries.
+    """
+
+    rng = random.Random(seed)
+    authors = make_authors(rng, n_authors)
+    entries = []
+
+    for i in range(n_entries):
+        names = [a.rsplit(' ', 1) for a in rng.sample(authors, rng.randint(1, 6))]
+        entries.append('\n'.join([
+            '@article{bench%d,' % i,
+            '  author = {%s},' % ' and '.join('%s, %s' % (s, f) for f, s in names),
+            '  title = {{%s}},' % make_title(rng),
+            '  journal = {Journal of {\\"U}ber %s},' % rng.choice(WORDS),
+            '  year = {%d},' % rng.randint(1990, 2014),
+            '  month = {%s},' % rng.choice(['jan', 'feb', 'mar', 'apr']),
+            '  volume = {%d},' % rng.randint(1, 50),
+            '  pages = {%d--%d},' % (i, i + 10),
+            '  keywords = {%s, %s},' % (rng.choice(WORDS), rng.choice(WORDS)),
+            '}']))
+
+    return '\n\n'.join(entries)
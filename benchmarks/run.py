@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+Runs the benchmarks and prints the results as JSON.
+
+Usage::
+
+    python -m benchmarks.run [--publications N] [--repeat R] [--output FILE]
+
+Every benchmark is run C{R} times on a fresh synthetic SQLite catalog; the
+minimum, median and maximum wall-clock time in seconds are reported so that
+the output of runs on different commits can be compared directly.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from timeit import default_timer
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+    import django
+    if hasattr(django, 'setup'):
+        django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', interactive=False, verbosity=0)
+
+
+def measure(func, repeat):
+    """
+    Calls C{func} C{repeat} times after one warm-up call.
+    """
+
+    func()
+    times = []
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        times.append(default_timer() - start)
+    times.sort()
+    return {
+        'min': times[0],
+        'median': times[len(times) // 2],
+        'max': times[-1],
+        'repeat': repeat,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmarks(args, names):
+    """
+    Returns a list of (name, function) pairs to be timed.
+    """
+
+    from django.db import transaction
+    from django.test.client import RequestFactory
+    from publications import views
+    from publications.helpers import create_publications_from_entries, parse
+    from publications.latex import decode, encode
+    from publications.models import Publication, StyleTemplate
+    from publications.templatetags.publication_extras import tex_parse
+    from benchmarks.data import generate_bibtex
+
+    factory = RequestFactory(HTTP_HOST='testserver')
+
+    def view(func, path, query='', **kwargs):
+        def run():
+            request = factory.get(path + query)
+            response = func(request, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.streaming:
+                b''.join(response)
+        return run
+
+    def instantiate():
+        list(Publication.objects.all())
+
+    bib = generate_bibtex(args.entries, seed=args.seed)
+
+    def parse_bibtex():
+        parse(bib)
+
+    # a large input with many accents
+    tex = bib * 10
+    text = decode(tex)
+
+    def decode_tex():
+        decode(tex)
+
+    def encode_text():
+        encode(text)
+
+    def import_entries():
+        with transaction.atomic():
+            entries, duplicates = parse(bib)
+            create_publications_from_entries(entries, duplicates)
+            transaction.set_rollback(True)
+
+    publications = list(Publication.objects.select_related('type'))
+    templates = dict((t.bibtype_id, t) for t in
+        StyleTemplate.objects.filter(style__name='Harvard'))
+
+    def format_publications():
+        for publication in publications:
+            templates[publication.type_id].format(publication)
+
+    titles = [publication.title for publication in publications]
+
+    def parse_titles():
+        for title in titles:
+            tex_parse(title)
+
+    results = [
+        ('publication_init', instantiate),
+        ('helpers.parse', parse_bibtex),
+        ('latex.decode', decode_tex),
+        ('latex.encode', encode_text),
+        ('create_publications_from_entries', import_entries),
+        ('StyleTemplate.format', format_publications),
+        ('tex_parse', parse_titles),
+    ]
+
+    urls = [
+        ('year', views.year, '/publications/', {}),
+        ('year.single', views.year, '/publications/year/%d/' % names['year'], {'year': names['year']}),
+        ('person', views.person, '/publications/%s/' % names['author'], {'name': names['author']}),
+        ('keyword', views.keyword, '/publications/tag/%s/' % names['keyword'], {'keyword': names['keyword']}),
+        ('list', views.list, '/publications/list/%s/' % names['list'], {'list': names['list']}),
+        ('id', views.id, '/publications/%d/' % names['publication'], {'publication_id': names['publication']}),
+    ]
+
+    for name, func, path, kwargs in urls:
+        for fmt in ('', 'bibtex', 'ascii', 'rss', 'csl-json', 'ris', 'endnote'):
+            label = 'view.%s%s' % (name, '.' + fmt if fmt else '')
+            results.append((label, view(func, path, '?' + fmt if fmt else '', **kwargs)))
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--publications', type=int, default=1000)
+    parser.add_argument('--authors', type=int, default=200)
+    parser.add_argument('--keywords', type=int, default=50)
+    parser.add_argument('--lists', type=int, default=10)
+    parser.add_argument('--styles', type=int, default=5)
+    parser.add_argument('--entries', type=int, default=1000,
+        help='number of BibTex entries to parse and import')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--filter', default='',
+        help='only run benchmarks whose name contains this string')
+    parser.add_argument('--output', help='write results to this file instead of stdout')
+    args = parser.parse_args(argv)
+
+    setup()
+
+    import django
+    from benchmarks.data import generate
+
+    names = generate(args.publications, args.authors, args.keywords,
+        args.lists, args.styles, args.seed)
+
+    results = {}
+    for name, func in benchmarks(args, names):
+        if args.filter in name:
+            results[name] = measure(func, args.repeat)
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'results': results,
+    }
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        sys.stdout.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
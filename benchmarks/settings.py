@@ -0,0 +1,38 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SECRET_KEY = 'benchmarks'
+DEBUG = False
+TEMPLATE_DEBUG = False
+ALLOWED_HOSTS = ['*']
+SITE_ID = 1
+MIDDLEWARE_CLASSES = ()
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('PUBLICATIONS_BENCHMARK_DB', ':memory:'),
+    }
+}
+
+INSTALLED_APPS = (
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.sites',
+    'django.contrib.admin',
+    'publications',
+)
+
+# the app ships South migrations, create its tables directly instead
+MIGRATION_MODULES = {'publications': 'benchmarks.no_migrations'}
+
+ROOT_URLCONF = 'benchmarks.urls'
+TEMPLATE_DIRS = (os.path.join(BASE_DIR, 'templates'),)
+MEDIA_URL = '/media/'
+STATIC_URL = '/static/'
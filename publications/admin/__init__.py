@@ -3,14 +3,16 @@ __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
 from django.contrib import admin
-from publications.models import Type, List, Publication, Style
+from publications.models import Type, List, Publication, Style, Author
 from .publicationadmin import PublicationAdmin
 from .typeadmin import TypeAdmin
 from .listadmin import ListAdmin
 from .orderedmodeladmin import OrderedModelAdmin
 from .styleadmin import StyleAdmin
+from .authoradmin import AuthorAdmin
 
 admin.site.register(Type, TypeAdmin)
 admin.site.register(List, ListAdmin)
 admin.site.register(Publication, PublicationAdmin)
 admin.site.register(Style, StyleAdmin)
+admin.site.register(Author, AuthorAdmin)
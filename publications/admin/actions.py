@@ -0,0 +1,162 @@
+"""
+Bulk actions of the publication and type admins. Every action is executed
+with a constant number of queries (except for regenerating citekeys and
+changing types, which update the citekey or content hash of every selected
+row) and invalidates the cache once, as neither C{QuerySet.update} nor
+C{bulk_create} send signals.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from collections import defaultdict
+
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from publications.caching import bump_version
+from publications.exporters import get_exporters
+from publications.helpers import update_content_hashes
+from publications.models import Publication
+
+
+def update(queryset, **values):
+    """
+    Updates the selected publications, and their content hashes if hashed
+    fields were changed, so that re-imports do not take them for modified.
+    """
+
+    pks = list(queryset.values_list('pk', flat=True))
+    publications = Publication.objects.filter(pk__in=pks)
+    with transaction.atomic():
+        count = publications.update(**values)
+        if any(name not in Publication.UNHASHED_FIELDS for name in values):
+            update_content_hashes(publications)
+    bump_version()
+    return count
+
+
+def add_to_list_action(lst):
+    def add_to_list(modeladmin, request, queryset):
+        through = Publication.lists.through
+
+        with transaction.atomic():
+            existing = set(through.objects
+                .filter(list=lst, publication__in=queryset.values('pk'))
+                .values_list('publication_id', flat=True))
+            through.objects.bulk_create([
+                through(publication_id=pk, list_id=lst.pk)
+                for pk in queryset.values_list('pk', flat=True)
+                if pk not in existing])
+        bump_version()
+
+        modeladmin.message_user(request,
+            'Added selected publications to list "%s".' % lst.list)
+
+    add_to_list.short_description = 'Add to list "%s"' % lst.list
+    return 'add_to_list_%d' % lst.pk, add_to_list
+
+
+def remove_from_list_action(lst):
+    def remove_from_list(modeladmin, request, queryset):
+        Publication.lists.through.objects \
+            .filter(list=lst, publication__in=queryset.values('pk')).delete()
+        bump_version()
+
+        modeladmin.message_user(request,
+            'Removed selected publications from list "%s".' % lst.list)
+
+    remove_from_list.short_description = 'Remove from list "%s"' % lst.list
+    return 'remove_from_list_%d' % lst.pk, remove_from_list
+
+
+def set_type_action(type):
+    def set_type(modeladmin, request, queryset):
+        count = update(queryset, type=type)
+
+        modeladmin.message_user(request,
+            'Changed type of %d publication(s) to "%s".' % (count, type.type))
+
+    set_type.short_description = 'Change type to "%s"' % type.type
+    return 'set_type_%d' % type.pk, set_type
+
+
+def mark_external(modeladmin, request, queryset):
+    count = update(queryset, external=True)
+    modeladmin.message_user(request, 'Marked %d publication(s) as external.' % count)
+mark_external.short_description = 'Mark as external'
+
+
+def mark_internal(modeladmin, request, queryset):
+    count = update(queryset, external=False)
+    modeladmin.message_user(request, 'Marked %d publication(s) as internal.' % count)
+mark_internal.short_description = 'Mark as internal'
+
+
+def regenerate_citekeys(modeladmin, request, queryset):
+    """
+    Replaces the citekeys of the selected publications by keys of the form
+    C{Gauss1809a}, computed as in L{Publication.key} but for all publications
+    at once. Publications without a year get keys of the form C{Gaussa}.
+    """
+
+    selected = set(queryset.values_list('pk', flat=True))
+    years = set(queryset.values_list('year', flat=True))
+
+    # year__in never matches publications without a year
+    same_year = Q(year__in=years - set([None]))
+    if None in years:
+        same_year |= Q(year__isnull=True)
+
+    # publications of the same year and first author, in the order used by Publication.key
+    groups = defaultdict(list)
+    for publication in Publication.objects.filter(same_year) \
+            .only('title', 'authors', 'keywords', 'year', 'month') \
+            .order_by('month', 'id'):
+        lastname = publication.authors_list[0].split(' ')[-1]
+        groups[lastname, publication.year].append(publication.pk)
+
+    citekeys = {}
+    for (lastname, year), pks in groups.items():
+        for i, pk in enumerate(pks):
+            if pk in selected:
+                citekeys[pk] = lastname + (str(year) if year else '') + chr(ord('a') + i)
+
+    try:
+        with transaction.atomic():
+            # free the old keys first, as keys may be swapped among the selection
+            Publication.objects.filter(pk__in=citekeys.keys()).update(citekey=None)
+            for pk, citekey in citekeys.items():
+                Publication.objects.filter(pk=pk).update(citekey=citekey)
+    except IntegrityError:
+        modeladmin.message_user(request, 'Citekeys were not changed, as some of the '
+            'new citekeys are used by other publications.', messages.ERROR)
+        return
+    bump_version()
+
+    modeladmin.message_user(request, 'Regenerated %d citekey(s).' % len(citekeys))
+regenerate_citekeys.short_description = 'Regenerate citekeys'
+
+
+def export_bibtex(modeladmin, request, queryset):
+    # the changelist only loads the columns it displays
+    publications = Publication.objects.filter(pk__in=queryset.values('pk'))
+
+    response = get_exporters()['bibtex'].export(request,
+        publications.order_by('-year', '-month', '-id'))
+    response['Content-Disposition'] = 'attachment; filename="publications.bib"'
+    return response
+export_bibtex.short_description = 'Export as BibTex'
+
+
+def hide_types(modeladmin, request, queryset):
+    queryset.update(hidden=True)
+    bump_version()
+hide_types.short_description = 'Hide publications of these types'
+
+
+def show_types(modeladmin, request, queryset):
+    queryset.update(hidden=False)
+    bump_version()
+show_types.short_description = 'Show publications of these types'
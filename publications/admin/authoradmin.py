@@ -0,0 +1,15 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from django.contrib import admin
+from publications.models import AuthorVariant
+
+class AuthorVariantInline(admin.TabularInline):
+    model = AuthorVariant
+    extra = 0
+
+class AuthorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'key')
+    search_fields = ('name', 'key', 'variants__key')
+    inlines = [AuthorVariantInline]
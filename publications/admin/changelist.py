@@ -0,0 +1,86 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from django.conf import settings
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+
+# fields needed to construct and display a publication in the changelist
+CHANGELIST_FIELDS = ('type', 'citekey', 'title', 'authors', 'keywords', 'year',
+    'month', 'journal', 'book_title')
+
+# estimates below this number of rows are replaced by an exact count
+EXACT_COUNT_LIMIT = getattr(settings, 'PUBLICATIONS_ADMIN_EXACT_COUNT_LIMIT', 10000)
+
+
+def estimate_count(queryset):
+    """
+    Returns the number of rows in the table of an unfiltered queryset as
+    estimated by the database statistics, or C{None} if no estimate is
+    available.
+
+    @rtype: int
+    """
+
+    if queryset.query.where or queryset.query.distinct:
+        return None
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables ' \
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+    else:
+        return None
+
+    cursor = connection.cursor()
+    try:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    if row is None or row[0] is None or row[0] < EXACT_COUNT_LIMIT:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountQuerySet(QuerySet):
+    def count(self):
+        count = estimate_count(self)
+        if count is None:
+            return super(EstimatedCountQuerySet, self).count()
+        return count
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which avoids counting all rows of large tables on PostgreSQL
+    and MySQL. Filtered querysets are still counted exactly.
+    """
+
+    def _get_count(self):
+        if self._count is None:
+            if isinstance(self.object_list, QuerySet):
+                self._count = estimate_count(self.object_list)
+            if self._count is None:
+                return super(EstimatedCountPaginator, self)._get_count()
+        return self._count
+    count = property(_get_count)
+
+
+class PublicationChangeList(ChangeList):
+    def get_queryset(self, request):
+        return super(PublicationChangeList, self).get_queryset(request) \
+            .only(*CHANGELIST_FIELDS)
+
+    def get_results(self, request):
+        # the total shown next to filtered results is estimated as well
+        self.root_queryset = self.root_queryset._clone(klass=EstimatedCountQuerySet)
+        super(PublicationChangeList, self).get_results(request)
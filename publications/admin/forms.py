@@ -5,7 +5,7 @@ class PublicationAdminForm(ModelForm):
     def __init__(self, *args, **kwargs):
         super(PublicationAdminForm, self).__init__(*args, **kwargs)
         instance = kwargs.get('instance')
-        if instance:
+        if instance and instance.type_id:
             required_fields = instance.type.get_bibtex_required_list()
             for field in required_fields:
                 self.fields[field].required = True
@@ -2,10 +2,19 @@ __license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
 __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
+from django.conf import settings
 from django.contrib import admin
-from publications.models import CustomLink, CustomFile, Publication
+from django.db import connections
+from django.db.models import Q
+from publications.models import CustomLink, CustomFile, List, Publication, Type
+from publications.admin.actions import add_to_list_action, export_bibtex, mark_external, \
+    mark_internal, regenerate_citekeys, remove_from_list_action, set_type_action
+from publications.admin.changelist import EstimatedCountPaginator, PublicationChangeList
 from publications.admin.forms import PublicationAdminForm
 
+# one of 'icontains', 'indexed' or 'fulltext'
+SEARCH = getattr(settings, 'PUBLICATIONS_ADMIN_SEARCH', 'icontains')
+
 class CustomLinkInline(admin.StackedInline):
     model = CustomLink
     extra = 1
@@ -19,41 +28,94 @@ class CustomFileInline(admin.StackedInline):
 
 
 class PublicationAdmin(admin.ModelAdmin):
-    list_display = ('type', 'citekey', 'first_author', 'title', 'type', 'year', 'journal_or_book_title')
+    list_display = ('type', 'citekey', 'first_author', 'title', 'year', 'journal_or_book_title')
     list_display_links = ('title',)
+    list_select_related = ('type',)
+    paginator = EstimatedCountPaginator
     change_list_template = 'admin/publications/change_list.html'
     search_fields = ('title', 'journal', 'authors', 'keywords', 'year')
     inlines = [CustomLinkInline, CustomFileInline]
+    actions = [mark_external, mark_internal, regenerate_citekeys, export_bibtex]
+
+    def get_actions(self, request):
+        result = super(PublicationAdmin, self).get_actions(request)
+        if not result:
+            # actions are disabled, e.g. in popups
+            return result
+
+        # actions depending on the lists and types in the database
+        lists = List.objects.all()
+        dynamic = [add_to_list_action(lst) for lst in lists] \
+            + [remove_from_list_action(lst) for lst in lists] \
+            + [set_type_action(type) for type in Type.objects.all()]
+        for name, func in dynamic:
+            result[name] = (func, name, func.short_description)
+
+        return result
+
+    def get_changelist(self, request, **kwargs):
+        return PublicationChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        if SEARCH == 'icontains' or not search_term.strip():
+            return super(PublicationAdmin, self).get_search_results(
+                request, queryset, search_term)
+
+        if SEARCH == 'fulltext' and connections[queryset.db].vendor == 'postgresql':
+            # can use an index on the same expression, see README
+            return queryset.extra(
+                where=["to_tsvector('simple', title || ' ' || authors || ' ' || keywords) "
+                    "@@ plainto_tsquery('simple', %s) OR publications_publication.id IN "
+                    "(SELECT publication_id FROM publications_document "
+                    "WHERE to_tsvector('simple', text) @@ plainto_tsquery('simple', %s))"],
+                params=[search_term, search_term]), False
+
+        # only use lookups which can be answered from an index
+        for bit in search_term.split():
+            query = Q(citekey__startswith=bit)
+            if bit.isdigit():
+                query |= Q(year=int(bit))
+            queryset = queryset.filter(query)
+        return queryset, False
+
+    def get_fieldsets(self, request, obj=None):
+        if obj is None:
+            return super(PublicationAdmin, self).get_fieldsets(request, obj)
 
-    def change_view(self, request, object_id, *args, **kwargs):
         # Get the required and optional fields
-        t = Publication.objects.get(pk=object_id).type
-        required_fields = t.get_bibtex_required_list()
-        optional_fields = t.get_bibtex_optional_list()
+        required_fields = obj.type.get_bibtex_required_list()
+        optional_fields = obj.type.get_bibtex_optional_list()
 
         # Set the fieldsets to optional and required
-        self.fieldsets = [
+        fieldsets = [
             (None, {'fields':
                 ['type', 'title', 'authors', 'year'] + required_fields}),
         ]
 
         if optional_fields:
-            self.fieldsets.append((None, {'fields': optional_fields}))
+            fieldsets.append((None, {'fields': optional_fields}))
 
         # Ensure that none of the optional-applicable-to-all fields are required
         general_fields = [
                 'citekey', 'keywords', 'url', 'urldate', 'code', 'pdf', 'doi', 'isbn','issn', 'note', 'external']
         general_fields = [k for k in general_fields if k not in required_fields]
 
-        self.fieldsets.extend([
+        fieldsets.extend([
             (None, {'fields': general_fields}),
             (None, {'fields': ('abstract',)}),
             (None, {'fields': ('image', 'thumbnail')}),
             (None, {'fields': ('lists',)}),
         ])
 
-        # Amended form with required arguments
-        self.form = PublicationAdminForm
-        self.readonly_fields = ('type',)
+        return fieldsets
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return super(PublicationAdmin, self).get_readonly_fields(request, obj)
+        return ('type',)
 
-        return super(PublicationAdmin, self).change_view(request, object_id, *args, **kwargs)
+    def get_form(self, request, obj=None, **kwargs):
+        # Amended form with required arguments
+        if obj is not None:
+            kwargs['form'] = PublicationAdminForm
+        return super(PublicationAdmin, self).get_form(request, obj, **kwargs)
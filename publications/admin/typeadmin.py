@@ -3,6 +3,8 @@ __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
 from .orderedmodeladmin import OrderedModelAdmin
+from .actions import hide_types, show_types
 
 class TypeAdmin(OrderedModelAdmin):
 	list_display = ('type', 'description', 'hidden', 'move_up_down_links')
+	actions = [hide_types, show_types]
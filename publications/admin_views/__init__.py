@@ -3,3 +3,5 @@ __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
 from import_bibtex import import_bibtex
+from instrumentation import instrumentation
+from find_duplicates import find_duplicates
@@ -0,0 +1,22 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from publications.dedup import SIMILARITY_THRESHOLD, find_duplicates as find
+
+
+def find_duplicates(request):
+    try:
+        threshold = float(request.GET.get('threshold', SIMILARITY_THRESHOLD))
+    except ValueError:
+        threshold = SIMILARITY_THRESHOLD
+
+    return render(request, 'admin/publications/duplicates.html', {
+        'title': 'Possible duplicates',
+        'threshold': threshold,
+        'pairs': find(threshold),
+    })
+
+find_duplicates = staff_member_required(find_duplicates)
@@ -27,6 +27,9 @@ def import_bibtex(request):
     if form.is_valid():
         s = 's' if form.number_pubs_saved > 1 else ''
         messages.info(request, "%d publication%s successfully created" % (form.number_pubs_saved, s))
+        if form.possible_duplicates:
+            messages.warning(request, "Possible duplicates of existing publications: %s" % (
+                ', '.join(entry.get('key', entry['title']) for entry in form.possible_duplicates)))
         return HttpResponseRedirect('../')
 
     else:
@@ -0,0 +1,48 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from publications.instrumentation import RingBufferSink
+
+
+def instrumentation(request):
+    records = RingBufferSink.records()
+
+    # aggregate measurements per view
+    views = {}
+    for record in records:
+        view = views.setdefault(record['view'], {
+            'view': record['view'],
+            'requests': 0,
+            'queries': 0,
+            'max_queries': 0,
+            'db_time': 0.,
+            'render_time': 0.,
+            'total_time': 0.,
+            'rows': 0,
+        })
+        view['requests'] += 1
+        view['queries'] += record['queries']
+        view['max_queries'] = max(view['max_queries'], record['queries'])
+        view['db_time'] += record['db_time']
+        view['render_time'] += record['render_time']
+        view['total_time'] += record['total_time']
+        view['rows'] += record['rows']
+
+    for view in views.values():
+        n = float(view['requests'])
+        view['queries'] /= n
+        view['rows'] /= n
+        for key in ('db_time', 'render_time', 'total_time'):
+            # average in milliseconds
+            view[key] *= 1000. / n
+
+    return render(request, 'admin/publications/instrumentation.html', {
+        'title': 'Instrumentation',
+        'views': sorted(views.values(), key=lambda v: -v['total_time']),
+        'records': records[::-1],
+    })
+
+instrumentation = staff_member_required(instrumentation)
@@ -0,0 +1,127 @@
+"""
+Identities of authors.
+
+Every author of a publication is linked through an L{Authorship} to the
+L{AuthorVariant} of the simplified form of the author's name, which belongs to
+an L{Author}. All publications of an author are thus retrieved with a single
+indexed lookup, whatever the spelling of the name, and authors are merged by
+pointing their variants to the same author.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from collections import OrderedDict
+
+from django.db import transaction
+from publications.models import Author, AuthorVariant, Authorship, Publication
+from publications.names import author_keys, name_key, simplify_name
+
+# number of publications indexed with one query
+CHUNK_SIZE = 500
+
+KEY_LENGTH = Author._meta.get_field('key').max_length
+
+
+def get_keys(publication):
+    """
+    Returns the position, name and keys of every author of a publication.
+    """
+
+    # names in braces, e.g. of institutions, are not split
+    braced = publication.authors[:1] == '{'
+
+    for position, author in enumerate(publication.authors_list):
+        keys = [simplify_name(author)] if braced else author_keys(author)
+        keys = [key[:KEY_LENGTH] for key in keys if key.strip(' .-')]
+        if keys:
+            yield position, author, keys
+
+
+def get_variants(names):
+    """
+    Returns the ids of the variants of simplified names, creating the authors
+    and variants which do not exist yet.
+
+    @type names: OrderedDict
+    @param names: maps keys to the name and all keys of an author
+    """
+
+    variants = dict(AuthorVariant.objects.filter(key__in=list(names))
+        .values_list('key', 'pk'))
+
+    missing = [key for key in names if key not in variants]
+    if not missing:
+        return variants
+
+    # new keys belong to the author of any existing key of the same name, such
+    # as a name with umlauts whose digraph spelling is already known
+    existing = dict(AuthorVariant.objects.filter(
+        key__in=set(other for key in missing for other in names[key][1]))
+        .values_list('key', 'author_id'))
+    authors = {}
+    for key in missing:
+        for other in names[key][1]:
+            if other in existing:
+                authors[key] = existing[other]
+                break
+
+    new = [key for key in missing if key == names[key][1][0] and key not in authors]
+    known = set(Author.objects.filter(key__in=new).values_list('key', flat=True))
+    Author.objects.bulk_create([Author(key=key, name=names[key][0])
+        for key in new if key not in known])
+    authors.update(Author.objects.filter(key__in=new).values_list('key', 'pk'))
+
+    # first keys were added to the ordered names before any other key
+    for key in missing:
+        if key not in authors:
+            authors[key] = authors[names[key][1][0]]
+
+    AuthorVariant.objects.bulk_create([AuthorVariant(key=key, author_id=authors[key])
+        for key in missing])
+    variants.update(AuthorVariant.objects.filter(key__in=missing).values_list('key', 'pk'))
+    return variants
+
+
+def index_publications(publications):
+    """
+    Replaces the authorships of publications.
+    """
+
+    publications = [publication for publication in publications if publication.pk]
+
+    with transaction.atomic():
+        for i in range(0, len(publications), CHUNK_SIZE):
+            chunk = publications[i:i + CHUNK_SIZE]
+
+            authorships = []
+            for publication in chunk:
+                for position, author, keys in get_keys(publication):
+                    authorships.append((publication.pk, position, author, keys))
+
+            # names with umlauts come first, so that their digraph spellings
+            # belong to them rather than to authors of their own
+            names = OrderedDict()
+            for pk, position, author, keys in sorted(authorships,
+                    key=lambda authorship: -len(authorship[3])):
+                for key in keys:
+                    names.setdefault(key, (author, keys))
+
+            variants = get_variants(names) if names else {}
+
+            Authorship.objects.filter(
+                publication__in=[publication.pk for publication in chunk]).delete()
+            Authorship.objects.bulk_create([
+                Authorship(publication_id=pk, position=position, variant_id=variants[keys[0]])
+                for pk, position, author, keys in authorships])
+
+
+def get_publications(name):
+    """
+    Returns the publications of the author of a name as it appears in URLs,
+    e.g. C{maria+mueller}.
+    """
+
+    return Publication.objects.filter(
+        authorships__variant__author__variants__key=name_key(name)).distinct()
@@ -8,30 +8,42 @@ __version__ = '1.2.0'
 
 import re, six
 
-# special character mapping
-special_chars = (
-    (r'\"{a}', 'ä'), (r'{\"a}', 'ä'), (r'\"a', 'ä'), (r'H{a}', 'ä'),
-    (r'\"{A}', 'Ä'), (r'{\"A}', 'Ä'), (r'\"A', 'Ä'), (r'H{A}', 'Ä'),
-    (r'\"{o}', 'ö'), (r'{\"o}', 'ö'), (r'\"o', 'ö'), (r'H{o}', 'ö'),
-    (r'\"{O}', 'Ö'), (r'{\"O}', 'Ö'), (r'\"O', 'Ö'), (r'H{O}', 'Ö'),
-    (r'\"{u}', 'ü'), (r'{\"u}', 'ü'), (r'\"u', 'ü'), (r'H{u}', 'ü'),
-    (r'\"{U}', 'Ü'), (r'{\"U}', 'Ü'), (r'\"U', 'Ü'), (r'H{U}', 'Ü'),
-    (r'{‘a}', 'à'), (r'\‘A', 'À'),
-    (r'{‘e}', 'è'), (r'\‘E', 'È'),
-    (r'{‘o}', 'ò'), (r'\‘O', 'Ò'),
-    (r'{‘u}', 'ù'), (r'\‘U', 'Ù'),
-    (r'{’a}', 'á'), (r'\’A', 'Á'),
-    (r'{’e}', 'é'), (r'\’E', 'É'),
-    (r'{’o}', 'ó'), (r'\’O', 'Ó'),
-    (r'{’u}', 'ú'), (r'\’U', 'Ú'),
-    (r'\`a', 'à'), (r'\`A', 'À'),
-    (r'\`e', 'è'), (r'\`E', 'È'),
-    (r'\`u', 'ù'), (r'\`U', 'Ù'),
-    (r'\`o', 'ò'), (r'\`O', 'Ò'),
-    (r'\^o', 'ô'), (r'\^O', 'Ô'),
-    (r'\ss', 'ß'),
-    (r'\ae', 'æ'), (r'\AE', 'Æ'),
-    (r'\&', '&'))
+from publications.latex import decode, encode
+
+# fields written first, in this order
+FIELD_ORDER = ('author', 'title', 'year', 'month', 'journal', 'booktitle', 'publisher',
+    'institution', 'volume', 'number', 'pages', 'edition', 'series', 'address', 'keywords',
+    'doi', 'url', 'note', 'isbn', 'issn', 'abstract')
+
+# fields whose values are not LaTeX
+VERBATIM = ('doi', 'url', 'urldate', 'isbn', 'issn', 'file', 'pdf', 'code')
+
+VERBATIM_VALUE = re.compile(r'(?iu)(?<![\w-])((?:%s)\s*=\s*)("[^"]*"|{[^{}]*}|[^\s,{}"]+)' % '|'.join(VERBATIM))
+PLACEHOLDER = re.compile(r'^\x00(\d+)\x00$')
+
+def decode_fields(string):
+    """
+    Replaces special characters in a bibliography except in the values of
+    verbatim fields, which are swapped for placeholders while decoding.
+
+    @type  string: string
+    @param string: bibliography in BibTex format
+
+    @rtype: tuple
+    @return: the decoded bibliography and a function restoring a placeholder
+    """
+
+    values = []
+
+    def protect(match):
+        values.append(match.group(2))
+        return '%s\x00%d\x00' % (match.group(1), len(values) - 1)
+
+    def restore(value):
+        match = PLACEHOLDER.match(value.strip())
+        return values[int(match.group(1))] if match else value
+
+    return decode(VERBATIM_VALUE.sub(protect, string)), restore
 
 def parse(string):
     """
@@ -53,8 +65,7 @@ def parse(string):
         string = string.decode('utf-8')
 
     # replace special characters
-    for key, value in special_chars:
-        string = string.replace(key, value)
+    string, restore = decode_fields(string)
 
     # split into BibTex entries
     entries = re.findall(r'(?u)@(\w+)[ \t]?{[ \t]*([^,\s]*)[ \t]*,?\s*((?:[^=,\s]+\s*\=\s*(?:"[^"]*"|{(?:[^{}]*|{[^{}]*})*}|[^,}]*),?\s*?)+)\s*}', string)
@@ -73,6 +84,7 @@ def parse(string):
 
             # post-process key and value
             key = key.lower()
+            value = restore(value)
             if value and value[0] == '"' and value[-1] == '"':
                 value = value[1:-1]
             if value and value[0] == '{' and value[-1] == '}':
@@ -90,12 +102,75 @@ def parse(string):
     return bib
 
 
+def balanced(string):
+    """
+    Tests whether the braces of a string are balanced.
+    """
+
+    depth = 0
+    for c in string:
+        if c == '{':
+            depth += 1
+        elif c == '}':
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def format_value(key, value):
+    if isinstance(value, six.integer_types) or (
+            isinstance(value, six.string_types) and value.isdigit()):
+        return '%s' % value
+
+    value = six.text_type(value)
+    # quotes cannot be escaped within quotes
+    quoted = '"' not in value
+    if not balanced(value):
+        # BibTex counts braces even if they are escaped
+        value = value.replace('{', '').replace('}', '')
+    if key not in VERBATIM:
+        value = encode(value)
+
+    return '"%s"' % value if quoted else '{%s}' % value
+
+
+def format_entry(entry):
+    """
+    Returns a BibTex entry as a string. The entry is not modified, and empty
+    fields are left out.
+
+    @type  entry: dict
+    @param entry: fields of the entry as well as its C{type} and C{key}
+    """
+
+    keys = [key for key in FIELD_ORDER if key in entry]
+    keys.extend(sorted(key for key in entry
+        if key not in FIELD_ORDER and key not in ('type', 'key')))
+
+    fields = ['  %s = %s' % (key, format_value(key, entry[key]))
+        for key in keys if entry[key] not in ('', None)]
+
+    return '@%s{%s,\n%s\n}\n' % (entry.get('type', 'misc'), entry.get('key', ''),
+        ',\n'.join(fields))
+
+
+def write(entries, stream):
+    """
+    Writes BibTex entries to a file-like object one at a time.
+    """
+
+    for i, entry in enumerate(entries):
+        if i:
+            stream.write('\n')
+        stream.write(format_entry(entry))
+
+
 def unparse(entries):
-    es = []
-    for entry in entries:
-        outline = '@%s{%s,\n\t%s}'
-        type = entry.pop('type')
-        key = entry.pop('key')
-        joined = ',\n\t'.join(['%s = {%s}' % (k, v) for (k, v) in entry.iteritems()])
-        es.append(outline % (type, key, joined))
-    return '\n'.join(es)
+    """
+    Returns BibTex entries as a string. The entries are not modified.
+    """
+
+    stream = six.StringIO()
+    write(entries, stream)
+    return stream.getvalue()
@@ -0,0 +1,200 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from functools import wraps
+from hashlib import md5
+from time import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import cc_delim_re
+from django.utils.http import parse_etags, quote_etag
+
+VERSION_KEY = 'publications:version'
+
+# how long rendered fragments are kept, in seconds
+TIMEOUT = getattr(settings, 'PUBLICATIONS_CACHE_TIMEOUT', 60 * 60)
+
+# whether whole responses of views are cached
+CACHE_VIEWS = getattr(settings, 'PUBLICATIONS_CACHE_VIEWS', False)
+
+# responses larger than this many bytes are not cached
+MAX_SIZE = getattr(settings, 'PUBLICATIONS_CACHE_MAX_SIZE', 1024 * 1024)
+
+
+def get_version():
+    """
+    Returns the current version of the publication data. All cache keys
+    contain the version, so that bumping it invalidates every cached entry.
+    """
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # start from the current time so that an evicted counter never reuses
+        # the version of stale entries
+        cache.add(VERSION_KEY, int(time()), None)
+        version = cache.get(VERSION_KEY, int(time()))
+    return version
+
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        return get_version()
+
+
+def make_key(*parts, **kwargs):
+    """
+    Returns a cache key for the current version of the publication data. Pass
+    C{version} to avoid looking up the version when creating many keys.
+    """
+
+    version = kwargs.get('version') or get_version()
+    parts = u':'.join(u'%s' % part for part in parts)
+    return 'publications:%d:%s' % (version, md5(parts.encode('utf-8')).hexdigest())
+
+
+def cache_stream(key, content_type, vary, chunks):
+    """
+    Passes on the chunks of a streaming response and caches them once the
+    response has been sent completely.
+    """
+
+    parts, size = [], 0
+    for chunk in chunks:
+        yield chunk
+        if parts is not None:
+            parts.append(chunk)
+            size += len(chunk)
+            if size > MAX_SIZE:
+                parts = None
+    if parts is not None:
+        cache.set(key, (content_type, vary, b''.join(parts)), TIMEOUT)
+
+
+def is_anonymous(request):
+    user = getattr(request, 'user', None)
+    return user is None or not user.is_authenticated()
+
+
+def get_vary_headers(request, response):
+    """
+    Returns the sorted names of the request headers a response varies on. As
+    C{SessionMiddleware} only adds the cookies to the C{Vary} header after the
+    view, they are included whenever the request has a session, from which the
+    user is looked up.
+    """
+
+    headers = set(header.lower() for header in cc_delim_re.split(response.get('Vary', '')) if header)
+    if getattr(request, 'session', None) is not None:
+        headers.add('cookie')
+    return sorted(headers)
+
+
+def get_view_key(request, headers, version):
+    """
+    Returns the cache key of a response, which depends on the host, the path
+    and the values of the request headers the response varies on.
+    """
+
+    values = [request.META.get('HTTP_' + header.upper().replace('-', '_'), '') for header in headers]
+    return make_key('view', request.get_host(), request.get_full_path(), *values, version=version)
+
+
+def is_cacheable(request, response, headers):
+    """
+    Returns true if a response is the same for every anonymous visitor sending
+    the same headers. Responses setting cookies are not, including those whose
+    CSRF or session cookie is only added by the middleware after the view.
+    """
+
+    session = getattr(request, 'session', None)
+    return (response.status_code == 200 and not response.cookies and '*' not in headers
+        and not request.META.get('CSRF_COOKIE_USED')
+        and not (session is not None and session.modified))
+
+
+def cache_view(view):
+    """
+    Caches the responses of a view to GET requests of anonymous visitors for
+    the current version of the publication data if C{PUBLICATIONS_CACHE_VIEWS}
+    is enabled. Exports are still streamed to the first client requesting them.
+
+    Like C{django.middleware.cache}, the names of the request headers listed in
+    the C{Vary} header of a response are cached for its host and path, and the
+    response itself under a key which also contains the values of these
+    headers. Responses which set cookies are not cached.
+
+    Responses carry their cache key as their ETag, so that clients polling a
+    page or feed which has not changed get an empty response without a single
+    query.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not CACHE_VIEWS or request.method != 'GET' or not is_anonymous(request):
+            return view(request, *args, **kwargs)
+
+        version = get_version()
+        headers_key = make_key('view-headers', request.get_host(), request.get_full_path(),
+            version=version)
+
+        headers = cache.get(headers_key)
+        if headers is not None:
+            key = get_view_key(request, headers, version)
+            tag = key.split(':', 1)[1]
+            etag = quote_etag(tag)
+            if tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+            cached = cache.get(key)
+            if cached is not None:
+                content_type, vary, content = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['ETag'] = etag
+                if vary:
+                    response['Vary'] = vary
+                return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        def learn(response):
+            """
+            Stores the headers the response varies on and returns the key of
+            the response, or C{None} if it cannot be cached.
+            """
+
+            headers = get_vary_headers(request, response)
+            if not is_cacheable(request, response, headers):
+                return None
+            cache.set(headers_key, headers, TIMEOUT)
+            key = get_view_key(request, headers, version)
+            response['ETag'] = quote_etag(key.split(':', 1)[1])
+            return key
+
+        def store(response):
+            key = learn(response)
+            if key is not None and len(response.content) <= MAX_SIZE:
+                cache.set(key, (response['Content-Type'], response.get('Vary'), response.content),
+                    TIMEOUT)
+
+        if response.streaming:
+            key = learn(response)
+            if key is not None:
+                response.streaming_content = cache_stream(key, response['Content-Type'],
+                    response.get('Vary'), response.streaming_content)
+        elif hasattr(response, 'add_post_render_callback'):
+            # template responses are rendered later
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+        return response
+
+    return wrapper
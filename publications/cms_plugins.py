@@ -1,19 +1,45 @@
 from cms.plugin_base import CMSPluginBase
-from cms.models.pluginmodel import CMSPlugin
 from cms.plugin_pool import plugin_pool
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
 from publications import models
+from publications.caching import TIMEOUT, make_key
 from django.utils.translation import ugettext as _
 
 
 class Publications(CMSPluginBase):
-    model = CMSPlugin  # Model where data about this plugin is saved
+    model = models.PublicationsPlugin  # Model where data about this plugin is saved
     module = _("Publications")
     name = _("Publications Plugin")  # Name of the plugin
-    render_template = "publications/publications.html"  # template to render the plugin with
+    render_template = "publications/cms_plugin.html"  # template to render the plugin with
 
     def render(self, context, instance, placeholder):
-        context['publications'] = models.Publication.objects.all
+        # The output of every plugin instance is cached until publications change
+        key = make_key('cms_plugin', instance.pk, instance.list_id, instance.type_id,
+            instance.year_from, instance.year_to, instance.limit, instance.style_id,
+            instance.template, instance.external)
+        html = cache.get(key)
+
+        if html is None:
+            publications = list(instance.get_publications())
+
+            for publication in publications:
+                publication.links = publication.customlink_set.all()
+                publication.files = publication.customfile_set.all()
+
+            if instance.style_id:
+                formatted = models.Style.format_publications(instance.style.name, publications)
+                html = ''.join('<p class="publication">%s</p>' % f for f in formatted)
+            else:
+                context.push()
+                context['publications'] = publications
+                html = get_template(instance.template).render(context)
+                context.pop()
+
+            cache.set(key, html, TIMEOUT)
+
+        context['publications_html'] = mark_safe(html)
         return context
 
 plugin_pool.register_plugin(Publications)  # register the plugin
-
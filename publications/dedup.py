@@ -0,0 +1,225 @@
+"""
+Detection of duplicate publications.
+
+Every publication is indexed under a few blocking keys: its DOI, a hash of its
+normalized title and the surname of its first author combined with its year.
+Only publications sharing a key are compared, using the similarity of the
+trigrams of their titles, so that the cost of looking up an entry does not
+grow with the size of the catalog.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import re
+import unicodedata
+
+from collections import defaultdict
+from hashlib import md5
+
+from django.conf import settings
+from django.db import transaction
+from publications.latex import decode
+from publications.models import BlockingKey, Publication
+
+# publications at least this similar are reported as possible duplicates
+SIMILARITY_THRESHOLD = getattr(settings, 'PUBLICATIONS_SIMILARITY_THRESHOLD', 0.6)
+
+# number of publications indexed with one query
+CHUNK_SIZE = 500
+
+# blocks larger than this are too unspecific to be compared in the report
+MAX_BLOCK_SIZE = 100
+
+TEX_COMMAND = re.compile(r'\\[a-zA-Z]+\s*|\\.')
+NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+DOI_PREFIX = re.compile(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', re.I)
+
+
+def fold(string):
+    """
+    Removes TeX commands, braces, accents, case and punctuation.
+    """
+
+    string = decode(u'%s' % (string or ''))
+    string = TEX_COMMAND.sub('', string).replace('{', '').replace('}', '')
+    string = unicodedata.normalize('NFKD', string)
+    string = string.encode('ascii', 'ignore').decode('ascii').lower()
+    return NON_ALPHANUMERIC.sub(' ', string).strip()
+
+
+def normalize_doi(doi):
+    return DOI_PREFIX.sub('', (doi or '').strip()).lower()
+
+
+def surname(author):
+    names = fold(author).split()
+    return names[-1] if names else ''
+
+
+def trigrams(title):
+    title = '  %s ' % fold(title)
+    return set(title[i:i + 3] for i in range(len(title) - 2))
+
+
+def similarity(a, b):
+    """
+    Jaccard similarity of two sets of trigrams.
+    """
+
+    if not a or not b:
+        return 0.
+    return len(a & b) / float(len(a | b))
+
+
+class Record(object):
+    """
+    The parts of a publication or BibTex entry used to detect duplicates.
+    """
+
+    def __init__(self, title, first_author, year=None, doi=None):
+        try:
+            self.year = int(year)
+        except (TypeError, ValueError):
+            self.year = None
+        self.doi = normalize_doi(doi)
+        self.title = fold(title)
+        self.trigrams = trigrams(title)
+
+        self.keys = set()
+        if self.doi:
+            self.keys.add('doi:' + self.doi[:124])
+        if self.title:
+            self.keys.add('title:' + md5(self.title.encode('utf-8')).hexdigest())
+        author = surname(first_author)
+        if author and self.year:
+            self.keys.add(('author:%s:%d' % (author, self.year))[:128])
+
+    @classmethod
+    def from_publication(cls, publication):
+        return cls(publication.title, publication.authors_list[0],
+            publication.year, publication.doi)
+
+    def is_duplicate(self, other):
+        """
+        Returns true if both records have the same DOI, or the same normalized
+        title and year. Similar titles, such as those of the parts of a series,
+        do not make records duplicates.
+        """
+
+        if self.doi and self.doi == other.doi:
+            return True
+        return bool(self.title) and self.title == other.title \
+            and self.year is not None and self.year == other.year
+
+    def score(self, other):
+        if self.doi and self.doi == other.doi:
+            return 1.
+        if self.year and other.year and self.year != other.year:
+            return 0.
+        return similarity(self.trigrams, other.trigrams)
+
+
+def index_publications(publications):
+    """
+    Replaces the blocking keys of publications.
+    """
+
+    publications = [publication for publication in publications if publication.pk]
+
+    with transaction.atomic():
+        for i in range(0, len(publications), CHUNK_SIZE):
+            chunk = publications[i:i + CHUNK_SIZE]
+            BlockingKey.objects.filter(
+                publication__in=[publication.pk for publication in chunk]).delete()
+            BlockingKey.objects.bulk_create([
+                BlockingKey(publication_id=publication.pk, key=key)
+                for publication in chunk
+                for key in Record.from_publication(publication).keys])
+
+
+def find_candidates(records, threshold=SIMILARITY_THRESHOLD):
+    """
+    Finds existing publications similar to each of the records using two
+    queries, independent of the number of records.
+
+    @rtype: list
+    @return: for every record, a list of triples of similarity, publication and
+    whether the record is a duplicate of it, duplicates first
+    """
+
+    keys = set()
+    for record in records:
+        keys |= record.keys
+    if not keys:
+        return [[] for record in records]
+
+    blocks = defaultdict(set)
+    for key, publication_id in BlockingKey.objects.filter(key__in=keys) \
+            .values_list('key', 'publication_id'):
+        blocks[key].add(publication_id)
+
+    ids = set()
+    for block in blocks.values():
+        ids |= block
+    publications = dict((publication.pk, (publication, Record.from_publication(publication)))
+        for publication in Publication.objects.filter(pk__in=ids)
+            .only('title', 'authors', 'keywords', 'year', 'doi'))
+
+    candidates = []
+    for record in records:
+        scored = []
+        for publication_id in set().union(*[blocks[key] for key in record.keys]):
+            if publication_id not in publications:
+                continue
+            publication, other = publications[publication_id]
+            score = record.score(other)
+            duplicate = record.is_duplicate(other)
+            if duplicate or score >= threshold:
+                scored.append((score, publication, duplicate))
+        scored.sort(key=lambda triple: (not triple[2], -triple[0]))
+        candidates.append(scored)
+    return candidates
+
+
+def find_duplicates(threshold=SIMILARITY_THRESHOLD):
+    """
+    Compares all publications sharing a blocking key.
+
+    @rtype: list
+    @return: triples of similarity and two publications, most similar first
+    """
+
+    # scan the keys in order, so that every block is read exactly once
+    blocks = []
+    block_key, block = None, set()
+    for key, publication_id in BlockingKey.objects.order_by('key') \
+            .values_list('key', 'publication_id').iterator():
+        if key != block_key:
+            if 1 < len(block) <= MAX_BLOCK_SIZE:
+                blocks.append(block)
+            block_key, block = key, set()
+        block.add(publication_id)
+    if 1 < len(block) <= MAX_BLOCK_SIZE:
+        blocks.append(block)
+
+    ids = sorted(set().union(*blocks))
+    publications = {}
+    for i in range(0, len(ids), CHUNK_SIZE):
+        for publication in Publication.objects.filter(pk__in=ids[i:i + CHUNK_SIZE]) \
+                .select_related('type'):
+            publications[publication.pk] = (publication, Record.from_publication(publication))
+
+    pairs = {}
+    for block in blocks:
+        block = sorted(block)
+        for i, a in enumerate(block):
+            for b in block[i + 1:]:
+                if (a, b) in pairs:
+                    continue
+                score = publications[a][1].score(publications[b][1])
+                if score >= threshold:
+                    pairs[a, b] = (score, publications[a][0], publications[b][0])
+
+    return sorted(pairs.values(), key=lambda triple: (-triple[0], triple[1].pk))
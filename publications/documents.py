@@ -0,0 +1,139 @@
+"""
+Extraction of the text of the PDFs of publications.
+
+With C{PUBLICATIONS_EXTRACT_TEXT = True}, a background thread extracts the
+text and metadata of the PDF and the PDF files of a publication whenever the
+publication or one of its files is saved, and stores them as L{Document}s.
+Files whose contents have not changed since their text was extracted are
+skipped.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import logging
+import threading
+
+from contextlib import closing
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.signals import request_finished
+from django.db import transaction
+from django.dispatch import receiver
+from publications import pdf
+from publications.models import Document, Publication
+from publications.workers import Worker
+
+logger = logging.getLogger('publications.documents')
+
+_local = threading.local()
+
+
+def enabled():
+    return getattr(settings, 'PUBLICATIONS_EXTRACT_TEXT', False)
+
+
+def get_files(publication):
+    """
+    Returns the names of the PDF and the PDF files of a publication.
+    """
+
+    names = []
+    if publication.pdf:
+        names.append(publication.pdf.name)
+    for custom_file in publication.customfile_set.all():
+        name = custom_file.file.name
+        if name and name.lower().endswith('.pdf') and name not in names:
+            names.append(name)
+    return names
+
+
+def ingest(publication, force=False):
+    """
+    Extracts the text of the PDFs of a publication which have changed since
+    their text was last extracted, or of all of them if C{force} is set, and
+    deletes the text of PDFs which are no longer attached.
+
+    @rtype: C{tuple}
+    @return: numbers of extracted and unchanged files
+    """
+
+    existing = dict((name, (pk, content_hash)) for pk, name, content_hash in
+        Document.objects.filter(publication=publication).values_list('pk', 'file', 'content_hash'))
+
+    extracted, unchanged = 0, 0
+    for name in get_files(publication):
+        with closing(default_storage.open(name)) as handle:
+            data = handle.read()
+        content_hash = sha1(data).hexdigest()
+
+        pk, previous = existing.pop(name, (None, None))
+        if content_hash == previous and not force:
+            unchanged += 1
+            continue
+
+        try:
+            values = pdf.extract(data)
+        except ValueError:
+            logger.warning('%s is not a PDF file.', name)
+            values = {'pages': None, 'title': u'', 'doi': u'', 'text': u''}
+        values['title'] = values['title'][:512]
+        values['doi'] = values['doi'][:128]
+
+        if pk is None:
+            Document.objects.create(publication=publication, file=name, content_hash=content_hash, **values)
+        else:
+            Document.objects.filter(pk=pk).update(content_hash=content_hash, **values)
+        extracted += 1
+
+    if existing:
+        Document.objects.filter(pk__in=[pk for pk, _ in existing.values()]).delete()
+
+    return extracted, unchanged
+
+
+def ingest_publication(publication_id):
+    try:
+        publication = Publication.objects.get(pk=publication_id)
+    except Publication.DoesNotExist:
+        # the publication has been deleted in the meantime, and its documents with it
+        return
+    ingest(publication)
+
+
+worker = Worker('publications.documents', ingest_publication)
+
+
+def schedule(publication_id):
+    """
+    Extracts the text of the PDFs of a publication in a background thread.
+    """
+
+    if not enabled():
+        return
+
+    if transaction.get_connection().in_atomic_block:
+        # the worker cannot see changes before they are committed, which
+        # happens at the latest when the request has been answered
+        if not hasattr(_local, 'pending'):
+            _local.pending = set()
+        _local.pending.add(publication_id)
+    else:
+        worker.schedule(publication_id)
+
+
+@receiver(request_finished)
+def schedule_pending(sender, **kwargs):
+    for publication_id in sorted(_local.__dict__.pop('pending', ())):
+        worker.schedule(publication_id)
+
+
+def wait():
+    """
+    Blocks until the text of all scheduled publications has been extracted.
+    """
+
+    worker.wait()
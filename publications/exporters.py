@@ -0,0 +1,400 @@
+"""
+Export formats of publication lists.
+
+Every view offers its publications in all registered formats, selected by a
+query parameter such as C{?bibtex}. An exporter turns one publication at a
+time into a string, so that exports are streamed to the client while the
+publications are read from the database. Additional exporters are listed in
+C{PUBLICATIONS_EXPORTERS} as dotted paths to subclasses of L{Exporter}.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import json
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.urlresolvers import reverse
+from django.db.models.query import QuerySet
+from django.http import StreamingHttpResponse
+from django.template import Context
+from django.template.loader import get_template
+from django.utils.html import escape
+try:
+    from django.utils.module_loading import import_string
+except ImportError:
+    from django.utils.module_loading import import_by_path as import_string
+from publications.bibtex import format_entry
+from publications.helpers import get_entry_from_publication
+
+_exporters = None
+
+# words which belong to the family name in CSL
+PARTICLES = ('van', 'von', 'der', 'de', 'den')
+
+
+class Exporter(object):
+    """
+    Base class of export formats. Subclasses implement L{row} and, if
+    needed, L{header} and L{footer}.
+    """
+
+    #: query parameter selecting this format
+    name = None
+    content_type = 'text/plain; charset=UTF-8'
+
+    #: string written between two rows
+    separator = ''
+
+    def header(self, request, context):
+        return ''
+
+    def row(self, publication, request, context):
+        raise NotImplementedError
+
+    def footer(self, request, context):
+        return ''
+
+    def stream(self, request, publications, context):
+        yield self.header(request, context)
+        for i, publication in enumerate(iterate(publications)):
+            if i and self.separator:
+                yield self.separator
+            yield self.row(publication, request, context)
+        yield self.footer(request, context)
+
+    def export(self, request, publications, **context):
+        """
+        Returns a streaming response with C{publications} in this format.
+        """
+
+        return StreamingHttpResponse(
+            (chunk.encode('utf-8') for chunk in self.stream(request, publications, context)),
+            content_type=self.content_type)
+
+
+class TemplateExporter(Exporter):
+    """
+    Renders every publication with the template C{template}.
+    """
+
+    template = None
+
+    def row(self, publication, request, context):
+        if not hasattr(self, '_template'):
+            self._template = get_template(self.template)
+        context = Context(dict(context, publication=publication))
+        return self._template.render(context)
+
+
+class BibTexExporter(Exporter):
+    name = 'bibtex'
+    content_type = 'text/x-bibtex; charset=UTF-8'
+
+    def row(self, publication, request, context):
+        return '\n' + format_entry(get_entry_from_publication(publication))
+
+
+class TextExporter(TemplateExporter):
+    name = 'ascii'
+    template = 'publications/publication.txt'
+
+    def header(self, request, context):
+        return '\n'
+
+
+class RSSExporter(TemplateExporter):
+    name = 'rss'
+    content_type = 'application/rss+xml; charset=UTF-8'
+    template = 'publications/publication.rss'
+
+    def header(self, request, context):
+        # links of items are relative to the first page of publications
+        context['url'] = request.build_absolute_uri(reverse('publications.views.year'))
+
+        title = 'Publications'
+        if context.get('author'):
+            title += ' by ' + context['author']
+
+        return '\n'.join([
+            '<?xml version="1.0"?>',
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">',
+            '\t<channel>',
+            '\t\t<title>%s</title>' % escape(title),
+            '\t\t<link>%s</link>' % escape(request.build_absolute_uri(request.path)),
+            '\t\t<description></description>',
+            '\t\t<atom:link href="%s" rel="self" type="application/rss+xml" />'
+                % escape(request.build_absolute_uri(request.path + '?rss')),
+            ''])
+
+    def footer(self, request, context):
+        return '\t</channel>\n</rss>\n'
+
+
+class CSLJSONExporter(Exporter):
+    """
+    Exports publications as an array of CSL-JSON items, as used by citeproc
+    processors and Zotero.
+    """
+
+    name = 'csl-json'
+    content_type = 'application/vnd.citationstyles.csl+json; charset=UTF-8'
+    separator = ',\n'
+
+    TYPES = {
+        'article': 'article-journal',
+        'book': 'book',
+        'booklet': 'pamphlet',
+        'inbook': 'chapter',
+        'incollection': 'chapter',
+        'inproceedings': 'paper-conference',
+        'conference': 'paper-conference',
+        'manual': 'book',
+        'mastersthesis': 'thesis',
+        'phdthesis': 'thesis',
+        'proceedings': 'book',
+        'techreport': 'report',
+        'unpublished': 'manuscript',
+    }
+
+    def header(self, request, context):
+        return '[\n'
+
+    def row(self, publication, request, context):
+        item = OrderedDict([
+            ('id', publication.citekey or str(publication.pk)),
+            ('type', self.TYPES.get(publication.type.bibtex_type, 'article')),
+            ('title', publication.title),
+            ('author', [csl_name(author) for author in publication.authors_list if author]),
+        ])
+
+        if publication.year:
+            item['issued'] = {'date-parts': [
+                [publication.year, publication.month] if publication.month else [publication.year]]}
+
+        for key, value in (
+                ('container-title', publication.journal or publication.book_title),
+                ('publisher', publication.publisher),
+                ('publisher-place', publication.location),
+                ('volume', publication.volume),
+                ('issue', publication.number),
+                ('page', publication.pages),
+                ('DOI', publication.doi),
+                ('URL', publication.url),
+                ('ISBN', publication.isbn),
+                ('ISSN', publication.issn),
+                ('keyword', publication.keywords),
+                ('note', publication.note),
+                ('abstract', publication.abstract)):
+            if value:
+                item[key] = value
+
+        return json.dumps(item, separators=(',', ':'))
+
+    def footer(self, request, context):
+        return '\n]\n'
+
+
+class RISExporter(Exporter):
+    name = 'ris'
+    content_type = 'application/x-research-info-systems; charset=UTF-8'
+
+    TYPES = {
+        'article': 'JOUR',
+        'book': 'BOOK',
+        'booklet': 'PAMP',
+        'inbook': 'CHAP',
+        'incollection': 'CHAP',
+        'inproceedings': 'CPAPER',
+        'conference': 'CPAPER',
+        'manual': 'BOOK',
+        'mastersthesis': 'THES',
+        'phdthesis': 'THES',
+        'proceedings': 'CONF',
+        'techreport': 'RPRT',
+        'unpublished': 'UNPB',
+    }
+
+    def row(self, publication, request, context):
+        lines = [('TY', self.TYPES.get(publication.type.bibtex_type, 'GEN'))]
+        lines.extend(('AU', author) for author in publication.authors_list if author)
+        lines.append(('TI', publication.title))
+
+        if publication.journal:
+            lines.append(('JO', publication.journal))
+        if publication.book_title:
+            lines.append(('T2', publication.book_title))
+        if publication.year:
+            lines.append(('PY', publication.year))
+        if publication.month:
+            lines.append(('DA', '%s/%02d' % (publication.year or '', publication.month)))
+
+        pages = publication.pages.replace('--', '-').split('-', 1) if publication.pages else []
+        if pages:
+            lines.append(('SP', pages[0].strip()))
+        if len(pages) > 1:
+            lines.append(('EP', pages[1].strip()))
+
+        for tag, value in (
+                ('VL', publication.volume),
+                ('IS', publication.number),
+                ('PB', publication.publisher),
+                ('CY', publication.location),
+                ('SN', publication.isbn or publication.issn),
+                ('DO', publication.doi),
+                ('UR', publication.url),
+                ('N1', publication.note),
+                ('AB', publication.abstract)):
+            if value:
+                lines.append((tag, value))
+
+        lines.extend(('KW', keyword.strip())
+            for keyword in publication.keywords.split(',') if keyword.strip())
+        lines.append(('ID', publication.citekey))
+        lines.append(('ER', ''))
+
+        return ''.join('%s  - %s\r\n' % (tag, value) for tag, value in lines if value is not None)
+
+
+class EndNoteExporter(Exporter):
+    """
+    Exports publications in the XML format of EndNote.
+    """
+
+    name = 'endnote'
+    content_type = 'application/xml; charset=UTF-8'
+
+    TYPES = {
+        'article': ('Journal Article', 17),
+        'book': ('Book', 6),
+        'inbook': ('Book Section', 5),
+        'incollection': ('Book Section', 5),
+        'inproceedings': ('Conference Proceedings', 10),
+        'conference': ('Conference Proceedings', 10),
+        'mastersthesis': ('Thesis', 32),
+        'phdthesis': ('Thesis', 32),
+        'techreport': ('Report', 27),
+        'unpublished': ('Unpublished Work', 34),
+    }
+
+    def header(self, request, context):
+        return '<?xml version="1.0" encoding="UTF-8"?>\n<xml><records>\n'
+
+    def row(self, publication, request, context):
+        name, number = self.TYPES.get(publication.type.bibtex_type, ('Generic', 13))
+
+        def element(tag, value):
+            return '<%s>%s</%s>' % (tag, escape(value), tag) if value else ''
+
+        parts = ['<record>',
+            '<ref-type name="%s">%d</ref-type>' % (name, number),
+            '<contributors><authors>',
+            ''.join(element('author', author) for author in publication.authors_list),
+            '</authors></contributors>',
+            '<titles>', element('title', publication.title),
+            element('secondary-title', publication.journal or publication.book_title),
+            '</titles>']
+
+        if publication.journal:
+            parts.append('<periodical>%s</periodical>' % element('full-title', publication.journal))
+
+        parts.extend([
+            element('pages', publication.pages),
+            element('volume', publication.volume),
+            element('number', publication.number),
+            element('publisher', publication.publisher),
+            element('pub-location', publication.location)])
+
+        keywords = [k.strip() for k in publication.keywords.split(',') if k.strip()]
+        if keywords:
+            parts.append('<keywords>%s</keywords>' % ''.join(
+                element('keyword', keyword) for keyword in keywords))
+
+        if publication.year:
+            parts.append('<dates>%s</dates>' % element('year', publication.year))
+
+        parts.extend([
+            element('isbn', publication.isbn or publication.issn),
+            element('electronic-resource-num', publication.doi),
+            element('abstract', publication.abstract),
+            element('notes', publication.note),
+            element('label', publication.citekey)])
+
+        if publication.url:
+            parts.append('<urls><related-urls>%s</related-urls></urls>'
+                % element('url', publication.url))
+
+        parts.append('</record>\n')
+        return ''.join(parts)
+
+    def footer(self, request, context):
+        return '</records></xml>\n'
+
+
+DEFAULT_EXPORTERS = (BibTexExporter, TextExporter, RSSExporter, CSLJSONExporter,
+    RISExporter, EndNoteExporter)
+
+
+def csl_name(author):
+    """
+    Splits a name such as C{J. van der Berg} into its CSL parts.
+    """
+
+    names = author.split(' ')
+    name = {'family': names[-1]}
+
+    given = names[:-1]
+    particles = []
+    while given and given[-1] in PARTICLES:
+        particles.insert(0, given.pop())
+
+    if given:
+        name['given'] = ' '.join(given)
+    if particles:
+        name['non-dropping-particle'] = ' '.join(particles)
+    return name
+
+
+def iterate(publications):
+    """
+    Iterates over publications without keeping all of them in memory if
+    C{publications} is a queryset.
+    """
+
+    if isinstance(publications, QuerySet):
+        return publications.select_related('type').iterator()
+    return iter(publications)
+
+
+def register(exporter):
+    """
+    Makes an exporter class available in all views.
+    """
+
+    get_exporters()[exporter.name] = exporter()
+    return exporter
+
+
+def get_exporters():
+    global _exporters
+    if _exporters is None:
+        _exporters = OrderedDict((exporter.name, exporter()) for exporter in DEFAULT_EXPORTERS)
+        for path in getattr(settings, 'PUBLICATIONS_EXPORTERS', ()):
+            exporter = import_string(path)
+            _exporters[exporter.name] = exporter()
+    return _exporters
+
+
+def get_exporter(request):
+    """
+    Returns the exporter selected by the query parameters of a request or
+    C{None} if no export format was requested.
+    """
+
+    for name, exporter in get_exporters().items():
+        if name in request.GET:
+            return exporter
+    return None
@@ -1,17 +1,26 @@
+import itertools
+
 from django.utils.translation import ugettext_lazy as _
 from django import forms
+from django.db import transaction
 from django.http import QueryDict
-from publications.helpers import create_publications_from_entries, parse, unparse
+from publications.helpers import unparse
+from publications.importers import PARSERS, import_entries, parse_entries
 
 
 class ImportBibtexForm(forms.Form):
+    format = forms.ChoiceField(
+        choices=[(name, label) for name, (label, parser) in PARSERS.items()],
+        initial='bibtex',
+        required=False,
+    )
     bibliography = forms.CharField(
         widget=forms.Textarea,
         help_text=_('Required keys: title, author and year.'),
         required=False,
     )
     upload = forms.FileField(
-        help_text=_('Upload .bib file'),
+        help_text=_('Upload .bib, .ris, .json or .xml file'),
         required=False,
     )
 
@@ -24,6 +33,7 @@ class ImportBibtexForm(forms.Form):
     }
 
     number_pubs_saved = 0
+    possible_duplicates = ()
 
     def clean_bibliography(self, *args, **kwargs):
         data = self.cleaned_data['bibliography']
@@ -38,26 +48,36 @@ class ImportBibtexForm(forms.Form):
         if not data:
             return data
 
-        self._clean_entries('upload', data.read())
+        self._clean_entries('upload', data)
         return data
 
     def _clean_entries(self, field, data):
         # Try creating a list of publications to add
-        entries, duplicates = parse(data)
-        if not entries:
+        try:
+            with transaction.atomic():
+                entries, duplicates = parse_entries(data, self.cleaned_data.get('format') or 'bibtex')
+                first = next(entries, None)
+                if first is None:
+                    raise ValueError
+                self.number_pubs_saved, errors = import_entries(
+                    itertools.chain([first], entries), duplicates)
+        except (ValueError, SyntaxError):
+            # nothing is imported from files which cannot be parsed completely
+            self.number_pubs_saved = 0
             raise forms.ValidationError(_(self.error_messages['no_entries']), code='no_entries')
 
-        publications, errors = create_publications_from_entries(entries, duplicates)
-        self.number_pubs_saved = len(publications)
-
         # Work out which ones weren't unique - they are to be displayed
         # separately
         unparsed = []
         is_error = False
+
+        # created, but similar to existing publications
+        self.possible_duplicates = errors.pop('possible_duplicates')
+
         not_unique_created = errors.pop('not_unique_created')
         if not_unique_created:
             is_error = True
-            msg = ', '.join([e['key'] for e in not_unique_created])
+            msg = ', '.join([e.get('key') or e.get('title') for e in not_unique_created])
             self.add_error(field,
                 forms.ValidationError(_('%s\n%s' % (self.error_messages['not_unique_created'], msg))))
 
@@ -82,5 +102,6 @@ class ImportBibtexForm(forms.Form):
                 mutable = self.data._mutable
                 self.data._mutable = True
             self.data['bibliography'] = '\n'.join(unparsed)
+            self.data['format'] = 'bibtex'
             if mutate:
                 self.data._mutable = mutable
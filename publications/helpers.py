@@ -6,12 +6,16 @@ __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 __version__ = '1.2.0'
 
+import json
 import re
 import six
 import string
 from dateutil import parser as date_parser
+from . import authors, bibtex, dedup
+from .caching import bump_version
 from .models import Publication, Type
 from django import forms
+from django.db import transaction
 from django.utils.translation import ugettext_lazy as _
 
 
@@ -30,30 +34,14 @@ MONTHS = {
     'nov': 11, 'november': 11,
     'dec': 12, 'december': 12}
 
-# special character mapping
-special_chars = (
-    (r'\"{a}', 'ä'), (r'{\"a}', 'ä'), (r'\"a', 'ä'), (r'H{a}', 'ä'),
-    (r'\"{A}', 'Ä'), (r'{\"A}', 'Ä'), (r'\"A', 'Ä'), (r'H{A}', 'Ä'),
-    (r'\"{o}', 'ö'), (r'{\"o}', 'ö'), (r'\"o', 'ö'), (r'H{o}', 'ö'),
-    (r'\"{O}', 'Ö'), (r'{\"O}', 'Ö'), (r'\"O', 'Ö'), (r'H{O}', 'Ö'),
-    (r'\"{u}', 'ü'), (r'{\"u}', 'ü'), (r'\"u', 'ü'), (r'H{u}', 'ü'),
-    (r'\"{U}', 'Ü'), (r'{\"U}', 'Ü'), (r'\"U', 'Ü'), (r'H{U}', 'Ü'),
-    (r'{‘a}', 'à'), (r'\‘A', 'À'),
-    (r'{‘e}', 'è'), (r'\‘E', 'È'),
-    (r'{‘o}', 'ò'), (r'\‘O', 'Ò'),
-    (r'{‘u}', 'ù'), (r'\‘U', 'Ù'),
-    (r'{’a}', 'á'), (r'\’A', 'Á'),
-    (r'{’e}', 'é'), (r'\’E', 'É'),
-    (r'{’o}', 'ó'), (r'\’O', 'Ó'),
-    (r'{’u}', 'ú'), (r'\’U', 'Ú'),
-    (r'\`a', 'à'), (r'\`A', 'À'),
-    (r'\`e', 'è'), (r'\`E', 'È'),
-    (r'\`u', 'ù'), (r'\`U', 'Ù'),
-    (r'\`o', 'ò'), (r'\`O', 'Ò'),
-    (r'\^o', 'ô'), (r'\^O', 'Ô'),
-    (r'\ss', 'ß'),
-    (r'\ae', 'æ'), (r'\AE', 'Æ'),
-    (r'\&', '&'))
+# fields of publications which are not BibTex fields
+INTERNAL_FIELDS = ('extra', 'content_hash', 'source', 'source_key')
+
+# fields of publications named differently in BibTex
+FIELD_NAMES = {
+    'book_title': 'booktitle',
+    'location': 'address',
+}
 
 
 def get_authors_from_entry(entry):
@@ -85,12 +73,120 @@ def rename_entry_key(entry, old_key, new_key):
         del entry[old_key]
 
 
-def create_publications_from_entries(entries, duplicates, save_on_error=True):
+def get_fields_from_entry(entry):
+    """
+    Maps the keys and values of a BibTex entry to fields of a publication.
+
+    @rtype: dict
+    """
+
+    entry = dict(entry)
+
+    # map integer fields to integers
+    if 'month' in entry:
+        entry['month'] = MONTHS.get(entry['month'].lower(), 0)
+
+    # Rename fields
+    rename_entry_key(entry, 'address', 'location')
+    rename_entry_key(entry, 'organization', 'institution')
+    rename_entry_key(entry, 'booktitle', 'book_title')
+    rename_entry_key(entry, 'key', 'citekey')
+
+    # If URL is provided, ensure it's encoded
+    # For now, just replace all spaces with %20
+    if entry.get('url'):
+        entry['url'] = re.sub(' ', '%20', entry['url'])
+
+    # Strip all non-valid bibtex entries from entry
+    valid = [field.name for field in Publication._meta.fields if field.name not in INTERNAL_FIELDS]
+    invalid = ['type', 'external', 'authors', 'id']
+    fields = dict((k, v) for (k, v) in entry.items() if k in valid and k not in invalid)
+
+    # keep all other fields, so that they can be exported again
+    extra = dict((k, v) for (k, v) in entry.items()
+        if k not in fields and k not in ('type', 'author') and v not in ('', None))
+    fields['extra'] = json.dumps(extra, sort_keys=True) if extra else ''
+
+    return fields
+
+
+def get_all_fields_from_entry(entry):
+    """
+    Like L{get_fields_from_entry}, but fields missing from the entry are set
+    to empty values.
+
+    @rtype: dict
+    """
+
+    entry = dict(entry)
+
+    # Set missing fields
+    valid = map(lambda x: x.name, Publication._meta.fields)
+    for v in valid:
+        if v not in entry and v not in ['number', 'volume', 'urldate', 'year']:
+            entry[v] = ''
+
+    entry['volume'] = entry.get('volume', None)
+    entry['number'] = entry.get('number', None)
+    return get_fields_from_entry(entry)
+
+
+def get_entry_from_publication(publication):
+    """
+    Maps the fields of a publication to the keys and values of a BibTex entry,
+    the inverse of L{get_fields_from_entry}.
+
+    @rtype: dict
+    """
+
+    entry = dict(publication.extra_fields)
+    entry.update({
+        'type': publication.type.bibtex_type,
+        'key': publication.citekey or publication.key(),
+        'author': publication.authors_bibtex,
+        'month': publication.month_bibtex().lower(),
+    })
+
+    for field in Publication._meta.fields:
+        if field.name in ('id', 'type', 'citekey', 'authors', 'month', 'external') \
+                or field.name in INTERNAL_FIELDS \
+                or field.get_internal_type() in ('FileField', 'ImageField'):
+            continue
+        value = getattr(publication, field.name)
+        if value not in ('', None):
+            entry[FIELD_NAMES.get(field.name, field.name)] = value
+
+    return entry
+
+
+def index_publications(publications):
+    """
+    Updates the authors and blocking keys of publications.
+    """
+
+    publications = list(publications)
+    authors.index_publications(publications)
+    dedup.index_publications(publications)
+
+
+def index_citekeys(citekeys, chunk_size=500):
+    """
+    Like L{index_publications}, for the publications with the given citekeys,
+    e.g. after they were created with C{bulk_create}.
+    """
+
+    for i in range(0, len(citekeys), chunk_size):
+        index_publications(Publication.objects.filter(citekey__in=citekeys[i:i + chunk_size])
+            .only('title', 'authors', 'keywords', 'year', 'doi'))
+
+
+def create_publications_from_entries(entries, duplicates, save_on_error=True, source=''):
     publications = []
     errors = {
         'fields_needed': [],
         'not_unique': [],
         'not_unique_created': [],
+        'possible_duplicates': [],
         'wrong_type': [],
     }
 
@@ -98,7 +194,6 @@ def create_publications_from_entries(entries, duplicates, save_on_error=True):
     citekeys = []
 
     for entry in entries:
-
         if 'date' in entry and 'year' not in entry:
             try:
                 d = date_parser.parse(entry['date'])
@@ -106,15 +201,27 @@ def create_publications_from_entries(entries, duplicates, save_on_error=True):
             except ValueError:
                 pass
 
+    # look up similar publications of all entries at once
+    candidates = dedup.find_candidates([dedup.Record(
+            entry.get('title', ''),
+            get_authors_from_entry(entry).split(',')[0] if entry.get('author') else '',
+            entry.get('year'), entry.get('doi'))
+        for entry in entries])
+
+    for entry, similar in zip(entries, candidates):
+        source_key = entry.get('key', '')
+
         # Check required fields
         if not ('title' in entry and 'author' in entry):
             errors['fields_needed'].append(entry)
             continue
 
         # Check for uniqueness
-        if Publication.objects.filter(title__iexact=entry['title'], year=entry.get('year', None)).count():
+        if similar and similar[0][2]:
             errors['not_unique_created'].append(entry)
             continue
+        if similar:
+            errors['possible_duplicates'].append(entry)
 
         authors = get_authors_from_entry(entry)
         type_id = get_type_from_entry(entry, types)
@@ -122,36 +229,13 @@ def create_publications_from_entries(entries, duplicates, save_on_error=True):
             errors['wrong_type'].append(entry)
             continue
 
-        # Set missing fields
-        valid = map(lambda x: x.name, Publication._meta.fields)
-        for v in valid:
-            if v not in entry and v not in ['number', 'volume', 'urldate', 'year']:
-                entry[v] = ''
-
-        # map integer fields to integers
-        entry['month'] = MONTHS.get(entry['month'].lower(), 0)
-        entry['volume'] = entry.get('volume', None)
-        entry['number'] = entry.get('number', None)
-
-        # Rename fields
-        rename_entry_key(entry, 'address', 'location')
-        rename_entry_key(entry, 'organization', 'institution')
-        rename_entry_key(entry, 'key', 'citekey')
-
-        # If URL is provided, ensure it's encoded
-        # For now, just replace all spaces with %20
-        if entry.get('url'):
-            entry['url'] = re.sub(' ', '%20', entry['url'])
-
-        # Strip all non-valid bibtex entries from entry
-        invalid = ['type', 'external', 'authors', 'id', 'date']
-        entry = dict((k, v) for (k, v) in entry.iteritems() if k in valid and k not in invalid)
+        entry = get_all_fields_from_entry(entry)
 
         # Generate a cite key if not defined
         if not entry.get('citekey'):
             aut_list = authors.split(',')[0].split('. ')
             aut_list.reverse()
-            entry['citekey'] = aut_list[0] + entry['year']
+            entry['citekey'] = u'%s%s' % (aut_list[0], entry.get('year') or '')
 
         # If we're parsing a long list and the key has already been found,
         # continue
@@ -169,20 +253,175 @@ def create_publications_from_entries(entries, duplicates, save_on_error=True):
 
         # add publication
         citekeys.append(entry['citekey'])
-        publications.append(Publication(
+        publication = Publication(
             type_id=type_id,
             authors=authors,
             external=False,
+            source=source,
+            source_key=source_key if source else '',
             **entry
-        ))
+        )
+        publication.content_hash = publication.get_content_hash()
+        publications.append(publication)
 
     # Save publications
-    if save_on_error:
+    if save_on_error and publications:
         Publication.objects.bulk_create(publications)
+        index_citekeys([publication.citekey for publication in publications])
+        bump_version()
 
     return publications, errors
 
 
+def update_content_hashes(publications):
+    """
+    Stores the content hashes of publications changed with C{QuerySet.update},
+    which bypasses L{Publication.save}. Only hashes which changed are written.
+    """
+
+    with transaction.atomic():
+        for publication in publications:
+            content_hash = publication.get_content_hash()
+            if content_hash != publication.content_hash:
+                Publication.objects.filter(pk=publication.pk).update(content_hash=content_hash)
+
+
+def upsert_publications_from_entries(entries, duplicates):
+    """
+    Like L{create_publications_from_entries}, but entries whose key is the
+    citekey of an existing publication update that publication instead of
+    being rejected. Fields missing from such an entry are left unchanged.
+
+    @rtype: tuple
+    @return: created publications, primary keys of updated publications and errors
+    """
+
+    existing = dict(Publication.objects
+        .filter(citekey__in=[entry['key'] for entry in entries if entry.get('key')])
+        .values_list('citekey', 'pk'))
+
+    types = Type.objects.all()
+    updated = []
+    wrong_type = []
+    new = []
+
+    with transaction.atomic():
+        for entry in entries:
+            pk = existing.get(entry.get('key'))
+            if pk is None or entry['key'] in duplicates \
+                    or not ('title' in entry and 'author' in entry):
+                new.append(entry)
+                continue
+
+            type_id = get_type_from_entry(entry, types)
+            if type_id is None:
+                wrong_type.append(entry)
+                continue
+
+            if 'date' in entry and 'year' not in entry:
+                try:
+                    entry['year'] = date_parser.parse(entry['date']).year
+                except ValueError:
+                    pass
+
+            fields = dict((k, v) for k, v in get_fields_from_entry(entry).items()
+                if v not in ('', None))
+            Publication.objects.filter(pk=pk).update(
+                type=type_id, authors=get_authors_from_entry(entry), **fields)
+            updated.append(pk)
+
+        publications, errors = create_publications_from_entries(new, duplicates)
+    errors['wrong_type'].extend(wrong_type)
+
+    if updated:
+        publications_updated = list(Publication.objects.filter(pk__in=updated))
+        update_content_hashes(publications_updated)
+        index_publications(publications_updated)
+        bump_version()
+
+    return publications, updated, errors
+
+
+def sync_publications_from_entries(entries, source, duplicates=()):
+    """
+    Brings the publications imported from a bibliography up to date with its
+    entries. Entries are identified by C{source} and their key, and compared
+    with the publications by content hash, so that only new and modified
+    entries are written. Publications with the same citekey which were not
+    imported from any bibliography are taken over by C{source}.
+
+    @rtype: tuple
+    @return: created publications, primary keys of modified publications,
+    number of unchanged publications and errors
+    """
+
+    keys = [entry['key'] for entry in entries if entry.get('key') and entry['key'] not in duplicates]
+
+    # look up the hashes of all entries at once
+    existing = dict((key, (pk, content_hash)) for key, pk, content_hash in Publication.objects
+        .filter(source=source, source_key__in=keys)
+        .values_list('source_key', 'pk', 'content_hash'))
+    existing.update((citekey, (pk, None)) for citekey, pk in Publication.objects
+        .filter(source='', citekey__in=[key for key in keys if key not in existing])
+        .values_list('citekey', 'pk'))
+
+    types = Type.objects.all()
+    modified = {}
+    unchanged = 0
+    fields_needed = []
+    wrong_type = []
+    new = []
+
+    for entry in entries:
+        if entry.get('key') not in existing or entry['key'] in duplicates:
+            new.append(entry)
+            continue
+        if not ('title' in entry and 'author' in entry):
+            fields_needed.append(entry)
+            continue
+
+        type_id = get_type_from_entry(entry, types)
+        if type_id is None:
+            wrong_type.append(entry)
+            continue
+
+        if 'date' in entry and 'year' not in entry:
+            try:
+                entry['year'] = date_parser.parse(entry['date']).year
+            except ValueError:
+                pass
+
+        fields = get_all_fields_from_entry(entry)
+        fields.pop('citekey', None)
+        publication = Publication(type_id=type_id, authors=get_authors_from_entry(entry), **fields)
+
+        pk, content_hash = existing[entry['key']]
+        if publication.get_content_hash() == content_hash:
+            unchanged += 1
+            continue
+
+        # entries replace all fields of a publication except files
+        values = dict((field.attname, getattr(publication, field.attname))
+            for field in Publication._meta.concrete_fields
+            if field.name not in Publication.UNHASHED_FIELDS)
+        values.update(content_hash=publication.get_content_hash(),
+            source=source, source_key=entry['key'])
+        modified[pk] = values
+
+    with transaction.atomic():
+        for pk, values in modified.items():
+            Publication.objects.filter(pk=pk).update(**values)
+        publications, errors = create_publications_from_entries(new, duplicates, source=source)
+    errors['fields_needed'].extend(fields_needed)
+    errors['wrong_type'].extend(wrong_type)
+
+    if modified:
+        index_publications(Publication.objects.filter(pk__in=list(modified)))
+        bump_version()
+
+    return publications, list(modified), unchanged, errors
+
+
 def parse(string):
     """
     Takes a string in BibTex format and returns a list of BibTex entries, where
@@ -203,8 +442,7 @@ def parse(string):
         string = string.decode('utf-8')
 
     # replace special characters
-    for key, value in special_chars:
-        string = string.replace(key, value)
+    string, restore = bibtex.decode_fields(string)
 
     # split into BibTex entries
     entries = re.findall(r'(?u)@(\w+)[ \t]?{[ \t]*([^,\s]*)[ \t]*,?\s*((?:[^=,\s]+\s*\=\s*(?:"[^"]*"|{(?:[^{}]*|{[^{}]*})*}|[^,}]*),?\s*?)+)\s*}', string)
@@ -232,6 +470,7 @@ def parse(string):
 
             # post-process key and value
             key = key.lower()
+            value = restore(value)
             if value and value[0] == '"' and value[-1] == '"':
                 value = value[1:-1]
             if value and value[0] == '{' and value[-1] == '}':
@@ -249,12 +488,12 @@ def parse(string):
     return bib, duplicates
 
 
-def unparse(entries):
-    es = []
-    for entry in entries:
-        outline = '@%s{%s,\n\t%s}'
-        type = entry.pop('type')
-        key = entry.pop('key')
-        joined = ',\n\t'.join(['%s = {%s}' % (k, v) for (k, v) in entry.iteritems()])
-        es.append(outline % (type, key, joined))
-    return '\n'.join(es)
+def unparse(entries, stream=None):
+    """
+    Writes entries in BibTex format to a file-like object, or returns them as a
+    string if no file-like object is given. The entries are not modified.
+    """
+
+    if stream is None:
+        return bibtex.unparse(entries)
+    bibtex.write(entries, stream)
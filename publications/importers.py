@@ -0,0 +1,426 @@
+"""
+Import formats of bibliographies.
+
+A parser turns a bibliography into BibTex-like entries as returned by
+L{helpers.parse}, which are then imported in chunks by
+L{create_publications_from_entries}. Apart from BibTex, parsers read their
+input incrementally, so that large files never have to be kept in memory.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import calendar
+import codecs
+import json
+import re
+
+from collections import OrderedDict
+from io import StringIO
+from itertools import islice
+from xml.etree import cElementTree
+
+from django.conf import settings
+from publications import six
+from publications.helpers import create_publications_from_entries, parse, \
+    sync_publications_from_entries
+
+# number of entries imported at once
+CHUNK_SIZE = getattr(settings, 'PUBLICATIONS_IMPORT_CHUNK_SIZE', 500)
+
+MONTHS = dict((i, name.lower()) for i, name in enumerate(calendar.month_abbr) if i)
+
+RIS_LINE = re.compile(r'^([A-Z][A-Z0-9])  -(?: (.*))?$')
+
+
+def lines(source):
+    """
+    Iterates over the lines of a string or a file opened in binary mode.
+    """
+
+    if isinstance(source, six.text_type):
+        source = StringIO(source)
+    else:
+        source = codecs.getreader('utf-8-sig')(source)
+    for line in source:
+        yield line.rstrip('\r\n')
+
+
+def chunks(source, size=64 * 1024):
+    """
+    Iterates over a string or a file opened in binary mode in pieces of text.
+    """
+
+    if isinstance(source, six.text_type):
+        yield source
+        return
+
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    while True:
+        data = source.read(size)
+        if not data:
+            break
+        yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+
+def bibtex_authors(authors):
+    return ' and '.join(author for author in authors if author)
+
+
+def parse_bibtex(source):
+    """
+    Parses a bibliography in BibTex format.
+
+    @rtype: tuple
+    @return: entries and keys occurring more than once
+    """
+
+    if not isinstance(source, six.text_type):
+        source = source.read()
+    return parse(source)
+
+
+class RIS(object):
+    TYPES = {
+        'ABST': 'abstract',
+        'BOOK': 'book',
+        'CHAP': 'incollection',
+        'CONF': 'inproceedings',
+        'CPAPER': 'inproceedings',
+        'EJOUR': 'article',
+        'ELEC': 'online',
+        'JOUR': 'article',
+        'MGZN': 'article',
+        'RPRT': 'techreport',
+        'THES': 'phdthesis',
+        'UNPB': 'unpublished',
+    }
+
+    # tags mapped to BibTex keys, the first tag found wins
+    FIELDS = OrderedDict([
+        ('TI', 'title'), ('T1', 'title'),
+        ('JO', 'journal'), ('JF', 'journal'), ('T2', 'booktitle'),
+        ('VL', 'volume'), ('IS', 'number'), ('PB', 'publisher'), ('CY', 'address'),
+        ('DO', 'doi'), ('UR', 'url'), ('N1', 'note'), ('AB', 'abstract'), ('N2', 'abstract'),
+        ('ID', 'key'),
+    ])
+
+    @classmethod
+    def entry(cls, record):
+        entry = {'type': cls.TYPES.get(record.get('TY', [''])[0], 'misc')}
+
+        for tag, key in cls.FIELDS.items():
+            if key not in entry and record.get(tag):
+                entry[key] = record[tag][0]
+
+        authors = record.get('AU', []) + record.get('A1', [])
+        if authors:
+            entry['author'] = bibtex_authors(authors)
+
+        date = (record.get('PY') or record.get('Y1') or record.get('DA') or [''])[0]
+        parts = [part for part in re.split(r'[/-]', date) if part.strip()]
+        if parts and parts[0].strip().isdigit():
+            entry['year'] = parts[0].strip()
+        if len(parts) > 1 and parts[1].strip().isdigit():
+            entry['month'] = MONTHS.get(int(parts[1]), '')
+
+        if record.get('SP'):
+            entry['pages'] = record['SP'][0]
+            if record.get('EP'):
+                entry['pages'] += '--' + record['EP'][0]
+
+        if record.get('SN'):
+            key = 'isbn' if entry['type'] in ('book', 'incollection') else 'issn'
+            entry[key] = record['SN'][0]
+
+        if record.get('KW'):
+            entry['keywords'] = ', '.join(record['KW'])
+
+        return entry
+
+
+def parse_ris(source):
+    """
+    Parses a bibliography in RIS format line by line.
+    """
+
+    record = {}
+    tag = None
+
+    for line in lines(source):
+        match = RIS_LINE.match(line)
+        if match is None:
+            # continuation of the previous value
+            if tag and line.strip() and record.get(tag):
+                record[tag][-1] += ' ' + line.strip()
+            continue
+
+        tag, value = match.group(1), (match.group(2) or '').strip()
+        if tag == 'ER':
+            yield RIS.entry(record)
+            record = {}
+            tag = None
+        else:
+            record.setdefault(tag, []).append(value)
+
+
+class CSL(object):
+    TYPES = {
+        'article': 'article',
+        'article-journal': 'article',
+        'article-magazine': 'article',
+        'article-newspaper': 'article',
+        'book': 'book',
+        'chapter': 'incollection',
+        'manuscript': 'unpublished',
+        'paper-conference': 'inproceedings',
+        'report': 'techreport',
+        'thesis': 'phdthesis',
+        'webpage': 'online',
+    }
+
+    FIELDS = (
+        ('id', 'key'), ('title', 'title'), ('volume', 'volume'), ('issue', 'number'),
+        ('page', 'pages'), ('publisher', 'publisher'), ('publisher-place', 'address'),
+        ('DOI', 'doi'), ('URL', 'url'), ('ISBN', 'isbn'), ('ISSN', 'issn'),
+        ('note', 'note'), ('abstract', 'abstract'), ('keyword', 'keywords'),
+    )
+
+    @staticmethod
+    def name(name):
+        if 'literal' in name:
+            return '{%s}' % name['literal']
+        family = ' '.join(part for part in
+            (name.get('non-dropping-particle'), name.get('family')) if part)
+        return ', '.join(part for part in (family, name.get('given')) if part)
+
+    @classmethod
+    def entry(cls, item):
+        entry = {'type': cls.TYPES.get(item.get('type'), 'misc')}
+
+        for field, key in cls.FIELDS:
+            if item.get(field) not in (None, ''):
+                entry[key] = six.text_type(item[field])
+
+        if item.get('container-title'):
+            key = 'journal' if entry['type'] == 'article' else 'booktitle'
+            entry[key] = item['container-title']
+
+        if item.get('author'):
+            entry['author'] = bibtex_authors(cls.name(name) for name in item['author'])
+
+        date = (item.get('issued') or {}).get('date-parts') or [[]]
+        if date[0]:
+            entry['year'] = six.text_type(date[0][0])
+        if len(date[0]) > 1:
+            entry['month'] = MONTHS.get(int(date[0][1]), '')
+
+        return entry
+
+
+def parse_csl_json(source):
+    """
+    Parses an array of CSL-JSON items. Items are decoded one at a time while
+    the input is read.
+    """
+
+    decoder = json.JSONDecoder()
+    buf = ''
+    started = False
+
+    for chunk in chunks(source):
+        buf += chunk
+        while True:
+            buf = buf.lstrip()
+            if not started:
+                if not buf:
+                    break
+                if buf[0] != '[':
+                    raise ValueError('Expected an array of CSL-JSON items.')
+                buf = buf[1:]
+                started = True
+                continue
+            if buf[:1] in (',', ']'):
+                buf = buf[1:]
+                continue
+            if not buf:
+                break
+            try:
+                item, end = decoder.raw_decode(buf)
+            except ValueError:
+                # the item is incomplete, read more
+                break
+            buf = buf[end:]
+            yield CSL.entry(item)
+
+    if buf.strip():
+        raise ValueError('Invalid CSL-JSON.')
+
+
+class EndNote(object):
+    TYPES = {
+        '5': 'incollection',
+        '6': 'book',
+        '10': 'inproceedings',
+        '17': 'article',
+        '27': 'techreport',
+        '32': 'phdthesis',
+        '34': 'unpublished',
+    }
+
+    FIELDS = (
+        ('titles/title', 'title'), ('periodical/full-title', 'journal'),
+        ('pages', 'pages'), ('volume', 'volume'), ('number', 'number'),
+        ('publisher', 'publisher'), ('pub-location', 'address'),
+        ('dates/year', 'year'), ('electronic-resource-num', 'doi'),
+        ('abstract', 'abstract'), ('notes', 'note'), ('label', 'key'),
+        ('urls/related-urls/url', 'url'), ('isbn', 'isbn'),
+    )
+
+    @staticmethod
+    def text(element):
+        # EndNote wraps text in <style> elements
+        return ''.join(element.itertext()).strip() if element is not None else ''
+
+    @classmethod
+    def entry(cls, record):
+        entry = {'type': cls.TYPES.get(cls.text(record.find('ref-type')), 'misc')}
+
+        for path, key in cls.FIELDS:
+            value = cls.text(record.find(path))
+            if value:
+                entry[key] = value
+
+        if 'journal' not in entry:
+            secondary = cls.text(record.find('titles/secondary-title'))
+            if secondary:
+                entry['journal' if entry['type'] == 'article' else 'booktitle'] = secondary
+
+        authors = [cls.text(author) for author in record.findall('contributors/authors/author')]
+        if authors:
+            entry['author'] = bibtex_authors(authors)
+
+        keywords = [cls.text(keyword) for keyword in record.findall('keywords/keyword')]
+        if keywords:
+            entry['keywords'] = ', '.join(keywords)
+
+        return entry
+
+
+def parse_endnote(source):
+    """
+    Parses a bibliography in EndNote XML format. Records are discarded as
+    soon as they have been converted, so that memory use does not grow with
+    the size of the file.
+    """
+
+    if isinstance(source, six.text_type):
+        source = six.BytesIO(source.encode('utf-8'))
+
+    # elements which have been opened but not closed yet
+    parents = []
+    for event, element in cElementTree.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag == 'record':
+            yield EndNote.entry(element)
+            # the parser keeps the enclosing <records> element until its end
+            if parents:
+                parents[-1].remove(element)
+
+
+PARSERS = OrderedDict([
+    ('bibtex', ('BibTex', parse_bibtex)),
+    ('ris', ('RIS', parse_ris)),
+    ('csl-json', ('CSL-JSON', parse_csl_json)),
+    ('endnote', ('EndNote XML', parse_endnote)),
+])
+
+
+def parse_entries(source, format='bibtex'):
+    """
+    Returns an iterator over the entries of a bibliography and the keys
+    known to occur more than once.
+    """
+
+    result = PARSERS[format][1](source)
+    if isinstance(result, tuple):
+        return iter(result[0]), result[1]
+    return result, []
+
+
+def batches(entries, errors, chunk_size=CHUNK_SIZE):
+    """
+    Splits entries into chunks. Apart from keys known to be duplicates,
+    entries whose key was seen before are rejected.
+    """
+
+    seen = set()
+
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, chunk_size))
+        if not batch:
+            break
+
+        chunk = []
+        for entry in batch:
+            # keys repeated in a stream only become known once they are read
+            key = entry.get('key')
+            if key and key in seen:
+                errors['not_unique'].append(key)
+                continue
+            seen.add(key)
+            chunk.append(entry)
+        yield chunk
+
+
+def import_entries(entries, duplicates=(), chunk_size=CHUNK_SIZE):
+    """
+    Imports entries in chunks using L{create_publications_from_entries}.
+    Apart from C{duplicates}, entries whose key was seen before are rejected.
+
+    @rtype: tuple
+    @return: number of created publications and errors
+    """
+
+    errors = {'fields_needed': [], 'not_unique': [], 'not_unique_created': [],
+        'possible_duplicates': [], 'wrong_type': []}
+    count = 0
+
+    for chunk in batches(entries, errors, chunk_size):
+        publications, chunk_errors = create_publications_from_entries(chunk, duplicates)
+        count += len(publications)
+        for key, value in chunk_errors.items():
+            errors[key].extend(value)
+
+    return count, errors
+
+
+def sync_entries(entries, source, duplicates=(), chunk_size=CHUNK_SIZE):
+    """
+    Brings the publications imported from C{source} up to date with entries
+    in chunks using L{sync_publications_from_entries}.
+
+    @rtype: tuple
+    @return: numbers of created, modified and unchanged publications and errors
+    """
+
+    errors = {'fields_needed': [], 'not_unique': [], 'not_unique_created': [],
+        'possible_duplicates': [], 'wrong_type': []}
+    created, modified, unchanged = 0, 0, 0
+
+    for chunk in batches(entries, errors, chunk_size):
+        publications, updated, count, chunk_errors = \
+            sync_publications_from_entries(chunk, source, duplicates)
+        created += len(publications)
+        modified += len(updated)
+        unchanged += count
+        for key, value in chunk_errors.items():
+            errors[key].extend(value)
+
+    return created, modified, unchanged, errors
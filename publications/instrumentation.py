@@ -0,0 +1,242 @@
+"""
+Optional query-count and latency instrumentation for publication views.
+
+Add C{'publications.instrumentation.InstrumentationMiddleware'} to
+C{MIDDLEWARE_CLASSES} and set C{PUBLICATIONS_INSTRUMENTATION = True} to enable
+it. Every request handled by a view in this app (or rendering one of its
+template tags) is measured and the numbers are added to the response as a
+C{Server-Timing} header and handed to the sinks listed in
+C{PUBLICATIONS_INSTRUMENTATION_SINKS}.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import logging
+import threading
+
+from collections import deque
+from contextlib import contextmanager
+from time import time
+
+from django.conf import settings
+from django.db import connections
+from django.db.models.signals import post_init
+from django.dispatch import receiver
+try:
+    from django.utils.module_loading import import_string
+except ImportError:
+    from django.utils.module_loading import import_by_path as import_string
+
+DEFAULT_SINKS = ('publications.instrumentation.LoggingSink',)
+
+logger = logging.getLogger('publications.instrumentation')
+
+_local = threading.local()
+_sinks = None
+
+
+def enabled():
+    return getattr(settings, 'PUBLICATIONS_INSTRUMENTATION', False)
+
+
+def get_sinks():
+    global _sinks
+    if _sinks is None:
+        _sinks = [import_string(path)() for path in
+            getattr(settings, 'PUBLICATIONS_INSTRUMENTATION_SINKS', DEFAULT_SINKS)]
+    return _sinks
+
+
+def current():
+    """
+    Returns the measurement of the request handled by this thread, if any.
+    """
+
+    return getattr(_local, 'measurement', None)
+
+
+@contextmanager
+def timer(name):
+    """
+    Adds the time spent in the block to the timer C{name} of the current
+    measurement. Does nothing if no measurement is active.
+    """
+
+    measurement = current()
+    if measurement is None:
+        yield
+        return
+
+    start = time()
+    try:
+        yield
+    finally:
+        measurement.timers[name] = measurement.timers.get(name, 0.) + time() - start
+
+
+class Measurement(object):
+    """
+    Numbers collected while handling a single request.
+    """
+
+    def __init__(self, request, view):
+        self.view = view
+        self.path = request.path
+        self.queries = 0
+        self.db_time = 0.
+        self.render_time = 0.
+        self.total_time = 0.
+        self.rows = 0
+        self.timers = {}
+
+        self._render_start = None
+        self._query_offsets = {}
+        self._debug_cursors = {}
+
+    def start(self):
+        for connection in connections.all():
+            self._debug_cursors[connection.alias] = connection.use_debug_cursor
+            self._query_offsets[connection.alias] = len(connection.queries)
+            connection.use_debug_cursor = True
+
+        self._start = time()
+        _local.measurement = self
+
+    def start_render(self):
+        self._render_start = time()
+
+    def stop_render(self):
+        if self._render_start is not None:
+            self.render_time += time() - self._render_start
+            self._render_start = None
+
+    def stop(self):
+        self.stop_render()
+        self.total_time = time() - self._start
+
+        for connection in connections.all():
+            if connection.alias not in self._query_offsets:
+                continue
+            queries = connection.queries[self._query_offsets[connection.alias]:]
+            self.queries += len(queries)
+            self.db_time += sum(float(query['time']) for query in queries)
+            connection.use_debug_cursor = self._debug_cursors[connection.alias]
+
+        if current() is self:
+            del _local.measurement
+
+    def report(self, response=None):
+        if response is not None:
+            response['Server-Timing'] = self.server_timing()
+        for sink in get_sinks():
+            sink.record(self)
+
+    def server_timing(self):
+        metrics = [
+            'db;dur=%.1f;desc="%d queries"' % (self.db_time * 1000., self.queries),
+            'render;dur=%.1f' % (self.render_time * 1000.),
+            'total;dur=%.1f' % (self.total_time * 1000.),
+            'rows;desc="%d"' % self.rows]
+        for name, seconds in sorted(self.timers.items()):
+            metrics.append('%s;dur=%.1f' % (name, seconds * 1000.))
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'view': self.view,
+            'path': self.path,
+            'queries': self.queries,
+            'db_time': self.db_time,
+            'render_time': self.render_time,
+            'total_time': self.total_time,
+            'rows': self.rows,
+            'timers': dict(self.timers),
+        }
+
+
+@receiver(post_init)
+def count_rows(sender, **kwargs):
+    measurement = current()
+    if measurement is not None:
+        measurement.rows += 1
+
+
+def measure_stream(chunks, measurement):
+    """
+    Passes on the chunks of a streaming response, whose queries and rendering
+    only happen while it is sent, and reports the measurement at its end.
+    """
+
+    measurement.start_render()
+    try:
+        for chunk in chunks:
+            yield chunk
+    finally:
+        measurement.stop()
+        measurement.report()
+
+
+class InstrumentationMiddleware(object):
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not enabled():
+            return None
+
+        measurement = Measurement(request,
+            '%s.%s' % (view_func.__module__, getattr(view_func, '__name__', '')))
+        measurement.start()
+        request.publications_measurement = measurement
+        return None
+
+    def process_template_response(self, request, response):
+        measurement = getattr(request, 'publications_measurement', None)
+        if measurement is not None:
+            measurement.start_render()
+            response.add_post_render_callback(lambda r: measurement.stop_render())
+        return response
+
+    def process_response(self, request, response):
+        measurement = getattr(request, 'publications_measurement', None)
+        if measurement is None:
+            return response
+
+        if response.streaming and measurement.view.startswith('publications.'):
+            # headers are sent before the content, so streamed responses are
+            # only passed to the sinks once they have been sent completely
+            response.streaming_content = measure_stream(response.streaming_content, measurement)
+            return response
+        measurement.stop()
+
+        # only report views of this app and pages using its template tags
+        if measurement.view.startswith('publications.') or measurement.timers:
+            measurement.report(response)
+        return response
+
+
+class LoggingSink(object):
+    """
+    Writes every measurement to the C{publications.instrumentation} logger.
+    """
+
+    def record(self, measurement):
+        logger.info('%s %s: %d queries, %.1f ms db, %.1f ms render, %.1f ms total, %d rows',
+            measurement.view, measurement.path, measurement.queries,
+            measurement.db_time * 1000., measurement.render_time * 1000.,
+            measurement.total_time * 1000., measurement.rows)
+
+
+class RingBufferSink(object):
+    """
+    Keeps the most recent measurements of this process in memory so that they
+    can be inspected on the instrumentation admin page.
+    """
+
+    buffer = deque(maxlen=getattr(settings, 'PUBLICATIONS_INSTRUMENTATION_BUFFER_SIZE', 500))
+
+    def record(self, measurement):
+        self.buffer.append(measurement.as_dict())
+
+    @classmethod
+    def records(cls):
+        return list(cls.buffer)
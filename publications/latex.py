@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+Conversion between LaTeX and Unicode.
+
+L{decode} replaces accents such as C{\\"{o}}, C{{\\c c}} or C{\\v{s}} and
+symbols such as C{\\ss} by the corresponding Unicode characters. It is a single
+pass of one regular expression, whose matches are looked up in tables built
+from the accent and symbol commands below. L{encode} is its inverse and
+turns text into a form suitable for BibTex.
+"""
+
+from __future__ import unicode_literals
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import re
+import unicodedata
+
+from publications import six
+from string import ascii_letters
+
+# accent commands mapped to combining characters
+ACCENTS = {
+    '`': '̀',
+    "'": '́',
+    '^': '̂',
+    '~': '̃',
+    '=': '̄',
+    'u': '̆',
+    '.': '̇',
+    '"': '̈',
+    'r': '̊',
+    'H': '̋',
+    'v': '̌',
+    'd': '̣',
+    'c': '̧',
+    'k': '̨',
+    'b': '̱',
+}
+
+# typographic quotes sometimes found in place of accents
+ACCENT_ALIASES = {'‘': '`', '’': "'"}
+
+# commands without arguments
+SYMBOLS = {
+    'ss': 'ß',
+    'ae': 'æ', 'AE': 'Æ',
+    'oe': 'œ', 'OE': 'Œ',
+    'aa': 'å', 'AA': 'Å',
+    'o': 'ø', 'O': 'Ø',
+    'l': 'ł', 'L': 'Ł',
+    'i': 'ı', 'j': 'ȷ',
+    'dh': 'ð', 'DH': 'Ð',
+    'th': 'þ', 'TH': 'Þ',
+    'ng': 'ŋ', 'NG': 'Ŋ',
+    'dj': 'đ', 'DJ': 'Đ',
+}
+
+# escaped characters; braces and dollar signs are kept escaped, since they
+# delimit values and math
+ESCAPES = '&%#_'
+
+# letters accents are applied to, including the dotless i and j
+BASES = dict((c, c) for c in ascii_letters)
+BASES.update({'\\i': 'i', '\\j': 'j'})
+
+
+def _accented(accent, base):
+    """
+    Returns the precomposed character of a base letter and an accent, or
+    C{None} if Unicode has none.
+    """
+
+    char = unicodedata.normalize('NFC', BASES[base] + ACCENTS[accent])
+    return char if len(char) == 1 else None
+
+
+# (accent, base) mapped to characters
+ACCENTED = {}
+for _accent in ACCENTS:
+    for _base in BASES:
+        _char = _accented(_accent, _base)
+        if _char is not None:
+            ACCENTED[_accent, _base] = _char
+
+# characters mapped to LaTeX, preferring plain letters over dotless ones
+ENCODE_TABLE = dict((ord(symbol), '{\\%s}' % command) for command, symbol in SYMBOLS.items())
+for (_accent, _base), _char in sorted(ACCENTED.items(), key=lambda item: len(item[0][1])):
+    if _accent.isalpha():
+        ENCODE_TABLE.setdefault(ord(_char), '{\\%s{%s}}' % (_accent, _base))
+    else:
+        ENCODE_TABLE.setdefault(ord(_char), '{\\%s%s}' % (_accent, _base))
+ENCODE_TABLE.update((ord(c), '\\' + c) for c in ESCAPES if c != '_')
+
+ENCODE = re.compile('[%s]' % ''.join(re.escape(six.unichr(c)) for c in sorted(ENCODE_TABLE)))
+
+_BASE = r'\\[ij](?![a-zA-Z])|[a-zA-Z]'
+
+DECODE = re.compile(
+    # an optional pair of braces around the command; the lookahead lets the
+    # regular expression engine skip to candidate positions quickly
+    r'(?=[{\\])(?P<brace>\{)?\\(?:' +
+    # accents written as symbols take the letter directly, e.g. \"o or \"{o}
+    r'(?P<symbol>[`\'^"~=.‘’])\s*(?:\{(?P<sbase>' + _BASE + r')\}|(?P<sbase2>' + _BASE + r'))|' +
+    # accents written as letters need braces or a space, e.g. \c{c} or \c c
+    r'(?P<letter>[urHvdckb])(?:\s*\{(?P<lbase>' + _BASE + r')\}|\s+(?P<lbase2>' + _BASE + r'))|' +
+    # symbols, which consume the spaces following them as in TeX
+    r'(?P<command>' + '|'.join(sorted(SYMBOLS, key=len, reverse=True)) + r')(?![a-zA-Z])(?:\{\}|[ \t]*)|' +
+    r'(?P<escape>[' + re.escape(ESCAPES) + r'])' +
+    r')(?(brace)\})')
+
+
+def _decode(match):
+    groups = match.groupdict()
+    if groups['command']:
+        return SYMBOLS[groups['command']]
+    if groups['escape']:
+        return groups['escape']
+
+    if groups['symbol']:
+        accent = ACCENT_ALIASES.get(groups['symbol'], groups['symbol'])
+        base = groups['sbase'] or groups['sbase2']
+    else:
+        accent = groups['letter']
+        base = groups['lbase'] or groups['lbase2']
+
+    char = ACCENTED.get((accent, base))
+    if char is None:
+        # no precomposed character exists
+        char = BASES[base] + ACCENTS[accent]
+    return char
+
+
+def _encode(match):
+    return ENCODE_TABLE[ord(match.group(0))]
+
+
+def decode(string):
+    """
+    Replaces LaTeX accents and symbols by Unicode characters.
+
+        >>> decode(r'Erd{\\H o}s and G{\\"o}del')
+        'Erdős and Gödel'
+    """
+
+    return DECODE.sub(_decode, string)
+
+
+def encode(string):
+    """
+    Replaces characters which cannot be represented in BibTex by LaTeX.
+
+        >>> encode('Erdős & Gödel')
+        'Erd{\\\\H{o}}s \\\\& G{\\\\"o}del'
+    """
+
+    return ENCODE.sub(_encode, string)
@@ -0,0 +1,47 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from publications.dedup import CHUNK_SIZE
+from publications.documents import ingest
+from publications.models import Publication
+
+
+class Command(BaseCommand):
+    help = 'Extracts the text of all PDFs of publications which have changed since their text was extracted.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--force', dest='force', action='store_true', default=False,
+            help='Extract the text of all PDFs, even of unchanged ones.'),
+    )
+
+    def handle(self, *args, **options):
+        # publications with files and those whose files have been removed
+        publications = Publication.objects \
+            .filter(Q(pdf__gt='') | Q(customfile__isnull=False) | Q(documents__isnull=False)) \
+            .distinct().order_by('pk').prefetch_related('customfile_set')
+
+        # walk the table in chunks ordered by primary key
+        extracted, unchanged, failed, last = 0, 0, 0, 0
+        while True:
+            chunk = list(publications.filter(pk__gt=last)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            for publication in chunk:
+                try:
+                    counts = ingest(publication, options['force'])
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write('%s: %s' % (publication.citekey, error))
+                    continue
+                extracted += counts[0]
+                unchanged += counts[1]
+            last = chunk[-1].pk
+
+        if int(options.get('verbosity', 1)):
+            self.stdout.write('Extracted the text of %d files, %d unchanged, %d publications failed.'
+                % (extracted, unchanged, failed))
@@ -0,0 +1,61 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from multiprocessing import Pool
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from publications import thumbnails
+from publications.models import Publication
+
+
+def generate(args):
+    source, force = args
+    try:
+        thumbnails.generate(source, force)
+    except Exception as error:
+        return source, '%s' % error
+    return source, None
+
+
+class Command(BaseCommand):
+    help = 'Renders the missing thumbnails of all publications with an image or a thumbnail.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--processes', dest='processes', type='int', default=4,
+            help='Number of processes rendering thumbnails (default: 4).'),
+        make_option('--force', dest='force', action='store_true', default=False,
+            help='Render thumbnails again even if they already exist.'),
+    )
+
+    def handle(self, *args, **options):
+        # thumbnails are rendered from the thumbnail if there is one, else from the image
+        sources = set(thumbnail or image for thumbnail, image in
+            Publication.objects.values_list('thumbnail', 'image').iterator())
+        sources.discard(None)
+        sources.discard('')
+        tasks = [(source, options['force']) for source in sorted(sources)]
+
+        if options['processes'] > 1:
+            # forked processes must not share the connections of this one
+            for connection in connections.all():
+                connection.close()
+            pool = Pool(options['processes'])
+            try:
+                results = list(pool.imap_unordered(generate, tasks))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = list(map(generate, tasks))
+
+        failed = 0
+        for source, error in results:
+            if error is not None:
+                failed += 1
+                self.stderr.write('%s: %s' % (source, error))
+
+        if int(options.get('verbosity', 1)):
+            self.stdout.write('Rendered thumbnails of %d images, %d failed.' % (len(results), failed))
@@ -0,0 +1,29 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from django.core.management.base import BaseCommand
+from publications.dedup import CHUNK_SIZE, index_publications
+from publications.models import Publication
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the keys used to find duplicate publications.'
+
+    def handle(self, *args, **options):
+        publications = Publication.objects.order_by('pk') \
+            .only('title', 'authors', 'keywords', 'year', 'doi')
+
+        # walk the table in chunks ordered by primary key
+        count, last = 0, 0
+        while True:
+            chunk = list(publications.filter(pk__gt=last)[:CHUNK_SIZE])
+            if not chunk:
+                break
+            index_publications(chunk)
+            count += len(chunk)
+            last = chunk[-1].pk
+
+        if int(options.get('verbosity', 1)):
+            s = '' if count == 1 else 's'
+            self.stdout.write('Indexed %d publication%s.' % (count, s))
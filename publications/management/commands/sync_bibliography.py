@@ -0,0 +1,38 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import os
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from publications.importers import PARSERS, parse_entries, sync_entries
+
+
+class Command(BaseCommand):
+    args = '<file>'
+    help = 'Creates and updates the publications imported from a bibliography.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--source', dest='source',
+            help='Name identifying the bibliography (default: name of the file).'),
+        make_option('--format', dest='format', default='bibtex', choices=list(PARSERS),
+            help='Format of the bibliography (default: bibtex).'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('Expected the path of a bibliography.')
+        source = options.get('source') or os.path.basename(args[0])
+
+        with open(args[0], 'rb') as bibliography:
+            entries, duplicates = parse_entries(bibliography, options['format'])
+            created, modified, unchanged, errors = sync_entries(entries, source, duplicates)
+
+        if int(options.get('verbosity', 1)):
+            self.stdout.write('Created %d, modified %d and left %d publications unchanged.'
+                % (created, modified, unchanged))
+            for key in ('fields_needed', 'not_unique', 'not_unique_created', 'wrong_type'):
+                if errors[key]:
+                    self.stdout.write('%s: %d' % (key.replace('_', ' ').capitalize(), len(errors[key])))
@@ -0,0 +1,39 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+from publications.models import Style, StyleTemplate, Type
+
+
+class Command(BaseCommand):
+    help = 'Creates the StyleTemplates missing for any (style, type) pair.'
+
+    def handle(self, *args, **options):
+        using = router.db_for_write(StyleTemplate)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+
+        # find and create the missing pairs with a single statement
+        sql = 'INSERT INTO {templates} ({style_id}, {bibtype_id}, {template}) ' \
+            'SELECT s.{id}, t.{id}, %s FROM {styles} s CROSS JOIN {types} t ' \
+            'WHERE NOT EXISTS (SELECT 1 FROM {templates} x ' \
+            'WHERE x.{style_id} = s.{id} AND x.{bibtype_id} = t.{id})'
+        sql = sql.format(
+            templates=qn(StyleTemplate._meta.db_table),
+            styles=qn(Style._meta.db_table),
+            types=qn(Type._meta.db_table),
+            id=qn('id'),
+            style_id=qn(StyleTemplate._meta.get_field('style').column),
+            bibtype_id=qn(StyleTemplate._meta.get_field('bibtype').column),
+            template=qn('template'))
+
+        with transaction.atomic(using=using):
+            cursor = connection.cursor()
+            cursor.execute(sql, [''])
+            created = cursor.rowcount
+
+        if int(options.get('verbosity', 1)):
+            s = '' if created == 1 else 's'
+            self.stdout.write('Created %d style template%s.' % (created, s))
@@ -0,0 +1,108 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from multiprocessing.pool import ThreadPool
+from optparse import make_option
+from time import time
+
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.db import connections
+from django.test.client import Client
+from publications import caching
+from publications.models import Author, List, Publication
+
+
+def get_urls(formats=('bibtex', 'rss')):
+    """
+    Returns the URLs of all years, authors, keywords and lists, each also in
+    the given export formats.
+    """
+
+    publications = Publication.objects.filter(external=False)
+    paths = [reverse('publications.views.year')]
+    paths.extend(reverse('publications.views.year', args=[year]) for year in
+        publications.exclude(year=None).order_by('-year').values_list('year', flat=True).distinct())
+    paths.extend(reverse('publications.views.person', args=[name.lower().replace(' ', '+')])
+        for name in Author.objects.values_list('name', flat=True).iterator())
+
+    keywords = set()
+    for value in publications.values_list('keywords', flat=True).iterator():
+        keywords.update(keyword.strip() for keyword in value.split(',') if keyword.strip())
+    paths.extend(reverse('publications.views.keyword', args=[keyword.replace(' ', '+')])
+        for keyword in sorted(keywords))
+
+    paths.extend(reverse('publications.views.list', args=[name])
+        for name in List.objects.values_list('list', flat=True))
+
+    # links to authors and keywords contain plus signs, which reverse() quotes
+    paths = [path.replace('%2B', '+') for path in paths]
+
+    return [path + suffix for path in paths for suffix in [''] + ['?' + f for f in formats]]
+
+
+class Command(BaseCommand):
+    help = 'Renders the pages of all years, authors, keywords and lists into the cache.'
+
+    option_list = BaseCommand.option_list + (
+        make_option('--concurrency', dest='concurrency', type='int', default=4,
+            help='Number of pages rendered at the same time (default: 4).'),
+        make_option('--formats', dest='formats', default='bibtex,rss',
+            help='Comma separated export formats to render as well (default: bibtex,rss).'),
+        make_option('--host', dest='host',
+            help='Host name the pages are cached for (default: domain of the current site).'),
+    )
+
+    def handle(self, *args, **options):
+        if not caching.CACHE_VIEWS:
+            raise CommandError('Set PUBLICATIONS_CACHE_VIEWS = True to cache pages.')
+
+        formats = [f for f in options['formats'].split(',') if f]
+        self.host = options.get('host') or Site.objects.get_current().domain
+        self.verbosity = int(options.get('verbosity', 1))
+
+        urls = get_urls(formats)
+        start = time()
+        if options['concurrency'] > 1:
+            pool = ThreadPool(options['concurrency'])
+            try:
+                results = list(self.report(pool.imap_unordered(self.warm_in_thread, urls)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = list(self.report(map(self.warm, urls)))
+
+        if self.verbosity:
+            failed = sum(1 for url, status, duration in results if status != 200)
+            self.stdout.write('Rendered %d pages in %.1f s, %d failed.'
+                % (len(results), time() - start, failed))
+
+    def warm(self, url):
+        """
+        Requests a page as an anonymous visitor without cookies, so that it is
+        cached for all such visitors.
+        """
+
+        start = time()
+        response = Client(HTTP_HOST=self.host).get(url)
+        if response.streaming:
+            for chunk in response.streaming_content:
+                pass
+        return url, response.status_code, time() - start
+
+    def warm_in_thread(self, url):
+        try:
+            return self.warm(url)
+        finally:
+            # every thread opens its own connections
+            for connection in connections.all():
+                connection.close()
+
+    def report(self, results):
+        for url, status, duration in results:
+            if self.verbosity:
+                self.stdout.write('%8.1f ms  %d  %s' % (duration * 1000., status, url))
+            yield url, status, duration
@@ -1,48 +1,189 @@
 # -*- coding: utf-8 -*-
+import logging
 import markdown
 import re
 
 from collections import OrderedDict
-from .models import Publication
+from django.core.cache import cache
+from django.utils.html import escape
+from .caching import TIMEOUT, get_version, make_key
+from .models import Publication, Style
 
 CITATION_RE = re.compile(r'\[@([;-@\w\s;]+)\]+')
 
+# matches a single citation, without any further closing brackets
+CITATION_SUB_RE = re.compile(r'\[@([;-@\w\s;]+)\]')
+
+LABELS = ('footnote', 'numeric', 'author-year')
+
+logger = logging.getLogger('publications.markdown_extensions')
+
 
 class CitationExtension(markdown.Extension):
     safe_mode = False
     """ Citations plugin markdown extension for django-wiki. """
 
+    def __init__(self, *args, **kwargs):
+        self.config = {
+            'style': ['Harvard', 'Name of the style used to format publications'],
+            'labels': ['footnote', 'How citations are labeled: footnote, numeric or author-year'],
+            'bibliography': [True, 'Append a references block (numeric and author-year labels only)'],
+            'bibliography_title': ['References', 'Heading of the references block'],
+        }
+        super(CitationExtension, self).__init__(*args, **kwargs)
+
+        if self.getConfig('labels') not in LABELS:
+            raise ValueError('labels has to be one of %s' % ', '.join(LABELS))
+
     def extendMarkdown(self, md, md_globals):
         """ Insert ImagePreprocessor before ReferencePreprocessor. """
-        md.preprocessors.add('dw-citations', CitationPreprocessor(md), '>html_block')
+        md.preprocessors.add('dw-citations', CitationPreprocessor(md, self.getConfigs()), '>html_block')
 
 
 class CitationPreprocessor(markdown.preprocessors.Preprocessor):
     """django-wiki citation preprocessor - parse [@citekey] references. """
 
-    def run(self, lines):
-        footnotes = []
+    def __init__(self, md, config=None):
+        super(CitationPreprocessor, self).__init__(md)
+        config = config or {}
+        self.style = config.get('style', 'Harvard')
+        self.labels = config.get('labels', 'footnote')
+        self.bibliography = config.get('bibliography', True)
+        self.bibliography_title = config.get('bibliography_title', 'References')
 
+    def run(self, lines):
         # Find all matches in the current wiki page and create a unique list with preserved order
         new_lines = "\n".join(lines)
         matches = list(OrderedDict.fromkeys(CITATION_RE.findall(new_lines)))
 
-        # Search the database for matching citations
-        pubs = Publication.objects.filter(citekey__in=matches)
-        present = pubs.values_list('citekey', flat=True)
+        # Citekeys not found in the database, available to the caller after conversion
+        self.markdown.missing_citations = []
+
+        if not matches:
+            return lines
+
+        citations = self.format_citations(matches)
+        cited = [citekey for citekey in matches if citekey in citations]
+        names = disambiguate(cited, citations)
+        labels = self.make_labels(cited, names)
+
+        missing = [citekey for citekey in matches if citekey not in citations]
+        if missing:
+            logger.warning('Unknown citekeys: %s', ', '.join(missing))
+            self.markdown.missing_citations = missing
+
+        def replace(match):
+            citekey = match.group(1)
+            if citekey not in citations:
+                return self.markdown.htmlStash.store(
+                    '<span class="citation-missing" title="Unknown citekey">[@%s?]</span>' % escape(citekey),
+                    safe=True)
+            if self.labels == 'footnote':
+                return "[^%s]" % citekey
+            return self.markdown.htmlStash.store(labels[citekey], safe=True)
+
+        new_lines = CITATION_SUB_RE.sub(replace, new_lines).split("\n")
+
+        if self.labels == 'footnote':
+            # Mark footnotes as safe
+            return new_lines + ["[^%s]: %s" % (citekey, self.markdown.htmlStash.store(citations[citekey][0], safe=True))
+                for citekey in cited]
+
+        if self.bibliography:
+            new_lines += ['', self.markdown.htmlStash.store(
+                self.make_bibliography(cited, citations, names), safe=True)]
+
+        return new_lines
+
+    def make_labels(self, citekeys, names):
+        """
+        Returns the inline label of every cited publication.
+        """
+
+        labels = {}
+
+        for i, citekey in enumerate(citekeys, 1):
+            label = '[%d]' % i if self.labels == 'numeric' else '(%s)' % names[citekey]
+            if self.bibliography:
+                label = '<a class="citation" href="#ref-%s">%s</a>' % (escape(citekey), escape(label))
+            else:
+                label = '<span class="citation">%s</span>' % escape(label)
+            labels[citekey] = label
+
+        return labels
+
+    def make_bibliography(self, citekeys, citations, names):
+        """
+        Renders a single references block for all cited publications.
+        """
+
+        if self.labels == 'author-year':
+            citekeys = sorted(citekeys, key=lambda citekey: names[citekey])
+            tag = 'ul'
+        else:
+            tag = 'ol'
+
+        items = ['<li id="ref-%s">%s</li>' % (escape(citekey), citations[citekey][0])
+            for citekey in citekeys]
+
+        return '<div class="references"><h2>%s</h2><%s>%s</%s></div>' % (
+            escape(self.bibliography_title), tag, ''.join(items), tag)
+
+    def format_citations(self, citekeys):
+        """
+        Returns a dictionary mapping citekeys to pairs of a formatted publication
+        and its author-year label. Cached citations are reused, all others are
+        loaded with a single query and formatted together.
+        """
+
+        version = get_version()
+        keys = dict((make_key('citation', citekey, self.style, version=version), citekey)
+            for citekey in citekeys)
+
+        citations = {}
+        for key, citation in cache.get_many(keys.keys()).items():
+            citations[keys.pop(key)] = citation
+
+        if keys:
+            pubs = list(Publication.objects.filter(citekey__in=keys.values()).select_related('type'))
+            rendered = {}
+
+            for pub, html in zip(pubs, Style.format_publications(self.style, pubs)):
+                citations[pub.citekey] = (html, author_year(pub))
+                rendered[make_key('citation', pub.citekey, self.style, version=version)] = citations[pub.citekey]
+
+            cache.set_many(rendered, TIMEOUT)
+
+        return citations
 
-        # Amend the matches to contain only those present in the database
-        matches = [m for m in matches if m in present]
 
-        # For each publication found, replace the citekey with the publication's format
-        for pub in pubs:
-            new_lines = new_lines.replace("[@%s]" % pub.citekey, "[^%s]" % pub.citekey)
+def author_year(pub):
+    surnames = [author.split(' ')[-1] for author in pub.authors_list]
+
+    if len(surnames) > 2:
+        authors = '%s et al.' % surnames[0]
+    else:
+        authors = ' and '.join(surnames)
+
+    return '%s, %s' % (authors, pub.year) if pub.year else authors
+
+
+def disambiguate(citekeys, citations):
+    """
+    Returns the author-year label of every cited publication, telling apart
+    works of the same authors and year by the suffixes a, b, c, ... in the
+    order in which they are first cited.
+    """
 
-            # Mark footnote as safe
-            footnotes.append("[^%s]: %s" % (
-                pub.citekey, self.markdown.htmlStash.store(pub.format_harvard(), safe=True)))
+    citekeys_by_label = OrderedDict()
+    for citekey in citekeys:
+        citekeys_by_label.setdefault(citations[citekey][1], []).append(citekey)
 
-        return new_lines.split("\n") + footnotes
+    names = {}
+    for label, same in citekeys_by_label.items():
+        for i, citekey in enumerate(same):
+            names[citekey] = label + 'abcdefghijklmnopqrstuvwxyz'[i % 26] if len(same) > 1 else label
+    return names
 
 
 def makeExtension(*args, **kwargs):
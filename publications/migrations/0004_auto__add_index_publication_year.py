@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        # Adding index on 'Publication', fields ['year']
+        db.create_index(u'publications_publication', ['year'])
+
+    def backwards(self, orm):
+        # Removing index on 'Publication', fields ['year']
+        db.delete_index(u'publications_publication', ['year'])
+
+    models = {
+        'cms.cmsplugin': {
+            'Meta': {'object_name': 'CMSPlugin'},
+            'changed_date': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'creation_date': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'depth': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'language': ('django.db.models.fields.CharField', [], {'max_length': '15', 'db_index': 'True'}),
+            'numchild': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'parent': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['cms.CMSPlugin']", 'null': 'True', 'blank': 'True'}),
+            'path': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '255'}),
+            'placeholder': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['cms.Placeholder']", 'null': 'True'}),
+            'plugin_type': ('django.db.models.fields.CharField', [], {'max_length': '50', 'db_index': 'True'}),
+            'position': ('django.db.models.fields.PositiveSmallIntegerField', [], {'null': 'True', 'blank': 'True'})
+        },
+        'cms.placeholder': {
+            'Meta': {'object_name': 'Placeholder'},
+            'default_width': ('django.db.models.fields.PositiveSmallIntegerField', [], {'null': 'True'}),
+            'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'slot': ('django.db.models.fields.CharField', [], {'max_length': '255', 'db_index': 'True'})
+        },
+        u'publications.customfile': {
+            'Meta': {'object_name': 'CustomFile'},
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '256'}),
+            'file': ('django.db.models.fields.files.FileField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'publication': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Publication']"})
+        },
+        u'publications.customlink': {
+            'Meta': {'object_name': 'CustomLink'},
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '256'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'publication': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Publication']"}),
+            'url': ('django.db.models.fields.URLField', [], {'max_length': '200'})
+        },
+        u'publications.list': {
+            'Meta': {'ordering': "('list',)", 'object_name': 'List'},
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'list': ('django.db.models.fields.CharField', [], {'max_length': '128'})
+        },
+        u'publications.publication': {
+            'Meta': {'ordering': "['-year', '-month', '-id']", 'object_name': 'Publication'},
+            'abstract': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'authors': ('django.db.models.fields.CharField', [], {'max_length': '2048'}),
+            'book_title': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'citekey': ('django.db.models.fields.CharField', [], {'max_length': '512', 'unique': 'True', 'null': 'True', 'blank': 'True'}),
+            'code': ('django.db.models.fields.URLField', [], {'max_length': '200', 'blank': 'True'}),
+            'doi': ('django.db.models.fields.CharField', [], {'max_length': '128', 'blank': 'True'}),
+            'edition': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'external': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'image': ('django.db.models.fields.files.ImageField', [], {'max_length': '100', 'null': 'True', 'blank': 'True'}),
+            'institution': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'isbn': ('django.db.models.fields.CharField', [], {'max_length': '32', 'blank': 'True'}),
+            'issn': ('django.db.models.fields.CharField', [], {'max_length': '32', 'blank': 'True'}),
+            'journal': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'keywords': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'lists': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['publications.List']", 'symmetrical': 'False', 'blank': 'True'}),
+            'location': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'month': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'note': ('django.db.models.fields.TextField', [], {'blank': 'True'}),
+            'number': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'pages': ('publications.fields.PagesField', [], {'max_length': '32', 'blank': 'True'}),
+            'pdf': ('django.db.models.fields.files.FileField', [], {'max_length': '100', 'null': 'True', 'blank': 'True'}),
+            'publisher': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'series': ('django.db.models.fields.CharField', [], {'max_length': '256', 'blank': 'True'}),
+            'thumbnail': ('django.db.models.fields.files.ImageField', [], {'max_length': '100', 'null': 'True', 'blank': 'True'}),
+            'title': ('django.db.models.fields.CharField', [], {'max_length': '512'}),
+            'type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Type']"}),
+            'url': ('django.db.models.fields.URLField', [], {'max_length': '1000', 'blank': 'True'}),
+            'urldate': ('django.db.models.fields.DateField', [], {'null': 'True', 'blank': 'True'}),
+            'volume': ('django.db.models.fields.IntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'year': ('django.db.models.fields.PositiveIntegerField', [], {'max_length': '4', 'null': 'True', 'db_index': 'True', 'blank': 'True'})
+        },
+        u'publications.publicationsplugin': {
+            'Meta': {'object_name': 'PublicationsPlugin', '_ormbases': "['cms.CMSPlugin']"},
+            'cmsplugin_ptr': ('django.db.models.fields.related.OneToOneField', [], {'to': u"orm['cms.CMSPlugin']", 'unique': 'True', 'primary_key': 'True'}),
+            'external': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'limit': ('django.db.models.fields.PositiveIntegerField', [], {'default': '20'}),
+            'list': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.List']", 'null': 'True', 'blank': 'True'}),
+            'style': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Style']", 'null': 'True', 'blank': 'True'}),
+            'template': ('django.db.models.fields.CharField', [], {'default': "'publications/publications.html'", 'max_length': '256'}),
+            'type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Type']", 'null': 'True', 'blank': 'True'}),
+            'year_from': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'}),
+            'year_to': ('django.db.models.fields.PositiveIntegerField', [], {'null': 'True', 'blank': 'True'})
+        },
+        u'publications.style': {
+            'Meta': {'object_name': 'Style'},
+            'bibtype': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['publications.Type']", 'through': u"orm['publications.StyleTemplate']", 'symmetrical': 'False'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '256'})
+        },
+        u'publications.styletemplate': {
+            'Meta': {'object_name': 'StyleTemplate'},
+            'bibtype': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Type']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'style': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['publications.Style']"}),
+            'template': ('django.db.models.fields.TextField', [], {})
+        },
+        u'publications.type': {
+            'Meta': {'ordering': "('order',)", 'object_name': 'Type'},
+            'bibtex_optional_fields': ('django.db.models.fields.TextField', [], {'null': 'True', 'blank': 'True'}),
+            'bibtex_required_fields': ('django.db.models.fields.TextField', [], {}),
+            'bibtex_types': ('django.db.models.fields.CharField', [], {'default': "'article'", 'max_length': '256'}),
+            'description': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'hidden': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'order': ('django.db.models.fields.PositiveIntegerField', [], {'db_index': 'True'}),
+            'type': ('django.db.models.fields.CharField', [], {'max_length': '128'})
+        }
+    }
+
+    complete_apps = ['publications']
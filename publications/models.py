@@ -5,21 +5,30 @@ __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
 import calendar
+import json
+import six
 import warnings
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.dispatch import receiver
 from django.forms import model_to_dict
 from django.template import Template, Context
 
 from django.utils.http import urlquote_plus
 from django.contrib.sites.models import Site
+from publications.caching import bump_version
 from publications.fields import PagesField
+from publications.names import author_keys, simplify_name
+from publications.thumbnails import get_source, schedule
+from publications.utils import memoize
+from hashlib import sha1
 from string import ascii_uppercase
 
 
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
 from django.core.urlresolvers import reverse
 from django.db.models import Max, Min, F
 from django.utils.translation import ugettext as _
@@ -204,6 +213,15 @@ class OrderedModel(models.Model):
         o = self.get_ordering_queryset().aggregate(Max('order')).get('order__max')
         self.to(o)
 
+@memoize(maxsize=256)
+def split_fields(fields):
+    """
+    Turns a comma separated list of field names into a tuple. Results are
+    cached by content, so edits to a type are picked up immediately.
+    """
+
+    return tuple(s.strip() for s in fields.split(',') if s.strip()) if fields else ()
+
 class Type(OrderedModel):
     class Meta:
         ordering = ('order',)
@@ -244,14 +262,10 @@ class Type(OrderedModel):
         self.bibtex_type = self.bibtex_type_list[0]
 
     def get_bibtex_required_list(self):
-        return [s.strip() for s in self.bibtex_required_fields.split(",")] \
-                if self.bibtex_optional_fields \
-                else []
+        return list(split_fields(self.bibtex_required_fields))
 
     def get_bibtex_optional_list(self):
-        return [s.strip() for s in self.bibtex_optional_fields.split(",")] \
-                if self.bibtex_optional_fields \
-                else []
+        return list(split_fields(self.bibtex_optional_fields))
 
 class List(models.Model):
     """
@@ -282,19 +296,33 @@ class Style(models.Model):
     def __unicode__(self):
         return self.name
 
+    @staticmethod
+    def format_publications(name, publications):
+        """
+        Renders a list of publications in the named style, loading the
+        templates of all their types with a single query.
+
+        @rtype: list
+        @return: the formatted publications, in the same order
+        """
+
+        templates = StyleTemplate.objects.filter(style__name__iexact=name,
+            bibtype__in=set(publication.type_id for publication in publications))
+        templates = dict((t.bibtype_id, t) for t in templates)
+
+        return [templates[publication.type_id].format(publication)
+            if publication.type_id in templates else ''
+            for publication in publications]
+
     def save(self, *args, **kwargs):
-        from publications.models import Type
         create_style_templates = self.pk is None
-        super(Style, self).save(*args, **kwargs)
-        if create_style_templates:
-            # Look up Types and create a StyleTemplate for each
-            types = Type.objects.all()
-            for t in types:
-                StyleTemplate(
-                        style=self,
-                        bibtype=t,
-                        template="",
-                ).save()
+        with transaction.atomic():
+            super(Style, self).save(*args, **kwargs)
+            if create_style_templates:
+                # Create a StyleTemplate for each Type in a single query
+                StyleTemplate.objects.bulk_create([
+                    StyleTemplate(style=self, bibtype_id=type_id, template="")
+                    for type_id in Type.objects.values_list('pk', flat=True)])
 
 @receiver(models.signals.post_save, sender='publications.Type')
 def post_save_type(sender, instance, created, raw, **kwargs):
@@ -303,14 +331,15 @@ def post_save_type(sender, instance, created, raw, **kwargs):
     if raw or not created: return
 
     # For each existing style, create a corresponding StyleTemplate to this Type
-    styles = Style.objects.all()
-    for s in styles:
-        StyleTemplate(
-                style=s,
-                bibtype=instance,
-                template="",
-        ).save()
-        
+    with transaction.atomic():
+        StyleTemplate.objects.bulk_create([
+            StyleTemplate(style_id=style_id, bibtype=instance, template="")
+            for style_id in Style.objects.values_list('pk', flat=True)])
+
+@memoize(maxsize=256)
+def compile_template(source):
+    return Template(source)
+
 class StyleTemplate(models.Model):
     style = models.ForeignKey('Style')
     bibtype = models.ForeignKey('Type')
@@ -320,27 +349,35 @@ class StyleTemplate(models.Model):
         return self.bibtype.type
 
     def format(self, publication):
-        context = model_to_dict(publication)
+        # many-to-many fields would cost a query per publication
+        context = model_to_dict(publication, exclude=['lists'])
         context['authors'] = self.format_authors(publication)
 
         t = self.template
         if context.get('url'):
             t = '<a href="{{ url }}">' + t + '</a>'
 
-        t = Template(t)
-        c = Context(context)
-        return t.render(c)
+        return compile_template(t).render(Context(context))
 
     def format_authors(self, publication):
         names = publication.authors_list
         lnames = len(names)
         if lnames >= 4:
-            return '{} et al.'.format(names[0])
+            return u'{} et al.'.format(names[0])
         if lnames > 1:
-            return '{} and {}'.format(', '.join(names[:-1]), names[-1])
+            return u'{} and {}'.format(u', '.join(names[:-1]), names[-1])
         return names[0]
 
 
+def validate_json_object(value):
+    try:
+        obj = json.loads(value) if value else {}
+    except ValueError:
+        obj = None
+    if not isinstance(obj, dict):
+        raise ValidationError(_('Enter a JSON object.'), code='invalid')
+
+
 class Publication(models.Model):
     """
     Model representing a publication.
@@ -349,6 +386,11 @@ class Publication(models.Model):
     class Meta:
         ordering = ['-year', '-month', '-id']
         verbose_name_plural = ' Publications'
+        index_together = [('source', 'source_key')]
+
+    # fields which do not describe the publication itself
+    UNHASHED_FIELDS = ('id', 'citekey', 'pdf', 'image', 'thumbnail', 'external',
+        'content_hash', 'source', 'source_key')
 
     # names shown in admin area
     MONTH_CHOICES = tuple(enumerate(calendar.month_name[1:], 1))
@@ -361,7 +403,7 @@ class Publication(models.Model):
     title = models.CharField(max_length=512)
     authors = models.CharField(max_length=2048,
         help_text='List of authors separated by commas or <i>and</i>. Wrap with {} to prevent processing.')
-    year = models.PositiveIntegerField(max_length=4, blank=True, null=True)
+    year = models.PositiveIntegerField(max_length=4, blank=True, null=True, db_index=True)
     month = models.IntegerField(choices=MONTH_CHOICES, blank=True, null=True)
     journal = models.CharField(max_length=256, blank=True)
     book_title = models.CharField(max_length=256, blank=True)
@@ -395,6 +437,13 @@ class Publication(models.Model):
     isbn = models.CharField(max_length=32, verbose_name="ISBN", blank=True,
         help_text='Only for a book.') # A-B-C-D
     issn = models.CharField(max_length=32, verbose_name="ISSN", blank=True) # A-B
+    extra = models.TextField(blank=True, default='', validators=[validate_json_object],
+        help_text='Further BibTex fields as a JSON object.')
+    content_hash = models.CharField(max_length=40, blank=True, editable=False)
+    source = models.CharField(max_length=256, blank=True, editable=False,
+        help_text='Bibliography the publication was imported from.')
+    source_key = models.CharField(max_length=512, blank=True, editable=False,
+        help_text='Key of the publication in its bibliography.')
     lists = models.ManyToManyField(List, blank=True)
 
     def __init__(self, *args, **kwargs):
@@ -410,6 +459,8 @@ class Publication(models.Model):
         # If the author name is wrapped in brackets, don't process
         if self.authors and self.authors[0] == '{' and self.authors[-1] == '}':
             self.authors_list = [self.authors[1:-1]]
+            self.authors_list_simple = [simplify_name(self.authors_list[0])]
+            self.authors_bibtex = self.authors
         else:
             # post-process author names
             self.authors = self.authors.replace(', and ', ', ') \
@@ -473,12 +524,7 @@ class Publication(models.Model):
                     self.authors_list[i] = ' '.join(names)
 
                     # create simplified/normalized representation of author name
-                    if len(names) > 1:
-                        for name in names[0].split('-'):
-                            name_simple = self.simplify_name(' '.join([name, names[-1]]))
-                            self.authors_list_simple.append(name_simple)
-                    else:
-                        self.authors_list_simple.append(self.simplify_name(names[0]))
+                    self.authors_list_simple.extend(author_keys(self.authors_list[i]))
 
             # list of authors in BibTex format
             self.authors_bibtex = ' and '.join(self.authors_list)
@@ -493,15 +539,21 @@ class Publication(models.Model):
             else:
                 self.authors = self.authors_list[0]
 
-        # Add magic methods for every style in the database
-        def get_format(name):
-            def return_format():
-                return self.type.styletemplate_set.get(style__name="Harvard").format(self)
-            return return_format
+    def __getattr__(self, name):
+        # format_<style>() renders this publication in the named style
+        if name.startswith('format_'):
+            style = name[len('format_'):]
+            return lambda: self.format(style)
+        raise AttributeError(name)
 
-        styles = Style.objects.values_list('name', flat=True)
-        for s in styles:
-            setattr(self, 'format_%s' % s.lower(), get_format(s))
+    def format(self, style):
+        """
+        Renders this publication using the template of the given style for
+        its type.
+        """
+
+        return StyleTemplate.objects.get(
+            style__name__iexact=style, bibtype=self.type_id).format(self)
 
     def __unicode__(self):
         if len(self.title) < 64:
@@ -560,6 +612,29 @@ class Publication(models.Model):
         return self.authors_list[0]
 
 
+    def get_content_hash(self):
+        """
+        Returns a hash of the fields describing the publication, which does not
+        depend on whether values were read from a bibliography or the database.
+        """
+
+        values = []
+        for field in self._meta.concrete_fields:
+            if field.name not in self.UNHASHED_FIELDS:
+                value = getattr(self, field.attname)
+                values.append('' if value is None else six.text_type(value).strip())
+        return sha1(json.dumps(values).encode('utf-8')).hexdigest()
+
+
+    @property
+    def extra_fields(self):
+        try:
+            extra = json.loads(self.extra) if self.extra else {}
+        except ValueError:
+            return {}
+        return extra if isinstance(extra, dict) else {}
+
+
     def journal_or_book_title(self):
         if self.journal:
             return self.journal
@@ -638,14 +713,12 @@ class Publication(models.Model):
         self.institution = self.institution.strip()
 
 
-    @staticmethod
-    def simplify_name(name):
-        name = name.lower()
-        name = name.replace( u'ä', u'ae')
-        name = name.replace( u'ö', u'oe')
-        name = name.replace( u'ü', u'ue')
-        name = name.replace( u'ß', u'ss')
-        return name
+    def save(self, *args, **kwargs):
+        self.content_hash = self.get_content_hash()
+        super(Publication, self).save(*args, **kwargs)
+
+
+    simplify_name = staticmethod(simplify_name)
 
 class CustomFile(models.Model):
     publication = models.ForeignKey(Publication)
@@ -663,6 +736,177 @@ class CustomLink(models.Model):
     def __unicode__(self):
         return self.description
 
+class Author(models.Model):
+    """
+    Identity of an author shared by all spellings of the author's name.
+    """
+
+    name = models.CharField(max_length=256)
+    key = models.CharField(max_length=256, unique=True,
+        help_text='Simplified first initial and surname, e.g. "m. muller".')
+
+    class Meta:
+        ordering = ('key',)
+
+    def __unicode__(self):
+        return self.name
+
+class AuthorVariant(models.Model):
+    """
+    Maps a simplified name to an author. Authors are merged by pointing their
+    variants to the same author.
+    """
+
+    author = models.ForeignKey(Author, related_name='variants')
+    key = models.CharField(max_length=256, unique=True)
+
+    def __unicode__(self):
+        return self.key
+
+class Authorship(models.Model):
+    """
+    Links a publication to the variant of the name of one of its authors.
+    """
+
+    publication = models.ForeignKey(Publication, related_name='authorships')
+    variant = models.ForeignKey(AuthorVariant, related_name='authorships')
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ('publication', 'position')
+
+    def __unicode__(self):
+        return u'%s (%d)' % (self.variant, self.position)
+
+class BlockingKey(models.Model):
+    """
+    Key of a publication used to find duplicates, such as its DOI or the name
+    of its first author combined with its year. Publications which might be
+    duplicates share at least one key.
+    """
+
+    publication = models.ForeignKey(Publication, related_name='blocking_keys')
+    key = models.CharField(max_length=128, db_index=True)
+
+    def __unicode__(self):
+        return self.key
+
+class Document(models.Model):
+    """
+    Text and metadata extracted from a PDF of a publication, either its PDF or
+    one of its files, so that the text of publications can be searched.
+    """
+
+    publication = models.ForeignKey(Publication, related_name='documents')
+    file = models.CharField(max_length=256,
+        help_text='Name of the file in the storage.')
+    content_hash = models.CharField(max_length=40,
+        help_text='SHA-1 of the contents of the file the text was extracted from.')
+    pages = models.PositiveIntegerField(blank=True, null=True)
+    title = models.CharField(max_length=512, blank=True)
+    doi = models.CharField(max_length=128, blank=True)
+    text = models.TextField(blank=True)
+
+    class Meta:
+        unique_together = [('publication', 'file')]
+
+    def __unicode__(self):
+        return self.file
+
+if 'cms' in settings.INSTALLED_APPS:
+    from cms.models.pluginmodel import CMSPlugin
+
+    class PublicationsPlugin(CMSPlugin):
+        """
+        Configuration of a django CMS plugin showing a selection of publications.
+        """
+
+        TEMPLATES = (
+            ('publications/publications.html', 'List'),
+            ('publications/publications_with_thumbnails.html', 'List with thumbnails'),
+        )
+
+        list = models.ForeignKey(List, blank=True, null=True,
+            help_text='Only show publications of this list.')
+        type = models.ForeignKey(Type, blank=True, null=True,
+            help_text='Only show publications of this type.')
+        year_from = models.PositiveIntegerField(blank=True, null=True)
+        year_to = models.PositiveIntegerField(blank=True, null=True)
+        limit = models.PositiveIntegerField(default=20,
+            help_text='Maximum number of publications shown, 0 for no limit.')
+        style = models.ForeignKey(Style, blank=True, null=True,
+            help_text='Format publications using this style instead of the template.')
+        template = models.CharField(max_length=256, choices=TEMPLATES, default=TEMPLATES[0][0])
+        external = models.BooleanField(default=False,
+            help_text='Include publications written in other labs.')
+
+        def __unicode__(self):
+            return self.list.list if self.list else 'Publications'
+
+        def get_publications(self):
+            publications = Publication.objects.select_related('type')
+
+            if self.list_id:
+                publications = publications.filter(lists=self.list_id)
+            if self.type_id:
+                publications = publications.filter(type=self.type_id)
+            else:
+                publications = publications.filter(type__hidden=False)
+            if self.year_from:
+                publications = publications.filter(year__gte=self.year_from)
+            if self.year_to:
+                publications = publications.filter(year__lte=self.year_to)
+            if not self.external:
+                publications = publications.filter(external=False)
+
+            publications = publications.order_by('-year', '-month', '-id')
+            if self.limit:
+                publications = publications[:self.limit]
+
+            return publications.prefetch_related('customlink_set', 'customfile_set')
+
+def invalidate_cache(sender, **kwargs):
+    # Any change to the publication data invalidates all cached fragments
+    bump_version()
+
+def connect_invalidate_cache():
+    for model in (Publication, Type, List, Style, StyleTemplate, CustomFile, CustomLink,
+            Author, AuthorVariant):
+        models.signals.post_save.connect(invalidate_cache, sender=model)
+        models.signals.post_delete.connect(invalidate_cache, sender=model)
+
+connect_invalidate_cache()
+
+@receiver(models.signals.post_save, sender=Publication)
+def update_indexes(sender, instance, raw=False, **kwargs):
+    if not raw:
+        from publications.helpers import index_publications
+        index_publications([instance])
+
+@receiver(models.signals.post_save, sender=Publication)
+def extract_text(sender, instance, raw=False, **kwargs):
+    if not raw:
+        from publications.documents import schedule
+        schedule(instance.pk)
+
+@receiver(models.signals.post_save, sender=CustomFile)
+@receiver(models.signals.post_delete, sender=CustomFile)
+def extract_text_files(sender, instance, raw=False, **kwargs):
+    if not raw:
+        from publications.documents import schedule
+        schedule(instance.publication_id)
+
+@receiver(models.signals.post_save, sender=Publication)
+def render_thumbnails(sender, instance, raw=False, **kwargs):
+    source = get_source(instance)
+    if not raw and source:
+        schedule(source)
+
+@receiver(models.signals.m2m_changed, sender=Publication.lists.through)
+def invalidate_cache_lists(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version()
+
 
 
         
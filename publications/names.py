@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Normalization of author names.
+
+Names are reduced to lowercase ASCII so that different spellings of the same
+name, such as I{Müller} and I{Muller}, share a single key. Names with umlauts
+have a second key with the umlauts spelled as digraphs, so that I{Mueller}
+belongs to the same author, while I{Bauer} and I{Baur} remain different.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import re
+import unicodedata
+
+from publications.latex import decode
+from publications.utils import memoize
+
+# letters which do not decompose into a base letter and accents
+TRANSLITERATIONS = {
+    u'ß': u'ss',
+    u'æ': u'ae',
+    u'œ': u'oe',
+    u'ø': u'o',
+    u'ł': u'l',
+    u'đ': u'd',
+    u'ð': u'd',
+    u'þ': u'th',
+    u'ı': u'i',
+}
+
+TEX_COMMAND = re.compile(r'\\[a-zA-Z]+\s*|\\.|[{}]')
+TRANSLITERATION = re.compile(u'|'.join(TRANSLITERATIONS))
+INVALID = re.compile(r"[^a-z0-9 .\-]+")
+
+# German spellings of umlauts, e.g. "ue" in "Mueller"
+DIGRAPHS = {u'ä': u'ae', u'ö': u'oe', u'ü': u'ue'}
+UMLAUT = re.compile(u'|'.join(DIGRAPHS))
+
+
+@memoize(maxsize=4096)
+def simplify_name(name):
+    """
+    Returns the lowercase ASCII form of a name, keeping spaces, periods and
+    dashes.
+
+        >>> simplify_name(u'M. Müller'), simplify_name(u'M. Mueller')
+        (u'm. muller', u'm. mueller')
+    """
+
+    name = TEX_COMMAND.sub(u'', decode(u'%s' % name)).lower()
+    name = TRANSLITERATION.sub(lambda match: TRANSLITERATIONS[match.group(0)], name)
+    name = unicodedata.normalize('NFKD', name)
+    name = u''.join(c for c in name if not unicodedata.combining(c))
+    return INVALID.sub(u'', name)
+
+
+def simplify_digraphs(name):
+    """
+    Returns the simplified form of a name with its umlauts spelled as
+    digraphs, or C{None} if the name has no umlauts.
+
+        >>> simplify_digraphs(u'M. Müller')
+        u'm. mueller'
+    """
+
+    name = unicodedata.normalize('NFC', TEX_COMMAND.sub(u'', decode(u'%s' % name)).lower())
+    if not UMLAUT.search(name):
+        return None
+    return simplify_name(UMLAUT.sub(lambda match: DIGRAPHS[match.group(0)], name))
+
+
+def author_keys(author):
+    """
+    Returns the keys of a name as formatted by L{Publication}, i.e. the
+    simplified first initial and surname. Hyphenated first names yield one
+    key per initial, and umlauts a further key spelled with digraphs.
+
+        >>> author_keys(u'J.-P. Sartre')
+        [u'j. sartre', u'p. sartre']
+        >>> author_keys(u'M. Müller')
+        [u'm. muller', u'm. mueller']
+    """
+
+    names = author.split(' ')
+    if len(names) > 1:
+        names = [u' '.join([name, names[-1]]) for name in names[0].split('-') if name]
+    else:
+        names = names[:1]
+
+    keys = [simplify_name(name) for name in names]
+    for name in names:
+        key = simplify_digraphs(name)
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def name_key(name):
+    """
+    Returns the key of a name as it appears in URLs, e.g. C{maria+mueller}.
+    """
+
+    names = [part for part in name.replace(' ', '+').split('+') if part]
+    if not names:
+        return u''
+    if len(names) > 1:
+        return simplify_name(names[0][0] + u'. ' + names[-1])
+    return simplify_name(names[-1])
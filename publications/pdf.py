@@ -0,0 +1,252 @@
+"""
+Extraction of text and metadata from PDF files without external tools.
+
+Only what is needed to search publications is extracted: the number of pages,
+the title and DOI embedded in the document information or XMP metadata, and
+the text shown by the content streams of the pages. Content streams compressed
+with C{/FlateDecode} are supported, as are strings in the standard encodings
+and in UTF-16. Text of fonts with custom encodings and of encrypted files
+cannot be recovered this way and is missing from the result.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import re
+import zlib
+
+OBJECT = re.compile(br'\d+\s+\d+\s+obj\b')
+STREAM = re.compile(br'stream\r?\n')
+FILTER = re.compile(br'/Filter\s*(\[[^\]]*\]|/\w+)')
+LENGTH = re.compile(br'/Length\s+(\d+)(?!\s+\d+\s+R)')
+PAGE = re.compile(br'/Type\s*/Page(?![A-Za-z])')
+DOI = re.compile(r'\b(10\.\d{4,9}/[-._;()/:A-Za-z0-9]+[A-Za-z0-9])')
+XMP_TITLE = re.compile(br'<dc:title>.*?<rdf:li[^>]*>(.*?)</rdf:li>', re.S)
+XMP_DOI = re.compile(br'<prism:doi>(.*?)</prism:doi>', re.S)
+WHITESPACE = re.compile(r'[ \t\r\f]+')
+CONTROL = re.compile(u'[\x00-\x08\x0b\x0e-\x1f\x7f]')
+BLANK_LINES = re.compile(r'\n\s*\n+')
+
+ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+
+# operators ending a line of text
+NEWLINE_OPERATORS = (b'T*', b'TD', b"'", b'"', b'Tm', b'ET')
+
+# gaps of text arrays wider than this many thousandths of the font size are spaces
+SPACE_WIDTH = 200
+
+
+def streams(data):
+    """
+    Yields the dictionaries and decoded data of the streams of a PDF file.
+    Streams compressed with other filters than C{/FlateDecode} are skipped.
+    """
+
+    for match in OBJECT.finditer(data):
+        start = match.end()
+        end = data.find(b'endobj', start)
+        stream = STREAM.search(data, start, len(data) if end == -1 else end)
+        if stream is None:
+            continue
+        dictionary = data[start:stream.start()]
+
+        length = LENGTH.search(dictionary)
+        if length is not None:
+            raw = data[stream.end():stream.end() + int(length.group(1))]
+        else:
+            # the length is an indirect object, so look for the end instead
+            raw = data[stream.end():data.find(b'endstream', stream.end())]
+
+        filters = FILTER.search(dictionary)
+        if filters is not None:
+            if re.findall(br'/(\w+)', filters.group(1)) != [b'FlateDecode'] or b'/DecodeParms' in dictionary:
+                continue
+            try:
+                raw = zlib.decompressobj().decompress(raw)
+            except zlib.error:
+                continue
+        yield dictionary, raw
+
+
+def read_string(data, i):
+    """
+    Returns a literal string starting with the parenthesis at position C{i} and
+    the position after the string.
+    """
+
+    result, depth, i = bytearray(), 1, i + 1
+    while i < len(data):
+        c = data[i:i + 1]
+        if c == b'\\':
+            n = data[i + 1:i + 2]
+            if n in ESCAPES:
+                result += ESCAPES[n]
+                i += 2
+            elif n.isdigit():
+                digits = re.match(br'[0-7]{1,3}', data[i + 1:i + 4]).group(0)
+                result.append(int(digits, 8) & 0xff)
+                i += 1 + len(digits)
+            elif n in b'\r\n':
+                # line continuation
+                i += 2 if data[i + 1:i + 3] != b'\r\n' else 3
+            else:
+                result += n
+                i += 2
+            continue
+        if c == b'(':
+            depth += 1
+        elif c == b')':
+            depth -= 1
+            if depth == 0:
+                return bytes(result), i + 1
+        result += c
+        i += 1
+    return bytes(result), i
+
+
+def tokens(data):
+    """
+    Yields the strings, numbers, array brackets and operators of a content
+    stream.
+    """
+
+    i, length = 0, len(data)
+    while i < length:
+        c = data[i:i + 1]
+        if c.isspace():
+            i += 1
+        elif c == b'%':
+            end = data.find(b'\n', i)
+            i = length if end == -1 else end
+        elif c == b'(':
+            string, i = read_string(data, i)
+            yield 'string', string
+        elif c == b'<' and data[i + 1:i + 2] == b'<':
+            yield 'operator', b'<<'
+            i += 2
+        elif c == b'>' and data[i + 1:i + 2] == b'>':
+            yield 'operator', b'>>'
+            i += 2
+        elif c == b'<':
+            end = data.find(b'>', i)
+            end = length if end == -1 else end
+            digits = re.sub(br'[^0-9A-Fa-f]', b'', data[i + 1:end])
+            if len(digits) % 2:
+                digits += b'0'
+            yield 'string', bytes(bytearray(int(digits[j:j + 2], 16) for j in range(0, len(digits), 2)))
+            i = end + 1
+        elif c in b'[]':
+            yield 'operator', c
+            i += 1
+        else:
+            match = re.match(br'/?[^\s()<>\[\]{}/%]+|.', data[i:i + 128], re.S)
+            token = match.group(0)
+            i += len(token)
+            try:
+                yield 'number', float(token)
+            except ValueError:
+                yield 'operator', token
+
+
+def decode(string):
+    """
+    Decodes a string of a PDF, which is either UTF-16 with a byte order mark
+    or in an 8-bit encoding approximated by Latin-1.
+    """
+
+    if string[:2] in (b'\xfe\xff', b'\xff\xfe'):
+        return string.decode('utf-16', 'replace')
+    if len(string) > 1 and len(string) % 2 == 0 and string[::2].count(b'\x00') == len(string) // 2:
+        # two byte character codes of Unicode fonts
+        return string.decode('utf-16-be', 'replace')
+    return string.decode('latin-1')
+
+
+def get_text(content):
+    """
+    Returns the text shown by a content stream.
+    """
+
+    parts, operands = [], []
+    for kind, value in tokens(content):
+        if kind != 'operator' or value in (b'[', b']'):
+            operands.append((kind, value))
+            continue
+
+        if value in (b'Tj', b"'", b'"', b'TJ'):
+            if value in (b"'", b'"'):
+                parts.append(u'\n')
+            for kind, operand in operands:
+                if kind == 'string':
+                    parts.append(decode(operand))
+                elif kind == 'number' and value == b'TJ' and operand < -SPACE_WIDTH:
+                    parts.append(u' ')
+        elif value == b'Td' and len(operands) >= 2 and operands[-1][1]:
+            parts.append(u'\n')
+        elif value in NEWLINE_OPERATORS:
+            parts.append(u'\n')
+        operands = []
+
+    # character codes of fonts with custom encodings, which databases may reject
+    text = WHITESPACE.sub(u' ', CONTROL.sub(u'', u''.join(parts)))
+    return BLANK_LINES.sub(u'\n', u'\n'.join(line.strip() for line in text.split(u'\n'))).strip()
+
+
+def get_info(data, key):
+    """
+    Returns an entry of the document information of a PDF, if any.
+    """
+
+    match = re.search(br'/' + key + br'\s*([(<])', data)
+    if match is None:
+        return u''
+    if match.group(1) == b'(':
+        string, _ = read_string(data, match.start(1))
+    else:
+        _, string = next(tokens(data[match.start(1):data.find(b'>', match.start(1)) + 1]))
+    return decode(string).strip()
+
+
+def extract(data):
+    """
+    Extracts text and metadata from the contents of a PDF file.
+
+    @type data: C{bytes}
+    @param data: contents of a PDF file
+
+    @rtype: C{dict}
+    @return: number of C{pages}, C{title}, C{doi} and C{text} of the document
+    """
+
+    if not data.startswith(b'%PDF'):
+        raise ValueError('Not a PDF file.')
+
+    pages, texts, metadata = len(PAGE.findall(data)), [], [data]
+    for dictionary, content in streams(data):
+        if b'/ObjStm' in dictionary:
+            # objects compressed into a stream, such as pages and information
+            pages += len(PAGE.findall(content))
+            metadata.append(content)
+        elif b'/Metadata' in dictionary or b'/XML' in dictionary:
+            metadata.append(content)
+        elif b'/Subtype' not in dictionary and b'/Length1' not in dictionary and b'/XRef' not in dictionary:
+            # content streams of pages, as opposed to images and fonts
+            texts.append(get_text(content))
+
+    text = u'\n'.join(t for t in texts if t)
+
+    title, doi = u'', u''
+    for chunk in metadata:
+        if not title:
+            match = XMP_TITLE.search(chunk)
+            title = match.group(1).decode('utf-8', 'replace').strip() if match else get_info(chunk, b'Title')
+        if not doi:
+            match = XMP_DOI.search(chunk) or re.search(br'/doi\s*\((.*?)\)', chunk, re.I)
+            doi = match.group(1).decode('latin-1').strip() if match else u''
+
+    if not doi:
+        match = DOI.search(text)
+        doi = match.group(1) if match else u''
+
+    return {'pages': pages or None, 'title': title, 'doi': doi, 'text': text}
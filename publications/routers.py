@@ -0,0 +1,129 @@
+"""
+Optional routing of public reads to a read replica.
+
+Add C{'publications.routers.ReplicaRouter'} to C{DATABASE_ROUTERS} and set
+C{PUBLICATIONS_REPLICA_DATABASE} to the alias of the replica. Queries made
+by the public views, their exports and the template tags are then sent to the
+replica, while all writes and everything else, including the admin, use the
+default database.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import threading
+
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.template.response import TemplateResponse
+
+_local = threading.local()
+
+
+def get_replica():
+    return getattr(settings, 'PUBLICATIONS_REPLICA_DATABASE', None)
+
+
+def current():
+    """
+    Returns the alias reads of this thread are sent to, if any.
+    """
+
+    return getattr(_local, 'alias', None)
+
+
+@contextmanager
+def use_replica(alias=None):
+    """
+    Sends reads of publications within the block to the replica.
+    """
+
+    previous = current()
+    _local.alias = alias or get_replica()
+    try:
+        yield
+    finally:
+        _local.alias = previous
+
+
+def replica_stream(chunks, alias):
+    chunks = iter(chunks)
+    while True:
+        with use_replica(alias):
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+        yield chunk
+
+
+class ReplicaTemplateResponse(TemplateResponse):
+    """
+    A template response whose template is rendered with reads sent to the
+    replica, so that it can be rendered by the handler like any other.
+    """
+
+    replica = None
+
+    @property
+    def rendered_content(self):
+        with use_replica(self.replica):
+            return super(ReplicaTemplateResponse, self).rendered_content
+
+
+def replica(view):
+    """
+    Sends the reads of a view to the replica, including those made while its
+    template is rendered or its export is streamed.
+    """
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        alias = get_replica()
+        if alias is None:
+            return view(request, *args, **kwargs)
+
+        with use_replica(alias):
+            response = view(request, *args, **kwargs)
+            if type(response) is TemplateResponse and not response.is_rendered:
+                # leave rendering to the handler, after the template response middleware
+                response.__class__ = ReplicaTemplateResponse
+                response.replica = alias
+            elif hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+
+        if response.streaming:
+            response.streaming_content = replica_stream(response.streaming_content, alias)
+        return response
+
+    return wrapper
+
+
+class ReplicaRouter(object):
+    """
+    Routes reads of publications to the replica inside of L{use_replica} and
+    all writes of publications to the default database.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'publications':
+            return current()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label == 'publications':
+            # instances read from the replica must not be saved to it
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._meta.app_label == 'publications' and obj2._meta.app_label == 'publications':
+            return True
+        return None
+
+    def allow_migrate(self, db, model):
+        return None
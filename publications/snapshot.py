@@ -0,0 +1,139 @@
+"""
+In-memory snapshot of all publications for read-mostly sites.
+
+With C{PUBLICATIONS_SNAPSHOT = True}, the pages of years, authors, keywords
+and lists are answered from a snapshot of all publications which every
+process loads once per version of the publication data. The publications of
+a snapshot are shared by all requests and must not be modified.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import threading
+
+from collections import defaultdict
+
+from django.conf import settings
+from publications.caching import get_version
+from publications.models import Authorship, AuthorVariant, CustomFile, CustomLink, List, \
+    Publication
+from publications.names import name_key
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def enabled():
+    return getattr(settings, 'PUBLICATIONS_SNAPSHOT', False)
+
+
+class Snapshot(object):
+    """
+    Publications ordered by year and indexed by year, author, keyword and list.
+    """
+
+    __slots__ = ('version', '_all', '_years', '_keywords', '_lists', '_variants', '_authors')
+
+    def __init__(self, version):
+        self.version = version
+
+        publications = tuple(Publication.objects
+            .select_related('type')
+            .order_by('-year', '-month', '-id'))
+
+        # related objects are grouped by hand rather than prefetched, so that
+        # publications do not keep a cache of related querysets each
+        links = defaultdict(list)
+        for link in CustomLink.objects.order_by('pk'):
+            links[link.publication_id].append(link)
+        files = defaultdict(list)
+        for file in CustomFile.objects.order_by('pk'):
+            files[file.publication_id].append(file)
+        memberships = defaultdict(list)
+        for publication_id, list_id in Publication.lists.through.objects \
+                .values_list('publication_id', 'list_id').iterator():
+            memberships[publication_id].append(list_id)
+
+        years = defaultdict(list)
+        keywords = defaultdict(list)
+        lists = dict((l.pk, (l, [])) for l in List.objects.all())
+        for publication in publications:
+            publication.links = tuple(links.get(publication.pk, ()))
+            publication.files = tuple(files.get(publication.pk, ()))
+            for list_id in memberships.get(publication.pk, ()):
+                lists[list_id][1].append(publication)
+            if publication.external:
+                continue
+            years[publication.year].append(publication)
+            for keyword in set(escaped for keyword, escaped in publication.keywords_escaped()):
+                keywords[keyword].append(publication)
+
+        # publications of authors, in the same order as all publications
+        positions = dict((publication.pk, i) for i, publication in enumerate(publications))
+        authors = defaultdict(set)
+        for publication_id, author_id in Authorship.objects \
+                .values_list('publication_id', 'variant__author_id').iterator():
+            if publication_id in positions:
+                authors[author_id].add(positions[publication_id])
+
+        self._all = tuple(publication for publication in publications if not publication.external)
+        self._years = dict((year, tuple(values)) for year, values in years.items())
+        self._keywords = dict((keyword, tuple(values)) for keyword, values in keywords.items())
+        self._lists = dict((l.list.lower(), (l, tuple(values))) for l, values in lists.values())
+        self._variants = dict(AuthorVariant.objects.values_list('key', 'author_id'))
+        self._authors = dict((author_id, tuple(publications[i] for i in sorted(indices)))
+            for author_id, indices in authors.items())
+
+    def year(self, year=None):
+        """
+        Returns the publications of a year, or all publications, apart from
+        external ones.
+        """
+
+        if year is None:
+            return self._all
+        return self._years.get(int(year), ())
+
+    def keyword(self, keyword):
+        """
+        Returns the publications with a keyword as it appears in URLs, apart
+        from external ones.
+        """
+
+        return self._keywords.get(keyword, ())
+
+    def list(self, name):
+        """
+        Returns a list and its publications, or C{None} and no publications.
+        """
+
+        return self._lists.get(name.lower(), (None, ()))
+
+    def author(self, name):
+        """
+        Returns the publications of the author of a name as it appears in
+        URLs, e.g. C{maria+mueller}.
+        """
+
+        return self._authors.get(self._variants.get(name_key(name)), ())
+
+
+def get_snapshot():
+    """
+    Returns the snapshot of the current version of the publication data,
+    loading it if the data has changed since the snapshot was taken.
+    """
+
+    global _snapshot
+
+    version = get_version()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            # another thread may have loaded the snapshot in the meantime
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = Snapshot(version)
+            snapshot = _snapshot
+    return snapshot
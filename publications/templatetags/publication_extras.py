@@ -2,14 +2,22 @@ __license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
 __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
-import os
-
-from django.template import Library, Node, Context, RequestContext
+from django.core.cache import cache
+from django.db.models import Q
+from django.template import Library, Node, RequestContext, TemplateSyntaxError, Variable
 from django.template.loader import get_template
 from django.utils.html import escape
 from django.utils.safestring import mark_safe
+from publications.bibtex import format_entry
+from publications.caching import TIMEOUT, get_version, make_key
+from publications.helpers import get_entry_from_publication
+from publications.instrumentation import timer
+from publications.latex import encode
 from publications.models import Publication, List
-from re import sub
+from publications.routers import use_replica
+from publications.thumbnails import get_url
+from publications.utils import memoize
+import re
 
 register = Library()
 
@@ -18,51 +26,222 @@ GREEK_LETTERS = \
 	'[Ee]ta|[Tt]heta|[Ll]ambda|[Mm]u|[Nn]u|[Pp]i|[Ss]igma|[Tt]au|' + \
 	'[Pp]hi|[Pp]si|[Cc]hi|[Oo]mega|[Rr]ho|[Xx]i|[Kk]appa'
 
-def get_publication(context, id):
-	pbl = Publication.objects.filter(pk=int(id))
+PUBLICATION_TEMPLATE = 'publications/publication.html'
+LIST_TEMPLATE = 'publications/publications.html'
+
+
+class PublicationBatch(object):
+	"""
+	Publications and lists requested by the tags of one template. The requests
+	are collected while the template is compiled and resolved together the first
+	time one of the tags is rendered, so that a page embedding many tags only
+	needs a single query.
+	"""
+
+	def __init__(self):
+		self.ids = set()
+		self.lists = set()
 
-	if len(pbl) < 1:
-		return ''
+	def fragments(self, context):
+		if self not in context.render_context:
+			context.render_context[self] = {}
+		return context.render_context[self]
+
+	def render_publication(self, context, id):
+		fragments = self.fragments(context)
+		if ('publication', id) not in fragments:
+			self.load_publications(context, fragments, self.ids | set([id]))
+		return fragments.get(('publication', id), '')
+
+	def render_list(self, context, list, template):
+		fragments = self.fragments(context)
+		if ('list', list, template) not in fragments:
+			self.load_lists(context, fragments, self.lists | set([(list, template)]))
+		return fragments.get(('list', list, template), '')
 
-	pbl[0].links = pbl[0].customlink_set.all()
-	pbl[0].files = pbl[0].customfile_set.all()
+	def load_publications(self, context, fragments, ids):
+		version = get_version()
+		keys = dict((make_key('publication', id, PUBLICATION_TEMPLATE, version=version), id)
+			for id in ids if ('publication', id) not in fragments)
 
-	return get_template('publications/publication.html').render(
-		RequestContext(context['request'], {'publication': pbl[0]}))
+		for key, html in cache.get_many(keys.keys()).items():
+			fragments['publication', keys.pop(key)] = html
 
+		if not keys:
+			return
 
-def get_publication_list(context, list, template='publications/publications.html'):
-	list = List.objects.filter(list__iexact=list)
+		publications = Publication.objects.filter(pk__in=keys.values()) \
+			.select_related('type') \
+			.prefetch_related('customlink_set', 'customfile_set')
 
-	if not list:
-		return ''
+		template = get_template(PUBLICATION_TEMPLATE)
+		rendered = {}
 
-	list = list[0]
-	publications = list.publication_set.all()
-	publications = publications.order_by('-year', '-month', '-id')
+		for publication in publications:
+			publication.links = publication.customlink_set.all()
+			publication.files = publication.customfile_set.all()
 
-	if not publications:
-		return ''
+			html = template.render(
+				RequestContext(context['request'], {'publication': publication}))
+			fragments['publication', publication.pk] = html
+			rendered[make_key('publication', publication.pk, PUBLICATION_TEMPLATE, version=version)] = html
 
-	for publication in publications:
-		publication.links = publication.customlink_set.all()
-		publication.files = publication.customfile_set.all()
+		cache.set_many(rendered, TIMEOUT)
 
-	return get_template(template).render(
-			RequestContext(context['request'], {'list': list, 'publications': publications}))
+	def load_lists(self, context, fragments, lists):
+		version = get_version()
+		keys = dict((make_key('list', list, template, version=version), (list, template))
+			for list, template in lists if ('list', list, template) not in fragments)
 
+		for key, html in cache.get_many(keys.keys()).items():
+			fragments[('list',) + keys.pop(key)] = html
 
-def tex_parse(string):
+		if not keys:
+			return
+
+		query = Q()
+		for list, template in keys.values():
+			query |= Q(list__iexact=list)
+		lists = dict((l.list.lower(), l) for l in List.objects.filter(query))
+		members = dict((l.pk, []) for l in lists.values())
+
+		publications = Publication.objects.filter(lists__in=members.keys()) \
+			.distinct() \
+			.order_by('-year', '-month', '-id') \
+			.select_related('type') \
+			.prefetch_related('customlink_set', 'customfile_set', 'lists')
+
+		for publication in publications:
+			publication.links = publication.customlink_set.all()
+			publication.files = publication.customfile_set.all()
+			for l in publication.lists.all():
+				if l.pk in members:
+					members[l.pk].append(publication)
+
+		rendered = {}
+
+		for key, (list, template) in keys.items():
+			l = lists.get(list)
+			if l is None or not members[l.pk]:
+				html = ''
+			else:
+				html = get_template(template).render(RequestContext(context['request'],
+					{'list': l, 'publications': members[l.pk]}))
+			fragments['list', list, template] = rendered[key] = html
+
+		cache.set_many(rendered, TIMEOUT)
+
+
+class PublicationNode(Node):
+	def __init__(self, batch, id):
+		self.batch = batch
+		self.id = id
+
+	def render(self, context):
+		with timer('tags'), use_replica():
+			return self.batch.render_publication(context, int(self.id.resolve(context)))
+
+
+class PublicationListNode(Node):
+	def __init__(self, batch, list, template):
+		self.batch = batch
+		self.list = list
+		self.template = template
+
+	def render(self, context):
+		with timer('tags'), use_replica():
+			template = self.template.resolve(context) if self.template else LIST_TEMPLATE
+			return self.batch.render_list(context, self.list.resolve(context).lower(), template)
+
+
+def get_batch(parser):
+	if not hasattr(parser, 'publication_batch'):
+		parser.publication_batch = PublicationBatch()
+	return parser.publication_batch
+
+
+def literal(expression):
+	"""
+	Returns the value of a filter expression if it is a constant.
+	"""
+
+	if expression.filters or isinstance(expression.var, Variable):
+		return None
+	return expression.var
+
+
+def get_publication(parser, token):
+	bits = token.split_contents()
+	if len(bits) != 2:
+		raise TemplateSyntaxError('%r tag takes exactly one argument' % bits[0])
+
+	batch = get_batch(parser)
+	id = parser.compile_filter(bits[1])
+	if bits[1].isdigit():
+		batch.ids.add(int(bits[1]))
+
+	return PublicationNode(batch, id)
+
+
+def get_publication_list(parser, token):
+	bits = token.split_contents()
+	if len(bits) not in (2, 3):
+		raise TemplateSyntaxError('%r tag takes one or two arguments' % bits[0])
+
+	batch = get_batch(parser)
+	list = parser.compile_filter(bits[1])
+	template = parser.compile_filter(bits[2]) if len(bits) > 2 else None
+
+	name = literal(list)
+	template_name = literal(template) if template else LIST_TEMPLATE
+	if name is not None and template_name is not None:
+		batch.lists.add((name.lower(), template_name))
+
+	return PublicationListNode(batch, list, template)
+
+
+# braces are removed before the patterns are applied
+TEX_MATH = re.compile(r'\$([^\$]*)\$')
+TEX_COMMANDS = re.compile(
+	r'\\(?P<greek>' + GREEK_LETTERS + ')|' +
+	r'_(?P<sub>\w)|' +
+	r'\^(?!_\w)(?P<sup>\w)')
+
+def tex_command(match):
+	if match.group('greek'):
+		return '&' + match.group('greek') + ';'
+	if match.group('sub'):
+		return '<sub>' + match.group('sub') + '</sub>'
+	return '<sup>' + match.group('sup') + '</sup>'
+
+
+def tex_replace(match):
+	return TEX_COMMANDS.sub(tex_command, match.group(1))
+
+
+@memoize(maxsize=4096)
+def tex_parse_cached(string):
 	string = string.replace('{', '').replace('}', '')
-	def tex_replace(match):
-		return \
-			sub(r'\^(\w)', r'<sup>\1</sup>',
-			sub(r'\^\{(.*?)\}', r'<sup>\1</sup>',
-			sub(r'\_(\w)', r'<sub>\1</sub>',
-			sub(r'\_\{(.*?)\}', r'<sub>\1</sub>',
-			sub(r'\\(' + GREEK_LETTERS + ')', r'&\1;', match.group(1))))))
-	return mark_safe(sub(r'\$([^\$]*)\$', tex_replace, escape(string)))
-
-register.simple_tag(get_publication, takes_context=True)
-register.simple_tag(get_publication_list, takes_context=True)
+	return mark_safe(TEX_MATH.sub(tex_replace, escape(string)))
+
+
+def tex_parse(string):
+	return tex_parse_cached(string)
+
+
+def tex_encode(string):
+	return encode(u'%s' % string)
+
+
+def bibtex(publication):
+	return format_entry(get_entry_from_publication(publication)).rstrip('\n')
+
+def thumbnail_url(publication, size='small'):
+	return get_url(publication, size)
+
+register.tag('get_publication', get_publication)
+register.tag('get_publication_list', get_publication_list)
 register.filter('tex_parse', tex_parse)
+register.filter('tex_encode', tex_encode)
+register.filter('bibtex', bibtex)
+register.filter('thumbnail_url', thumbnail_url)
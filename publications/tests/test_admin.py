@@ -0,0 +1,128 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from publications.admin import PublicationAdmin
+from publications.models import Publication, Type
+
+
+class PublicationAdminTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.login(username='admin', password='admin')
+
+        self.article = Type.objects.get(type='Journal')
+        self.publication = Publication.objects.create(type=self.article,
+            citekey='Test2014', title='A title', authors='Doe, John', year=2014,
+            journal='A journal')
+
+    def test_change_view_fieldsets(self):
+        response = self.client.get(
+            '/admin/publications/publication/%d/' % self.publication.pk)
+        self.assertEqual(response.status_code, 200)
+
+        form = response.context['adminform'].form
+        for field in self.article.get_bibtex_required_list():
+            self.assertTrue(form.fields[field].required)
+        self.assertNotIn('type', form.fields)
+
+        # the shared admin instance is left untouched
+        self.assertIsNone(PublicationAdmin.fieldsets)
+        self.assertEqual(PublicationAdmin.readonly_fields, ())
+
+        # the add form still offers every field
+        response = self.client.get('/admin/publications/publication/add/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('type', response.context['adminform'].form.fields)
+
+    def test_change_view_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = '/admin/publications/publication/%d/' % self.publication.pk
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        publication_queries = [q for q in queries.captured_queries
+            if 'FROM "publications_publication"' in q['sql']]
+        self.assertEqual(len(publication_queries), 1)
+
+    def test_changelist_queries(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(10):
+            Publication.objects.create(type=self.article, citekey='Key%d' % i,
+                title='Title %d' % i, authors='Doe, John and Roe, Jane', year=2000 + i,
+                journal='A journal')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/publications/publication/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 11)
+
+        # no queries per row
+        publication_queries = [q for q in queries.captured_queries
+            if 'FROM "publications_publication"' in q['sql']]
+        self.assertLessEqual(len(publication_queries), 2)
+
+    def test_indexed_search(self):
+        from publications.admin import publicationadmin
+
+        search = publicationadmin.SEARCH
+        publicationadmin.SEARCH = 'indexed'
+        try:
+            response = self.client.get('/admin/publications/publication/?q=Test')
+            self.assertEqual(list(response.context['cl'].result_list), [self.publication])
+            response = self.client.get('/admin/publications/publication/?q=2014')
+            self.assertEqual(list(response.context['cl'].result_list), [self.publication])
+            response = self.client.get('/admin/publications/publication/?q=title')
+            self.assertEqual(list(response.context['cl'].result_list), [])
+        finally:
+            publicationadmin.SEARCH = search
+
+    def action(self, action, publications):
+        return self.client.post('/admin/publications/publication/', {
+            'action': action,
+            '_selected_action': [publication.pk for publication in publications]})
+
+    def test_actions(self):
+        from publications.models import List
+
+        other = Publication.objects.create(type=self.article, citekey='Test2014b',
+            title='Another title', authors='Doe, John', year=2014, journal='A journal')
+        publications = [self.publication, other]
+        lst = List.objects.create(list='Selected', description='Selected')
+        book = Type.objects.get(type='Book')
+
+        self.action('add_to_list_%d' % lst.pk, publications)
+        self.action('add_to_list_%d' % lst.pk, publications)
+        self.assertEqual(lst.publication_set.count(), 2)
+        self.action('remove_from_list_%d' % lst.pk, [other])
+        self.assertEqual(list(lst.publication_set.all()), [self.publication])
+
+        self.action('set_type_%d' % book.pk, publications)
+        self.assertEqual(Publication.objects.filter(type=book).count(), 2)
+        for publication in Publication.objects.all():
+            self.assertEqual(publication.content_hash, publication.get_content_hash())
+
+        self.action('mark_external', [other])
+        self.assertEqual(list(Publication.objects.filter(external=True)), [other])
+
+        self.action('regenerate_citekeys', publications)
+        self.assertEqual(
+            sorted(Publication.objects.values_list('citekey', flat=True)),
+            ['Doe2014a', 'Doe2014b'])
+
+        # publications without a year are regenerated as well
+        Publication.objects.filter(pk=other.pk).update(year=None)
+        self.action('regenerate_citekeys', publications)
+        self.assertEqual(
+            sorted(Publication.objects.values_list('citekey', flat=True)),
+            ['Doe2014a', 'Doea'])
+
+        response = self.action('export_bibtex', [other])
+        content = b''.join(response.streaming_content)
+        self.assertIn('Doea', content)
+        self.assertNotIn('Doe2014a', content)
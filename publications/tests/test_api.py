@@ -0,0 +1,112 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from publications.models import List, Publication, Type
+
+
+class APITests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        journal = Type.objects.get(type='Journal')
+        self.lst = List.objects.create(list='Selected', description='Selected')
+
+        for i in range(5):
+            publication = Publication.objects.create(type=journal, citekey='Doe200%d' % i,
+                title='Title %d' % i, authors='J. Doe, M. Mustermann', year=2000 + i,
+                journal='A journal', keywords='water, power')
+            if i % 2:
+                publication.lists.add(self.lst)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return json.loads(response.content)
+
+    def test_list(self):
+        data = self.get('/publications/api/publications/', fields='citekey,year', limit=2)
+        self.assertEqual(data['results'], [
+            {'citekey': 'Doe2004', 'year': 2004},
+            {'citekey': 'Doe2003', 'year': 2003}])
+
+        # follow the cursor
+        citekeys = [row['citekey'] for row in data['results']]
+        while data['next']:
+            data = self.get(data['next'])
+            citekeys.extend(row['citekey'] for row in data['results'])
+        self.assertEqual(citekeys, ['Doe2004', 'Doe2003', 'Doe2002', 'Doe2001', 'Doe2000'])
+
+        response = self.client.get('/publications/api/publications/', {'fields': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+        for limit in ['abc', '0', '-3']:
+            response = self.client.get('/publications/api/publications/', {'limit': limit})
+            self.assertEqual(response.status_code, 400)
+
+    def test_detail(self):
+        publication = Publication.objects.get(citekey='Doe2002')
+        data = self.get('/publications/api/publications/%d/' % publication.pk)
+        self.assertEqual(data['title'], 'Title 2')
+        self.assertEqual(data['type'], 'Journal')
+        self.assertNotIn('content_hash', data)
+        self.assertNotIn('extra', data)
+
+        response = self.client.get('/publications/api/publications/%d/' % publication.pk,
+            {'fields': 'source_key'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get('/publications/api/publications/0/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_filters(self):
+        fields = 'citekey'
+        self.assertEqual(self.get('/publications/api/year/2001/', fields=fields)['results'],
+            [{'citekey': 'Doe2001'}])
+        self.assertEqual(len(self.get('/publications/api/tag/water/', fields=fields)['results']), 5)
+        self.assertEqual(self.get('/publications/api/tag/wat/', fields=fields)['results'], [])
+
+        # pages of keywords are filtered in Python, but still follow the cursor
+        data = self.get('/publications/api/tag/water/', fields=fields, limit=2)
+        citekeys = [row['citekey'] for row in data['results']]
+        while data['next']:
+            data = self.get(data['next'])
+            citekeys.extend(row['citekey'] for row in data['results'])
+        self.assertEqual(citekeys, ['Doe2004', 'Doe2003', 'Doe2002', 'Doe2001', 'Doe2000'])
+        self.assertEqual(self.get('/publications/api/list/selected/', fields=fields)['results'],
+            [{'citekey': 'Doe2003'}, {'citekey': 'Doe2001'}])
+        self.assertEqual(len(self.get('/publications/api/author/max+mustermann/',
+            fields=fields)['results']), 5)
+        self.assertEqual(self.get('/publications/api/author/anna+mustermann/',
+            fields=fields)['results'], [])
+
+    def test_bulk(self):
+        bib = """
+            @article{Doe2000,
+              author = {Doe, John},
+              title = {{A new title}},
+              journal = {A journal},
+              year = {2000}
+            }
+            @article{Roe2014,
+              author = {Roe, Jane},
+              title = {{Another title}},
+              journal = {Another journal},
+              year = {2014}
+            }
+        """
+
+        url = '/publications/api/publications/bulk/'
+        response = self.client.post(url, bib, content_type='text/x-bibtex')
+        self.assertEqual(response.status_code, 403)
+
+        User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.login(username='admin', password='admin')
+
+        data = json.loads(self.client.post(url, bib, content_type='text/x-bibtex').content)
+        self.assertEqual(data['created'], ['Roe2014'])
+        self.assertEqual(data['updated'], 1)
+
+        publication = Publication.objects.get(citekey='Doe2000')
+        self.assertEqual(publication.title, 'A new title')
+        self.assertEqual(publication.keywords, 'water, power')
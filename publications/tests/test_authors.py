@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from django.test import TestCase
+from publications.authors import get_publications
+from publications.helpers import create_publications_from_entries, parse
+from publications.models import Author, AuthorVariant, Publication, Type
+from publications.names import author_keys, simplify_name
+
+
+class AuthorTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        journal = Type.objects.get(type='Journal')
+        for citekey, authors in [
+                ('Mueller2000', u'Maria Müller, John Doe'),
+                ('Mueller2001', u'M. Mueller'),
+                ('Mueller2002', u'Maria Muller'),
+                ('Mueller2003', u'Maria Mußler'),
+                ('Sartre2004', u'Jean-Paul Sartre')]:
+            Publication.objects.create(type=journal, citekey=citekey, title=citekey,
+                authors=authors, year=int(citekey[-4:]), journal='A journal')
+
+    def test_names(self):
+        self.assertEqual(simplify_name(u'M. Müller'), u'm. muller')
+        self.assertEqual(simplify_name(u'M. Mueller'), u'm. mueller')
+        self.assertEqual(author_keys(u'M. Müller'), [u'm. muller', u'm. mueller'])
+        self.assertEqual(author_keys(u'M. Mueller'), [u'm. mueller'])
+        self.assertEqual(simplify_name(u'S. Strauß'), u's. strauss')
+        self.assertEqual(simplify_name(u'S. Bj{\\o}rn'), u's. bjorn')
+        self.assertEqual(simplify_name(u'L. Łukasiewicz'), u'l. lukasiewicz')
+        self.assertEqual(author_keys(u'J.-P. Sartre'), [u'j. sartre', u'p. sartre'])
+
+    def test_person(self):
+        citekeys = ['Mueller2002', 'Mueller2001', 'Mueller2000']
+        for name in ['maria+mueller', 'm.+muller', u'm.+müller']:
+            self.assertEqual([p.citekey for p in get_publications(name).order_by('-year')], citekeys)
+
+        response = self.client.get('/publications/maria+mueller/')
+        self.assertEqual([p.citekey for p in response.context['publications']], citekeys)
+
+        self.assertEqual([p.citekey for p in get_publications('j.+sartre')], ['Sartre2004'])
+        self.assertEqual([p.citekey for p in get_publications('p.+sartre')], ['Sartre2004'])
+        self.assertEqual(Author.objects.filter(variants__key__endswith='sartre').distinct().count(), 1)
+
+    def test_digraphs(self):
+        journal = Type.objects.get(type='Journal')
+        for citekey, authors in [('Bauer2005', u'Max Bauer'), ('Baur2006', u'Max Baur')]:
+            Publication.objects.create(type=journal, citekey=citekey, title=citekey,
+                authors=authors, year=int(citekey[-4:]), journal='A journal')
+
+        # digraphs only match umlauts, not other spellings without them
+        self.assertEqual([p.citekey for p in get_publications('max+bauer')], ['Bauer2005'])
+        self.assertEqual([p.citekey for p in get_publications('max+baur')], ['Baur2006'])
+
+    def test_merge(self):
+        # variants can be pointed to another author
+        AuthorVariant.objects.filter(key=u'm. mussler').update(
+            author=Author.objects.get(key=u'm. muller'))
+        self.assertEqual(get_publications('maria+mueller').count(), 4)
+
+    def test_import(self):
+        entries, duplicates = parse(u"""
+            @article{Mueller2010,
+              author = {M{\\"u}ller, Maria},
+              title = {Yet another title},
+              year = {2010}
+            }
+        """)
+        create_publications_from_entries(entries, duplicates)
+        self.assertEqual(get_publications('maria+muller').count(), 4)
@@ -0,0 +1,93 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+from publications import caching
+from publications.helpers import index_publications
+from publications.models import Publication, Type
+
+
+class CacheViewTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        cache.clear()
+        caching.CACHE_VIEWS = True
+
+        journal = Type.objects.get(type='Journal')
+        self.publication = Publication.objects.create(type=journal, citekey='Doe2000',
+            title='A title', authors='J. Doe', year=2000, keywords='water')
+        index_publications([self.publication])
+
+    def tearDown(self):
+        caching.CACHE_VIEWS = False
+        cache.clear()
+
+    def test_cache_view(self):
+        response = self.client.get('/publications/')
+        self.assertContains(response, 'A title')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/publications/')
+        self.assertContains(response, 'A title')
+
+        # exports are cached once they have been streamed
+        content = b''.join(self.client.get('/publications/?bibtex').streaming_content)
+        with self.assertNumQueries(0):
+            response = self.client.get('/publications/?bibtex')
+        self.assertEqual(response.content, content)
+        self.assertTrue(response['Content-Type'].startswith('text/x-bibtex'))
+
+        # saving a publication invalidates all pages
+        self.publication.title = 'Another title'
+        self.publication.save()
+        self.assertContains(self.client.get('/publications/'), 'Another title')
+
+    def test_etag(self):
+        response = self.client.get('/publications/?rss')
+        etag = response['ETag']
+        b''.join(response.streaming_content)
+
+        # unchanged feeds are not sent again
+        with self.assertNumQueries(0):
+            response = self.client.get('/publications/?rss', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.publication.save()
+        response = self.client.get('/publications/?rss', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_warm_publications_cache(self):
+        stdout = StringIO()
+        call_command('warm_publications_cache', concurrency=1, host='example.com', stdout=stdout)
+        output = stdout.getvalue()
+        for url in ('/publications/year/2000/', '/publications/j.+doe/?bibtex',
+                '/publications/tag/water/?rss'):
+            self.assertIn(url, output)
+        self.assertIn('0 failed', output)
+
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get('/publications/j.+doe/', HTTP_HOST='example.com'),
+                'A title')
+
+    def test_host(self):
+        response = self.client.get('/publications/?rss', HTTP_HOST='example.com')
+        b''.join(response.streaming_content)
+
+        # feeds contain absolute links, so every host gets its own
+        response = self.client.get('/publications/?rss', HTTP_HOST='example.org')
+        self.assertIn(b'example.org', b''.join(response.streaming_content))
+
+    def test_authenticated(self):
+        self.assertContains(self.client.get('/publications/'), 'A title')
+
+        # pages of logged-in users are neither served from nor stored in the cache
+        User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.login(username='admin', password='secret')
+        response = self.client.get('/publications/')
+        self.assertFalse(response.has_header('ETag'))
+        Publication.objects.filter(pk=self.publication.pk).update(title='Another title')
+        self.assertContains(self.client.get('/publications/'), 'Another title')
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from publications import admin_views
+from publications.dedup import Record, find_duplicates
+from publications.helpers import create_publications_from_entries, parse
+from publications.models import BlockingKey, Publication, Type
+
+
+class DedupTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        self.publication = Publication.objects.create(
+            type=Type.objects.get(type='Journal'), citekey='Kaika2000',
+            title='Fetishizing the modern city: the phantasmagoria of urban technological networks',
+            authors='M. Kaika, E. Swyngedouw', year=2000, journal='IJURR',
+            doi='10.1111/1468-2427.00239')
+
+    def test_record(self):
+        a = Record(u'{\\"U}ber {Fl\\"usse}', u'J. Müller', 2004)
+        b = Record(u'Über Flüsse.', u'Jürgen Muller', '2004')
+        self.assertEqual(a.keys, b.keys)
+        self.assertEqual(a.score(b), 1.)
+        self.assertTrue(a.is_duplicate(b))
+        self.assertFalse(a.is_duplicate(Record(u'Über Flüsse', u'J. Müller')))
+        self.assertEqual(a.score(Record(u'Über Flüsse', u'J. Müller', 2005)), 0.)
+
+    def test_blocking_keys(self):
+        keys = set(self.publication.blocking_keys.values_list('key', flat=True))
+        self.assertIn('doi:10.1111/1468-2427.00239', keys)
+        self.assertIn('author:kaika:2000', keys)
+
+        BlockingKey.objects.all().delete()
+        call_command('rebuild_blocking_keys', verbosity=0)
+        self.assertEqual(set(self.publication.blocking_keys.values_list('key', flat=True)), keys)
+
+    def test_import(self):
+        entries, duplicates = parse("""
+            @article{Kaika2000b,
+              author = {Kaika, Maria and Swyngedouw, Erik},
+              title = {Fetishizing the Modern City: The Phantasmagoria of Urban Technological Networks.},
+              year = {2000}
+            }
+            @article{Kaika2000c,
+              author = {Doe, John},
+              title = {A different title},
+              doi = {https://doi.org/10.1111/1468-2427.00239},
+              year = {2000}
+            }
+            @article{Kaika2001,
+              author = {Kaika, Maria},
+              title = {Fetishizing the modern city: the phantasmagoria of urban networks},
+              year = {2000}
+            }
+            @article{Doe2000,
+              author = {Doe, John},
+              title = {Something else entirely},
+              year = {2000}
+            }
+        """)
+        publications, errors = create_publications_from_entries(entries, duplicates)
+
+        self.assertEqual([e['key'] for e in errors['not_unique_created']], ['Kaika2000b', 'Kaika2000c'])
+        self.assertEqual([e['key'] for e in errors['possible_duplicates']], ['Kaika2001'])
+        self.assertEqual(sorted(p.citekey for p in publications), ['Doe2000', 'Kaika2001'])
+
+        # new publications are indexed as well
+        pairs = find_duplicates()
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual(set([pairs[0][1].citekey, pairs[0][2].citekey]),
+            set(['Kaika2000', 'Kaika2001']))
+
+    def test_similar_titles(self):
+        Publication.objects.create(type=self.publication.type, citekey='Doe2000',
+            title='Statistics of natural images, part I', authors='J. Doe', year=2000)
+        entries, duplicates = parse("""
+            @article{Doe2000b,
+              author = {Doe, John},
+              title = {Statistics of natural images, part II},
+              year = {2000}
+            }
+        """)
+        publications, errors = create_publications_from_entries(entries, duplicates)
+
+        # similar titles are only reported
+        self.assertEqual([p.citekey for p in publications], ['Doe2000b'])
+        self.assertEqual(errors['not_unique_created'], [])
+        self.assertEqual([e['key'] for e in errors['possible_duplicates']], ['Doe2000b'])
+
+    def test_report(self):
+        Publication.objects.create(type=self.publication.type, citekey='Kaika2000b',
+            title=self.publication.title, authors='Maria Kaika', year=2000)
+
+        request = RequestFactory().get('/admin/publications/publication/duplicates/')
+        request.user = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        response = admin_views.find_duplicates(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Kaika2000b', response.content.decode('utf-8'))
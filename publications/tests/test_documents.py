@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+import zlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+from publications import documents
+from publications.documents import ingest
+from publications.models import CustomFile, Document, Publication, Type
+from publications.pdf import extract
+
+
+def make_pdf(info=b'', text=b'(Hydrodynamics) Tj', compress=True):
+    content = b'BT /F1 12 Tf 72 720 Td ' + text + b' 0 -14 Td [(Wat) 30 (er) -400 (waves)] TJ ET'
+    dictionary = b''
+    if compress:
+        content = zlib.compress(content)
+        dictionary = b'/Filter /FlateDecode '
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>',
+        b'<< /Type /Page /Parent 2 0 R /Contents 5 0 R >>',
+        b'<< /Type /Page /Parent 2 0 R >>',
+        b'<< ' + dictionary + b'/Length ' + str(len(content)).encode('ascii') + b' >>\nstream\n'
+            + content + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< ' + info + b' >>',
+    ]
+    return b'%PDF-1.4\n' + b''.join(str(i + 1).encode('ascii') + b' 0 obj\n' + obj + b'\nendobj\n'
+        for i, obj in enumerate(objects)) + b'trailer\n<< /Root 1 0 R /Info 7 0 R >>\n%%EOF\n'
+
+
+class PDFTests(TestCase):
+    def test_extract(self):
+        result = extract(make_pdf(info=b'/Title (A \\(short\\) title) /doi (10.1000/xyz123)'))
+        self.assertEqual(result['pages'], 2)
+        self.assertEqual(result['title'], u'A (short) title')
+        self.assertEqual(result['doi'], u'10.1000/xyz123')
+        self.assertEqual(result['text'], u'Hydrodynamics\nWater waves')
+
+        result = extract(make_pdf(info=b'/Title <FEFF00C400DF>',
+            text=b'(doi:10.1234/jfm.2000.5) Tj', compress=False))
+        self.assertEqual(result['title'], u'\xc4\xdf')
+        self.assertEqual(result['doi'], u'10.1234/jfm.2000.5')
+        self.assertIn(u'Water waves', result['text'])
+
+        self.assertRaises(ValueError, extract, b'GIF89a')
+
+
+class DocumentTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root)
+        self.override.enable()
+
+        self.publication = Publication.objects.create(type=Type.objects.get(type='Journal'),
+            citekey='Doe2000', title='A title', authors='J. Doe', year=2000,
+            pdf=SimpleUploadedFile('paper.pdf', make_pdf(info=b'/Title (A title)')))
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_ingest(self):
+        self.assertEqual(ingest(self.publication), (1, 0))
+        document = Document.objects.get(publication=self.publication)
+        self.assertEqual(document.file, self.publication.pdf.name)
+        self.assertEqual(document.title, u'A title')
+        self.assertEqual(document.pages, 2)
+        self.assertIn(u'Hydrodynamics', document.text)
+
+        # unchanged files are neither parsed nor written
+        with self.assertNumQueries(2):
+            self.assertEqual(ingest(self.publication), (0, 1))
+
+        CustomFile.objects.create(publication=self.publication, description='Slides',
+            file=SimpleUploadedFile('slides.pdf', make_pdf(text=b'(Vortices) Tj')))
+        CustomFile.objects.create(publication=self.publication, description='Data',
+            file=SimpleUploadedFile('data.csv', b'1,2,3'))
+        self.assertEqual(ingest(self.publication), (1, 1))
+
+        # text of removed files is deleted
+        self.publication.pdf = SimpleUploadedFile('revised.pdf', make_pdf(text=b'(Revised) Tj'))
+        self.publication.save()
+        self.assertEqual(ingest(self.publication), (1, 1))
+        self.assertEqual(Document.objects.filter(publication=self.publication).count(), 2)
+        self.assertTrue(Document.objects.filter(text__contains='Revised').exists())
+        self.assertFalse(Document.objects.filter(text__contains='Hydrodynamics').exists())
+
+    def test_schedule(self):
+        with self.settings(PUBLICATIONS_EXTRACT_TEXT=True):
+            self.publication.save()
+
+        # changes are only seen by the worker once they have been committed
+        self.assertEqual(documents._local.__dict__.pop('pending'), set([self.publication.pk]))
+
+    def test_extract_pdf_text(self):
+        stdout = StringIO()
+        call_command('extract_pdf_text', stdout=stdout)
+        self.assertIn('Extracted the text of 1 files, 0 unchanged', stdout.getvalue())
+
+        stdout = StringIO()
+        call_command('extract_pdf_text', stdout=stdout)
+        self.assertIn('Extracted the text of 0 files, 1 unchanged', stdout.getvalue())
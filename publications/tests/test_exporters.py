@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from publications.bibtex import parse
+from publications.helpers import unparse
+from publications.importers import import_entries, parse_entries
+from publications.models import List, Publication, Type
+
+
+class ExporterTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        self.lst = List.objects.create(list='Selected', description='Selected')
+
+        journal = Type.objects.get(type='Journal')
+        publication = Publication.objects.create(type=journal, citekey='Berg2014',
+            title=u'Über water', authors=u'J. van der Berg, M. Müller', year=2014, month=3,
+            journal='A journal', volume=3, pages='10--20', keywords='water, power')
+        publication.lists.add(self.lst)
+
+        book = Type.objects.get(type='Book')
+        publication = Publication.objects.create(type=book, citekey='Doe2013',
+            title='A book', authors='J. Doe', year=2013, publisher='A publisher')
+        publication.lists.add(self.lst)
+
+    def export(self, format):
+        response = self.client.get('/publications/list/selected/?' + format)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8'), response['Content-Type']
+
+    def test_bibtex(self):
+        content, content_type = self.export('bibtex')
+        self.assertTrue(content_type.startswith('text/x-bibtex'))
+        self.assertIn('@article{Berg2014,', content)
+        self.assertIn('@book{Doe2013,', content)
+        self.assertIn(u'author = "J. van der Berg and M. M{\\"u}ller"', content)
+        self.assertIn(u'title = "{\\"U}ber water"', content)
+
+        # the export can be imported again
+        entries = parse(content)
+        self.assertEqual(entries[0]['author'], u'J. van der Berg and M. Müller')
+        self.assertEqual(entries[0]['title'], u'Über water')
+
+    def test_bibtex_roundtrip(self):
+        bib = u"""
+            @inproceedings{Roe2015,
+              author = {Roe, Jane},
+              title = {A title},
+              booktitle = {Proceedings},
+              year = {2015},
+              eprint = {1501.00001},
+              archiveprefix = {arXiv}
+            }
+        """
+
+        count, errors = import_entries(*parse_entries(bib))
+        self.assertEqual(count, 1)
+        publication = Publication.objects.get(citekey='Roe2015')
+        self.assertEqual(publication.book_title, 'Proceedings')
+        self.assertEqual(publication.extra_fields, {'eprint': '1501.00001', 'archiveprefix': 'arXiv'})
+
+        response = self.client.get('/publications/%d/?bibtex' % publication.pk)
+        entry = parse(b''.join(response.streaming_content).decode('utf-8'))[0]
+        self.assertEqual(entry['booktitle'], 'Proceedings')
+        self.assertEqual(entry['eprint'], '1501.00001')
+        self.assertEqual(entry['archiveprefix'], 'arXiv')
+
+        # BibTex shown on the page of a publication is escaped
+        publication.title = '<script>alert(1)</script>'
+        publication.save()
+        response = self.client.get('/publications/%d/' % publication.pk)
+        self.assertNotIn(b'<script>alert', response.content)
+
+    def test_malformed_extra(self):
+        publication = Publication.objects.get(citekey='Berg2014')
+        publication.extra = '{"eprint": '
+        with self.assertRaises(ValidationError) as context:
+            publication.full_clean()
+        self.assertIn('extra', context.exception.message_dict)
+        publication.save()
+
+        self.assertEqual(publication.extra_fields, {})
+        response = self.client.get('/publications/%d/?bibtex' % publication.pk)
+        self.assertEqual(parse(b''.join(response.streaming_content).decode('utf-8'))[0]['key'],
+            'Berg2014')
+
+    def test_bibtex_braced_authors(self):
+        publication = Publication.objects.create(type=Type.objects.get(type='Book'),
+            citekey='Consortium2015', title='A report', authors='{The Consortium}', year=2015)
+        response = self.client.get('/publications/%d/?bibtex' % publication.pk)
+        self.assertIn(b'author = "{The Consortium}"', b''.join(response.streaming_content))
+
+    def test_unparse(self):
+        entry = {'type': 'article', 'key': 'Doe2000', 'author': 'J. Doe', 'year': '2000',
+            'title': 'A "quoted" title', 'note': 'An {unbalanced note', 'journal': ''}
+        bib = unparse([entry])
+        self.assertEqual(entry['type'], 'article')
+        self.assertEqual(entry['key'], 'Doe2000')
+        self.assertIn('title = {A "quoted" title}', bib)
+        self.assertIn('note = "An unbalanced note"', bib)
+        self.assertIn('year = 2000', bib)
+        self.assertNotIn('journal', bib)
+
+        entries = parse(bib)
+        self.assertEqual(entries[0]['title'], 'A "quoted" title')
+        self.assertEqual(entries[0]['author'], 'J. Doe')
+
+    def test_ascii(self):
+        content, content_type = self.export('ascii')
+        self.assertIn(u'J. van der Berg and M. Müller. Über water. A journal,', content)
+
+    def test_rss(self):
+        content, content_type = self.export('rss')
+        self.assertIn('<title>Publications</title>', content)
+        self.assertIn('<link>http://testserver/publications/%d/</link>'
+            % Publication.objects.get(citekey='Doe2013').pk, content)
+        self.assertTrue(content.strip().endswith('</rss>'))
+
+    def test_csl_json(self):
+        content, content_type = self.export('csl-json')
+        items = json.loads(content)
+        self.assertEqual([item['id'] for item in items], ['Berg2014', 'Doe2013'])
+        self.assertEqual(items[0]['type'], 'article-journal')
+        self.assertEqual(items[0]['author'][0], {
+            'family': 'Berg', 'given': 'J.', 'non-dropping-particle': 'van der'})
+        self.assertEqual(items[0]['issued'], {'date-parts': [[2014, 3]]})
+        self.assertEqual(items[1]['type'], 'book')
+
+    def test_ris(self):
+        content, content_type = self.export('ris')
+        records = content.split('ER  - \r\n')[:-1]
+        self.assertEqual(len(records), 2)
+        self.assertTrue(records[0].startswith('TY  - JOUR\r\n'))
+        self.assertIn(u'AU  - M. Müller\r\n', records[0])
+        self.assertIn('SP  - 10\r\nEP  - 20\r\n', records[0])
+        self.assertIn('KW  - power\r\n', records[0])
+
+    def test_endnote(self):
+        from xml.etree import ElementTree
+
+        content, content_type = self.export('endnote')
+        records = ElementTree.fromstring(content.encode('utf-8')).findall('records/record')
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].find('ref-type').text, '17')
+        self.assertEqual(records[1].find('titles/title').text, 'A book')
@@ -115,3 +115,19 @@ class ImportBibtexTests(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn('bibliography', form.errors.keys())
         self.assertIn('upload', form.errors.keys())
+
+    def test_import_bibliography_verbatim_fields(self):
+        form = self.bib_form(r"""
+@online{Tilde2014,
+title = {M{\"u}ller's Homepage},
+author = {M{\"u}ller, Hans},
+year = {2014},
+url = {http://host/\~user},
+doi = {10.1000/\~tilde}
+}
+""")
+        self.assertTrue(form.is_valid())
+        p = Publication.objects.get(citekey='Tilde2014')
+        self.assertEqual(p.title, u"M\xfcller's Homepage")
+        self.assertEqual(p.url, r'http://host/\~user')
+        self.assertEqual(p.doi, r'10.1000/\~tilde')
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import six
+from publications.forms import ImportBibtexForm
+from publications.importers import import_entries, parse_entries, sync_entries
+from publications.models import Publication, Type
+
+
+ris = u"""TY  - JOUR
+AU  - Swyngedouw, Erik
+AU  - Kaika, Maria
+TI  - Fetishizing the modern city
+JO  - International Journal of Urban and Regional Research
+PY  - 2000/03/01
+VL  - 24
+IS  - 1
+SP  - 120
+EP  - 138
+KW  - water
+KW  - cities
+ID  - Kaika2000
+ER  - 
+
+TY  - BOOK
+AU  - Müller, Jürgen
+TI  - Ein Buch
+PY  - 2004
+PB  - Oxford University Press
+ER  - 
+"""
+
+csl = u"""[
+  {"id": "Kaika2000", "type": "article-journal", "title": "Fetishizing the modern city",
+   "author": [{"family": "Kaika", "given": "Maria"}, {"family": "Berg", "given": "J.", "non-dropping-particle": "van der"}],
+   "container-title": "International Journal of Urban and Regional Research",
+   "issued": {"date-parts": [[2000, 3]]}, "volume": 24, "page": "120-138"},
+  {"id": "Swyngedouw2004", "type": "book", "title": "Social Power and the Urbanization of Water",
+   "author": [{"family": "Swyngedouw", "given": "Erik"}], "issued": {"date-parts": [[2004]]}}
+]"""
+
+endnote = u"""<?xml version="1.0" encoding="UTF-8"?>
+<xml><records>
+<record><ref-type name="Journal Article">17</ref-type>
+<contributors><authors><author><style>Kaika, Maria</style></author></authors></contributors>
+<titles><title><style>Fetishizing the modern city</style></title>
+<secondary-title>International Journal of Urban and Regional Research</secondary-title></titles>
+<dates><year>2000</year></dates><volume>24</volume><label>Kaika2000</label></record>
+<record><ref-type name="Book">6</ref-type>
+<contributors><authors><author>Swyngedouw, Erik</author></authors></contributors>
+<titles><title>Social Power and the Urbanization of Water</title></titles>
+<dates><year>2004</year></dates></record>
+</records></xml>"""
+
+
+class ImporterTests(TestCase):
+    fixtures = ['commencedata']
+
+    def test_ris(self):
+        entries, duplicates = parse_entries(BytesIO(ris.encode('utf-8')), 'ris')
+        count, errors = import_entries(entries, duplicates, chunk_size=1)
+        self.assertEqual(count, 2)
+
+        publication = Publication.objects.get(citekey='Kaika2000')
+        self.assertEqual(publication.type, Type.objects.get(type='Journal'))
+        self.assertEqual(publication.authors, 'E. Swyngedouw and M. Kaika')
+        self.assertEqual(publication.month, 3)
+        self.assertEqual(publication.pages, '120--138')
+        self.assertEqual(publication.keywords, 'water, cities')
+
+        publication = Publication.objects.get(title='Ein Buch')
+        self.assertEqual(publication.authors, u'J. Müller')
+        self.assertEqual(publication.publisher, 'Oxford University Press')
+
+    def test_csl_json(self):
+        # read in small pieces to exercise incremental decoding
+        class Source(BytesIO):
+            def read(self, size=-1):
+                return BytesIO.read(self, 7)
+
+        entries, duplicates = parse_entries(Source(csl.encode('utf-8')), 'csl-json')
+        count, errors = import_entries(entries, duplicates)
+        self.assertEqual(count, 2)
+
+        publication = Publication.objects.get(citekey='Kaika2000')
+        self.assertEqual(publication.authors, 'M. Kaika and J. van der Berg')
+        self.assertEqual(publication.journal, 'International Journal of Urban and Regional Research')
+        self.assertEqual(publication.volume, 24)
+        self.assertEqual(Publication.objects.get(citekey='Swyngedouw2004').type.type, 'Book')
+
+    def test_endnote(self):
+        entries, duplicates = parse_entries(BytesIO(endnote.encode('utf-8')), 'endnote')
+        count, errors = import_entries(entries, duplicates)
+        self.assertEqual(count, 2)
+        self.assertEqual(Publication.objects.get(citekey='Kaika2000').year, 2000)
+
+    def test_without_key_and_year(self):
+        entries, duplicates = parse_entries(ris.replace('PY  - 2004\n', ''), 'ris')
+        count, errors = import_entries(entries, duplicates)
+        self.assertEqual(count, 2)
+        self.assertEqual(Publication.objects.get(title='Ein Buch').year, None)
+
+    def test_duplicates(self):
+        entries, duplicates = parse_entries(csl.replace('Swyngedouw2004', 'Kaika2000'), 'csl-json')
+        count, errors = import_entries(entries, duplicates, chunk_size=1)
+        self.assertEqual(count, 1)
+        self.assertEqual(errors['not_unique'], ['Kaika2000'])
+
+    def test_form(self):
+        form = ImportBibtexForm({'format': 'ris'},
+            {'upload': SimpleUploadedFile('test.ris', ris.encode('utf-8'))})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.number_pubs_saved, 2)
+
+        form = ImportBibtexForm({'format': 'endnote', 'bibliography': endnote[:200]})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(Publication.objects.count(), 2)
+
+    def test_form_keyless_duplicate(self):
+        self.assertTrue(ImportBibtexForm({'format': 'ris', 'bibliography': ris}).is_valid())
+
+        # entries without a key are reported by their title
+        form = ImportBibtexForm({'format': 'ris', 'bibliography': ris})
+        self.assertFalse(form.is_valid())
+        self.assertIn('Ein Buch', six.text_type(form.errors))
+        self.assertEqual(Publication.objects.count(), 2)
+
+    def test_roundtrip(self):
+        entries, duplicates = parse_entries(ris, 'ris')
+        import_entries(entries, duplicates)
+
+        for format in ('ris', 'csl-json', 'endnote'):
+            content = b''.join(self.client.get('/publications/?' + format).streaming_content)
+            Publication.objects.all().delete()
+
+            entries, duplicates = parse_entries(BytesIO(content), format)
+            count, errors = import_entries(entries, duplicates)
+            self.assertEqual(count, 2, format)
+            self.assertEqual(Publication.objects.get(citekey='Kaika2000').authors,
+                'E. Swyngedouw and M. Kaika', format)
+
+    def test_sync(self):
+        entries, duplicates = parse_entries(ris, 'ris')
+        created, modified, unchanged, errors = sync_entries(entries, 'feed.ris', duplicates)
+        self.assertEqual((created, modified, unchanged), (2, 0, 0))
+
+        publication = Publication.objects.get(citekey='Kaika2000')
+        self.assertEqual((publication.source, publication.source_key), ('feed.ris', 'Kaika2000'))
+        self.assertEqual(publication.content_hash, publication.get_content_hash())
+
+        # entries without a key cannot be matched and are skipped as duplicates
+        entries, duplicates = parse_entries(ris.replace('VL  - 24', 'VL  - 25'), 'ris')
+        created, modified, unchanged, errors = sync_entries(entries, 'feed.ris', duplicates)
+        self.assertEqual((created, modified, unchanged), (0, 1, 0))
+        self.assertEqual(len(errors['not_unique_created']), 1)
+        self.assertEqual(Publication.objects.get(citekey='Kaika2000').volume, 25)
+
+        # unchanged entries are found by their hashes and not written; apart
+        # from a savepoint, only hashes and types are read
+        entries, duplicates = parse_entries(ris.replace('VL  - 24', 'VL  - 25'), 'ris')
+        entries = [entry for entry in entries if entry.get('key')]
+        with self.assertNumQueries(4):
+            self.assertEqual(sync_entries(entries, 'feed.ris', duplicates)[:3], (0, 0, 1))
+
+        # publications imported without a source are taken over
+        Publication.objects.update(source='', source_key='')
+        self.assertEqual(sync_entries(entries, 'feed.ris', duplicates)[:3], (0, 1, 0))
+        self.assertEqual(sync_entries(entries, 'feed.ris', duplicates)[:3], (0, 0, 1))
+        self.assertEqual(Publication.objects.filter(source='feed.ris').count(), 1)
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from publications import instrumentation
+from publications.instrumentation import RingBufferSink
+from publications.models import Publication, Type
+
+
+@override_settings(
+    PUBLICATIONS_INSTRUMENTATION=True,
+    PUBLICATIONS_INSTRUMENTATION_SINKS=('publications.instrumentation.RingBufferSink',),
+    MIDDLEWARE_CLASSES=settings.MIDDLEWARE_CLASSES
+        + ('publications.instrumentation.InstrumentationMiddleware',))
+class InstrumentationTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        cache.clear()
+        instrumentation._sinks = None
+        RingBufferSink.buffer.clear()
+
+        journal = Type.objects.get(type='Journal')
+        for i in range(3):
+            Publication.objects.create(type=journal, citekey='Doe200%d' % i,
+                title='Title %d' % i, authors='J. Doe', year=2000 + i)
+
+    def tearDown(self):
+        instrumentation._sinks = None
+
+    def test_page(self):
+        response = self.client.get('/publications/')
+        self.assertEqual(response.status_code, 200)
+
+        record = RingBufferSink.records()[-1]
+        self.assertEqual(record['view'], 'publications.views.year.year')
+        self.assertTrue(record['queries'] > 0)
+        self.assertTrue(record['rows'] >= 3)
+        self.assertTrue(record['render_time'] > 0)
+        self.assertIn('rows;desc="%d"' % record['rows'], response['Server-Timing'])
+        self.assertEqual(instrumentation.current(), None)
+
+    def test_export(self):
+        response = self.client.get('/publications/?bibtex')
+        self.assertFalse(RingBufferSink.records())
+
+        # exports are measured while they are streamed
+        content = b''.join(response.streaming_content)
+        self.assertIn(b'Doe2000', content)
+
+        record = RingBufferSink.records()[-1]
+        self.assertTrue(record['queries'] > 0)
+        self.assertTrue(record['rows'] >= 3)
+        self.assertTrue(record['render_time'] > 0)
+        self.assertEqual(instrumentation.current(), None)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+from django.test import SimpleTestCase
+from publications.latex import ACCENTED, SYMBOLS, decode, encode
+
+
+class LatexTests(SimpleTestCase):
+    def test_decode(self):
+        for tex, text in [
+                (u'G\\"odel', u'Gödel'),
+                (u'G\\"{o}del', u'Gödel'),
+                (u'G{\\"o}del', u'Gödel'),
+                (u'G{\\"{o}}del', u'Gödel'),
+                (u"\\'{e}cole", u'école'),
+                (u"{\\'\\i}", u'í'),
+                (u'Fran\\c{c}ois', u'François'),
+                (u'{\\c C}a va', u'Ça va'),
+                (u'Ha\\v{s}ek', u'Hašek'),
+                (u'Erd{\\H o}s', u'Erdős'),
+                (u'Espa\\~na', u'España'),
+                (u'\\AA ngstr\\"om', u'Ångström'),
+                (u'Stra\\ss e', u'Straße'),
+                (u'{\\o}', u'ø'),
+                (u'\\oe uvre', u'œuvre'),
+                (u'Tom \\& Jerry', u'Tom & Jerry')]:
+            self.assertEqual(decode(tex), text)
+
+    def test_unknown(self):
+        # commands other than accents and symbols are left alone
+        for tex in [u'\\textbf{bold}', u'\\ref{x}', u'\\url{y}', u'$\\alpha$', u'\\{braces\\}']:
+            self.assertEqual(decode(tex), tex)
+
+    def test_encode(self):
+        self.assertEqual(encode(u'Erdős & Gödel'), u'Erd{\\H{o}}s \\& G{\\"o}del')
+
+        for char in set(ACCENTED.values()) | set(SYMBOLS.values()):
+            self.assertEqual(decode(encode(char)), char)
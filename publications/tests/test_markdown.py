@@ -0,0 +1,68 @@
+import markdown
+
+from django.core.cache import cache
+from django.test import TestCase
+from publications.markdown_extensions import CitationExtension
+from publications.models import Publication, Type
+
+
+class CitationTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        cache.clear()
+        journal = Type.objects.get(type='Journal')
+        for citekey, title, authors, year in [
+                ('Doe2000a', 'Water waves', 'John Doe', 2000),
+                ('Doe2000b', 'Ocean currents', 'John Doe', 2000),
+                ('Roe2001', 'Tides', 'Jane Roe and John Doe', 2001)]:
+            Publication.objects.create(type=journal, citekey=citekey, title=title,
+                authors=authors, year=year, journal='Journal')
+
+    def convert(self, text, **config):
+        md = markdown.Markdown(extensions=['markdown.extensions.footnotes', CitationExtension(**config)])
+        return md.convert(text), md
+
+    def test_footnote(self):
+        html, md = self.convert('Waves [@Doe2000a] and tides [@Roe2001].')
+        self.assertIn('Water waves', html)
+        self.assertIn('Tides', html)
+        self.assertEqual(html.count('class="footnote-ref"'), 2)
+        self.assertEqual(md.missing_citations, [])
+
+    def test_numeric(self):
+        html, _ = self.convert('Tides [@Roe2001], waves [@Doe2000a] and tides again [@Roe2001].',
+            labels='numeric')
+
+        # repeated citations keep their number
+        self.assertEqual(html.count('>[1]</a>'), 2)
+        self.assertEqual(html.count('>[2]</a>'), 1)
+        self.assertEqual(html.count('<div class="references">'), 1)
+        self.assertTrue(html.index('id="ref-Roe2001"') < html.index('id="ref-Doe2000a"'))
+
+    def test_author_year(self):
+        html, _ = self.convert('Currents [@Doe2000b], waves [@Doe2000a] and tides [@Roe2001].',
+            labels='author-year', bibliography=False)
+
+        # works of the same author and year get suffixes in the order they are cited
+        self.assertIn('Currents <span class="citation">(Doe, 2000a)</span>', html)
+        self.assertIn('waves <span class="citation">(Doe, 2000b)</span>', html)
+        self.assertIn('(Roe and Doe, 2001)', html)
+        self.assertNotIn('references', html)
+
+    def test_unknown_citekey(self):
+        html, md = self.convert('Waves [@Doe2000a] and [@Unknown1999].', labels='numeric')
+        self.assertIn('<span class="citation-missing" title="Unknown citekey">[@Unknown1999?]</span>', html)
+        self.assertEqual(md.missing_citations, ['Unknown1999'])
+        self.assertIn('>[1]</a>', html)
+
+    def test_queries(self):
+        # one query for the publications and one for their style templates,
+        # independent of the number of citations
+        with self.assertNumQueries(2):
+            html, _ = self.convert('[@Doe2000a] [@Doe2000b] [@Roe2001] [@Doe2000a]')
+        self.assertIn('Ocean currents', html)
+
+        # formatted citations are cached
+        with self.assertNumQueries(0):
+            self.convert('[@Doe2000a] [@Roe2001]')
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import Template
+from django.template.response import TemplateResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
+from publications import routers
+from publications.models import List, Publication
+from publications.routers import ReplicaRouter, replica, use_replica
+
+
+class RouterTests(TestCase):
+    fixtures = ['commencedata']
+
+    def test_router(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Publication), None)
+
+        with use_replica('replica'):
+            self.assertEqual(router.db_for_read(Publication), 'replica')
+            self.assertEqual(router.db_for_read(List), 'replica')
+            with use_replica('other'):
+                self.assertEqual(router.db_for_read(Publication), 'other')
+            self.assertEqual(router.db_for_read(Publication), 'replica')
+
+            # writes and other apps are not routed to the replica
+            self.assertEqual(router.db_for_write(Publication), 'default')
+            self.assertEqual(router.db_for_read(User), None)
+
+        self.assertEqual(router.db_for_read(Publication), None)
+
+    @override_settings(PUBLICATIONS_REPLICA_DATABASE='replica')
+    def test_replica(self):
+        aliases = []
+
+        @replica
+        def view(request):
+            aliases.append(routers.current())
+            return HttpResponse()
+
+        @replica
+        def export(request):
+            def stream():
+                for i in range(2):
+                    aliases.append(routers.current())
+                    yield b''
+            return StreamingHttpResponse(stream())
+
+        view(None)
+        self.assertEqual(aliases, ['replica'])
+        self.assertEqual(routers.current(), None)
+
+        @replica
+        def page(request):
+            return TemplateResponse(request, Template('{{ alias }}'), {'alias': routers.current})
+
+        # templates are rendered by the handler, but still read from the replica
+        response = page(RequestFactory().get('/'))
+        self.assertFalse(response.is_rendered)
+        self.assertEqual(response.render().content, b'replica')
+        self.assertEqual(routers.current(), None)
+
+        response = export(None)
+        self.assertEqual(routers.current(), None)
+        list(response.streaming_content)
+        self.assertEqual(aliases, ['replica'] * 3)
+
+    def test_replica_disabled(self):
+        response = self.client.get('/publications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(routers.current(), None)
@@ -0,0 +1,67 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from publications.helpers import index_publications
+from publications import snapshot
+from publications.models import CustomLink, List, Publication, Type
+from publications.snapshot import get_snapshot
+
+
+@override_settings(PUBLICATIONS_SNAPSHOT=True)
+class SnapshotTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        cache.clear()
+        snapshot._snapshot = None
+        self.lst = List.objects.create(list='Selected', description='Selected')
+
+        journal = Type.objects.get(type='Journal')
+        for i in range(3):
+            publication = Publication.objects.create(type=journal, citekey='Doe200%d' % i,
+                title='Title %d' % i, authors=u'J. Doe, M. M\xfcller', year=2000 + i,
+                keywords='water, power' if i else 'water', external=i == 2)
+            index_publications([publication])
+            if i:
+                publication.lists.add(self.lst)
+        CustomLink.objects.create(publication=publication, description='Slides',
+            url='http://example.com/slides')
+
+    def citekeys(self, publications):
+        return [publication.citekey for publication in publications]
+
+    def test_snapshot(self):
+        current = get_snapshot()
+        self.assertIs(get_snapshot(), current)
+
+        self.assertEqual(self.citekeys(current.year()), ['Doe2001', 'Doe2000'])
+        self.assertEqual(self.citekeys(current.year('2001')), ['Doe2001'])
+        self.assertEqual(self.citekeys(current.keyword('power')), ['Doe2001'])
+        self.assertEqual(self.citekeys(current.author('maria+mueller')),
+            ['Doe2002', 'Doe2001', 'Doe2000'])
+        self.assertEqual(self.citekeys(current.list('selected')[1]), ['Doe2002', 'Doe2001'])
+        self.assertEqual(current.list('missing'), (None, ()))
+
+        # publications hold their links, but no caches of related querysets
+        publication = current.list('selected')[1][0]
+        self.assertEqual([link.description for link in publication.links], ['Slides'])
+        self.assertFalse(hasattr(publication, '_prefetched_objects_cache'))
+
+        # changes replace the snapshot
+        Publication.objects.filter(citekey='Doe2000').delete()
+        self.assertIsNot(get_snapshot(), current)
+        self.assertEqual(self.citekeys(get_snapshot().year()), ['Doe2001'])
+
+    def test_views(self):
+        response = self.client.get('/publications/')
+        self.assertContains(response, 'Title 1')
+        self.assertNotContains(response, 'Title 2')
+
+        with self.assertNumQueries(0):
+            self.client.get('/publications/year/2001/')
+            self.client.get('/publications/tag/power/')
+            self.client.get('/publications/list/selected/')
+
+        self.assertContains(self.client.get('/publications/list/selected/'), 'Slides')
+        self.assertContains(self.client.get('/publications/j.+doe/'), 'Title 2')
+        self.assertEqual(self.client.get('/publications/list/missing/').status_code, 404)
@@ -0,0 +1,42 @@
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.six import StringIO
+from publications.models import Style, StyleTemplate, Type
+
+
+class StyleTemplateTests(TestCase):
+    fixtures = ['commencedata']
+
+    def test_style_save(self):
+        types = Type.objects.count()
+
+        # the templates of all types are created with a single query
+        with self.assertNumQueries(5):
+            style = Style.objects.create(name='Nature')
+        self.assertEqual(StyleTemplate.objects.filter(style=style).count(), types)
+
+        # saving an existing style creates no templates
+        style.save()
+        self.assertEqual(StyleTemplate.objects.filter(style=style).count(), types)
+
+    def test_type_save(self):
+        styles = Style.objects.count()
+        self.assertTrue(styles)
+
+        type = Type.objects.create(type='Preprint', description='Preprint', order=100)
+        self.assertEqual(StyleTemplate.objects.filter(bibtype=type).count(), styles)
+
+    def test_sync_style_templates(self):
+        style = Style.objects.create(name='Nature')
+        StyleTemplate.objects.filter(style=style).delete()
+        missing = Style.objects.count() * Type.objects.count() - StyleTemplate.objects.count()
+
+        stdout = StringIO()
+        with self.assertNumQueries(3):
+            call_command('sync_style_templates', stdout=stdout)
+        self.assertEqual(stdout.getvalue().strip(), 'Created %d style templates.' % missing)
+        self.assertEqual(StyleTemplate.objects.filter(style=style).count(), Type.objects.count())
+
+        stdout = StringIO()
+        call_command('sync_style_templates', stdout=stdout)
+        self.assertEqual(stdout.getvalue().strip(), 'Created 0 style templates.')
@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
+from django.template import Template, RequestContext
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from publications.models import List, Publication, Type
+
+
+class PublicationTagTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().get('/')
+        self.list = List.objects.create(list='Selected', description='Selected papers')
+        self.publications = []
+        for i in range(3):
+            publication = Publication.objects.create(
+                type=Type.objects.get(pk=1),
+                citekey='Doe200%d' % i,
+                title='Publication number %d' % i,
+                authors='John Doe',
+                year=2000 + i,
+                journal='Journal')
+            publication.lists.add(self.list)
+            self.publications.append(publication)
+
+    def render(self, source):
+        template = Template('{% load publication_extras %}' + source)
+        with CaptureQueriesContext(connection) as queries:
+            html = template.render(RequestContext(self.request, {'request': self.request}))
+        return html, len(queries)
+
+    def test_get_publication(self):
+        html, _ = self.render('{%% get_publication %d %%}' % self.publications[0].pk)
+        self.assertIn('Publication number 0', html)
+
+    def test_get_publication_missing(self):
+        html, _ = self.render('{% get_publication 1000 %}')
+        self.assertEqual(html, '')
+
+    def test_get_publication_batched(self):
+        self.render('{%% get_publication %d %%}' % self.publications[0].pk)
+        cache.clear()
+
+        _, single = self.render('{%% get_publication %d %%}' % self.publications[1].pk)
+        cache.clear()
+
+        html, multiple = self.render(''.join('{%% get_publication %d %%}' % p.pk
+            for p in self.publications))
+        for i in range(3):
+            self.assertIn('Publication number %d' % i, html)
+        self.assertEqual(single, multiple)
+
+    def test_get_publication_cached(self):
+        source = '{%% get_publication %d %%}' % self.publications[0].pk
+        html, _ = self.render(source)
+        cached, queries = self.render(source)
+        self.assertEqual(html, cached)
+        self.assertLessEqual(queries, 1)
+
+    def test_cache_invalidated(self):
+        source = '{%% get_publication %d %%}' % self.publications[0].pk
+        self.render(source)
+        self.publications[0].title = 'Changed title'
+        self.publications[0].save()
+        html, _ = self.render(source)
+        self.assertIn('Changed title', html)
+
+    def test_get_publication_list(self):
+        html, _ = self.render('{% get_publication_list "selected" %}')
+        for i in range(3):
+            self.assertIn('Publication number %d' % i, html)
+        self.assertLess(html.index('number 2'), html.index('number 0'))
+
+    def test_get_publication_list_missing(self):
+        html, _ = self.render('{% get_publication_list "unknown" %}')
+        self.assertEqual(html, '')
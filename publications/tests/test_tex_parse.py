@@ -0,0 +1,51 @@
+import random
+from re import sub
+from django.test import SimpleTestCase
+from django.utils.html import escape
+from publications.templatetags.publication_extras import GREEK_LETTERS, tex_parse
+
+
+def legacy_tex_parse(string):
+    """
+    The nested implementation tex_parse has to reproduce.
+    """
+
+    string = string.replace('{', '').replace('}', '')
+    def tex_replace(match):
+        return \
+            sub(r'\^(\w)', r'<sup>\1</sup>',
+            sub(r'\^\{(.*?)\}', r'<sup>\1</sup>',
+            sub(r'\_(\w)', r'<sub>\1</sub>',
+            sub(r'\_\{(.*?)\}', r'<sub>\1</sub>',
+            sub(r'\\(' + GREEK_LETTERS + ')', r'&\1;', match.group(1))))))
+    return sub(r'\$([^\$]*)\$', tex_replace, escape(string))
+
+
+class TexParseTests(SimpleTestCase):
+    titles = [
+        'Plain title without math',
+        'On $\\alpha$-stable distributions',
+        'Estimating $L_2$ and $L_{\\infty}$ norms',
+        'The $x^2$ and $x^{10}$ cases',
+        'Greek $\\Omega\\beta\\eta_1^2$ letters',
+        'Odd $^_x$ and $__y$ scripts',
+        'Unbalanced $a_b dollars',
+        'Escaping <b>tags</b> & "quotes" in $a<b$',
+        '{Braced} {$\\mu$} title',
+    ]
+
+    def test_known_titles(self):
+        for title in self.titles:
+            self.assertEqual(tex_parse(title), legacy_tex_parse(title))
+
+    def test_random_titles(self):
+        tokens = ['$', '_', '^', '{', '}', '\\', 'a', '1', 'alpha', 'eta', 'Pi', ' ', '&', '<']
+        rng = random.Random(0)
+        for _ in range(5000):
+            title = ''.join(rng.choice(tokens) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(tex_parse(title), legacy_tex_parse(title))
+
+    def test_cached_result_is_safe(self):
+        title = 'Cached $\\alpha$ title'
+        self.assertIs(tex_parse(title), tex_parse(title))
+        self.assertTrue(hasattr(tex_parse(title), '__html__'))
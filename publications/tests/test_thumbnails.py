@@ -0,0 +1,85 @@
+import shutil
+import tempfile
+
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+from PIL import Image
+from publications import thumbnails
+from publications.models import Publication, Type
+from publications.templatetags.publication_extras import thumbnail_url
+
+
+class ThumbnailTests(TestCase):
+    fixtures = ['commencedata']
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL='/media/')
+        self.override.enable()
+
+        stream = BytesIO()
+        Image.new('RGBA', (640, 480), (255, 0, 0, 128)).save(stream, 'PNG')
+        self.publication = Publication.objects.create(type=Type.objects.get(type='Journal'),
+            citekey='Doe2000', title='A title', authors='J. Doe', year=2000,
+            image=SimpleUploadedFile('figure.png', stream.getvalue()))
+        thumbnails.wait()
+
+    def tearDown(self):
+        cache.clear()
+        self.override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_generate(self):
+        source = self.publication.image.name
+        names = [thumbnails.get_name(source, size) for size in sorted(thumbnails.SIZES)]
+        self.assertEqual(thumbnails.generate(source), names)
+
+        for name, size in zip(names, sorted(thumbnails.SIZES)):
+            image = Image.open(default_storage.path(name))
+            self.assertEqual(image.size, thumbnails.SIZES[size])
+            self.assertEqual(image.format, thumbnails.FORMAT)
+
+        # names only depend on the uploaded file and the settings
+        self.assertEqual(thumbnails.get_name(source, 'small'), names[sorted(thumbnails.SIZES).index('small')])
+        self.assertNotEqual(thumbnails.get_name('publications/images/other.png', 'small'),
+            thumbnails.get_name(source, 'small'))
+
+    def test_thumbnail_url(self):
+        url = thumbnail_url(self.publication)
+        self.assertTrue(url.startswith('/publications/thumbnails/'))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertEqual(Image.open(BytesIO(b''.join(response.streaming_content))).size, (100, 100))
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        # rendered thumbnails are remembered without asking the storage
+        name = thumbnails.get_name(self.publication.image.name, 'small')
+        default_storage.delete(name)
+        self.assertEqual(thumbnail_url(self.publication), url)
+
+        # until thumbnails have been rendered, the uploaded file is used
+        cache.delete(thumbnails.get_cache_key(name))
+        self.assertEqual(thumbnail_url(self.publication), '/media/' + self.publication.image.name)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_generate_thumbnails(self):
+        name = thumbnails.get_name(self.publication.image.name, 'small')
+        default_storage.delete(name)
+
+        stdout = StringIO()
+        call_command('generate_thumbnails', processes=1, stdout=stdout)
+        self.assertTrue(default_storage.exists(name))
+        self.assertIn('1 images, 0 failed', stdout.getvalue())
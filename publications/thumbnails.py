@@ -0,0 +1,173 @@
+"""
+Thumbnails of the images of publications.
+
+Whenever a publication with an image or a thumbnail is saved, a background
+thread renders the image in every size of C{PUBLICATIONS_THUMBNAIL_SIZES}.
+The names of the rendered files only depend on the uploaded file and the
+settings, so that they never change their content and can be cached forever.
+"""
+
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import posixpath
+
+from contextlib import closing
+from hashlib import sha1
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.urlresolvers import reverse
+from PIL import Image, ImageOps
+from publications.workers import Worker
+
+# names and dimensions of rendered thumbnails
+SIZES = getattr(settings, 'PUBLICATIONS_THUMBNAIL_SIZES', {'small': (100, 100), 'large': (400, 400)})
+
+# image format and quality of rendered thumbnails, e.g. JPEG or WEBP
+FORMAT = getattr(settings, 'PUBLICATIONS_THUMBNAIL_FORMAT', 'JPEG').upper()
+QUALITY = getattr(settings, 'PUBLICATIONS_THUMBNAIL_QUALITY', 85)
+
+# directory of rendered thumbnails within the storage
+DIRECTORY = 'publications/derivatives/'
+
+# how long a thumbnail is known to be missing, in seconds
+MISSING_TIMEOUT = 60
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+CONTENT_TYPES = {'jpg': 'image/jpeg', 'png': 'image/png', 'webp': 'image/webp'}
+
+
+def get_source(publication):
+    """
+    Returns the name of the uploaded file thumbnails of a publication are
+    rendered from, preferring its thumbnail over its image.
+    """
+
+    for field in (publication.thumbnail, publication.image):
+        if field:
+            return field.name
+    return None
+
+
+def get_name(source, size):
+    """
+    Returns the name of the thumbnail of an uploaded file in a size.
+    """
+
+    width, height = SIZES[size]
+    digest = sha1(('%s:%dx%d:%s:%d' % (source, width, height, FORMAT, QUALITY)).encode('utf-8'))
+    return '%s%s_%dx%d.%s' % (DIRECTORY, digest.hexdigest()[:20], width, height,
+        EXTENSIONS.get(FORMAT, FORMAT.lower()))
+
+
+def get_cache_key(name):
+    # names never change their content, so the key does not depend on the data version
+    return 'publications:thumbnail:%s' % name
+
+
+def exists(name):
+    """
+    Returns true if a thumbnail has been rendered. Rendered thumbnails are
+    remembered in the cache, so that pages do not ask a possibly remote
+    storage about every thumbnail they show.
+    """
+
+    key = get_cache_key(name)
+    rendered = cache.get(key)
+    if rendered is None:
+        rendered = default_storage.exists(name)
+        cache.set(key, rendered, None if rendered else MISSING_TIMEOUT)
+    return rendered
+
+
+def render(image, width, height):
+    """
+    Scales and crops an image to the given dimensions and returns the encoded
+    thumbnail.
+    """
+
+    if image.mode in ('RGBA', 'LA', 'P') and FORMAT == 'JPEG':
+        # JPEG has no transparency, so transparent images are put on white
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[3])
+        image = background
+    elif image.mode not in ('RGB', 'RGBA', 'L'):
+        image = image.convert('RGBA' if image.mode in ('LA', 'P') else 'RGB')
+
+    image = ImageOps.fit(image, (width, height), Image.ANTIALIAS)
+
+    stream = BytesIO()
+    image.save(stream, FORMAT, quality=QUALITY)
+    return stream.getvalue()
+
+
+def generate(source, force=False):
+    """
+    Renders the thumbnails of an uploaded file which do not exist yet, or all
+    of them if C{force} is set, and returns their names.
+    """
+
+    names = []
+    image = None
+    for size in sorted(SIZES):
+        name = get_name(source, size)
+        names.append(name)
+        if default_storage.exists(name):
+            if not force:
+                cache.set(get_cache_key(name), True, None)
+                continue
+            default_storage.delete(name)
+
+        if image is None:
+            with closing(default_storage.open(source)) as handle:
+                image = Image.open(handle)
+                image.load()
+
+        saved = default_storage.save(name, ContentFile(render(image, *SIZES[size])))
+        if saved != name:
+            # another process has rendered the same thumbnail in the meantime
+            default_storage.delete(saved)
+        cache.set(get_cache_key(name), True, None)
+    return names
+
+
+worker = Worker('publications.thumbnails', generate)
+
+
+def schedule(source):
+    """
+    Renders the thumbnails of an uploaded file in a background thread.
+    """
+
+    if SIZES:
+        worker.schedule(source)
+
+
+def wait():
+    """
+    Blocks until all scheduled thumbnails have been rendered.
+    """
+
+    worker.wait()
+
+
+def get_url(publication, size):
+    """
+    Returns the URL of a thumbnail of a publication, or of the uploaded file if
+    the thumbnail has not been rendered yet.
+    """
+
+    source = get_source(publication)
+    if source is None:
+        return ''
+    if size in SIZES:
+        name = get_name(source, size)
+        if exists(name):
+            return reverse('publications.views.thumbnail', args=[posixpath.basename(name)])
+    return default_storage.url(source)
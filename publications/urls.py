@@ -13,5 +13,13 @@ urlpatterns = patterns('',
 	(r'^year/(?P<year>\d+)/$', 'publications.views.year'),
 	(r'^tag/(?P<keyword>.+)/$', 'publications.views.keyword'),
 	(r'^list/(?P<list>.+)/$', 'publications.views.list'),
+	(r'^api/publications/$', 'publications.views.api.publication_list'),
+	(r'^api/publications/bulk/$', 'publications.views.api.bulk'),
+	(r'^api/publications/(?P<publication_id>\d+)/$', 'publications.views.api.publication_detail'),
+	(r'^api/year/(?P<year>\d+)/$', 'publications.views.api.by_year'),
+	(r'^api/tag/(?P<keyword>.+)/$', 'publications.views.api.by_keyword'),
+	(r'^api/list/(?P<list>.+)/$', 'publications.views.api.by_list'),
+	(r'^api/author/(?P<name>.+)/$', 'publications.views.api.by_author'),
+	(r'^thumbnails/(?P<name>[\w-]+\.\w+)$', 'publications.views.thumbnail'),
 	(r'^(?P<name>.+)/$', 'publications.views.person'),
 )
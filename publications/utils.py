@@ -0,0 +1,42 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+
+
+def memoize(maxsize=1024):
+    """
+    Decorator caching the results of a function of hashable arguments. The
+    least recently used results are discarded once C{maxsize} results are
+    stored.
+    """
+
+    def decorator(func):
+        cache = OrderedDict()
+        lock = Lock()
+
+        @wraps(func)
+        def wrapper(*args):
+            with lock:
+                try:
+                    result = cache.pop(args)
+                    cache[args] = result
+                    return result
+                except KeyError:
+                    pass
+
+            result = func(*args)
+
+            with lock:
+                cache[args] = result
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            return result
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
@@ -7,3 +7,4 @@ from .person import person
 from .id import id
 from .keyword import keyword
 from .list import list
+from .thumbnail import thumbnail
@@ -0,0 +1,194 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import json
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import FileField
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET, require_POST
+from publications import six
+from publications.authors import get_publications
+from publications.helpers import parse, upsert_publications_from_entries
+from publications.models import List, Publication
+from publications.routers import replica
+
+# fields used internally for imports and BibTex round trips
+INTERNAL_FIELDS = ('extra', 'content_hash', 'source', 'source_key')
+
+# fields of a publication as returned by the API, mapped to lookups
+FIELDS = [(field.name, 'type__type' if field.name == 'type' else field.name)
+	for field in Publication._meta.fields if field.name not in INTERNAL_FIELDS]
+FILE_FIELDS = [field.name for field in Publication._meta.fields
+	if isinstance(field, FileField)]
+
+# default and maximal number of publications per page
+LIMIT = 100
+MAX_LIMIT = 1000
+
+def json_response(data, status=200):
+	# compact and with stable key order, which compresses well
+	return HttpResponse(
+		json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'), sort_keys=True),
+		content_type='application/json', status=status)
+
+def error(message, status):
+	return json_response({'error': message}, status=status)
+
+def get_fields(request):
+	"""
+	Returns the fields selected by the C{fields} parameter as pairs of names
+	and lookups, or C{None} if unknown fields were requested.
+	"""
+
+	if not request.GET.get('fields'):
+		return FIELDS
+
+	names = request.GET['fields'].split(',')
+	fields = [(name, lookup) for name, lookup in FIELDS if name in names]
+	if len(fields) != len(set(names)):
+		return None
+	return fields
+
+def serialize(rows, fields):
+	for row in rows:
+		publication = dict((name, row[lookup]) for name, lookup in fields)
+		for name in FILE_FIELDS:
+			if publication.get(name):
+				publication[name] = default_storage.url(publication[name])
+		yield publication
+
+def paginate(request, publications, match=None):
+	"""
+	Returns a page of publications ordered by descending id. The C{cursor}
+	parameter is the id of the last publication of the previous page, so that
+	every page is a single indexed query, independent of its offset. If
+	C{match} is given, only publications for which it is true are returned.
+	"""
+
+	fields = get_fields(request)
+	if fields is None:
+		return error('Unknown field.', 400)
+
+	try:
+		limit = min(int(request.GET.get('limit', LIMIT)), MAX_LIMIT)
+		cursor = int(request.GET['cursor']) if request.GET.get('cursor') else None
+	except ValueError:
+		return error('Invalid limit or cursor.', 400)
+	if limit < 1:
+		return error('Invalid limit or cursor.', 400)
+
+	if cursor is not None:
+		publications = publications.filter(id__lt=cursor)
+
+	more = False
+	if match is not None:
+		# one more id than needed tells whether there is a next page
+		ids = matching(publications, match, limit + 1)
+		more = len(ids) > limit
+		publications = Publication.objects.filter(pk__in=ids[:limit])
+
+	lookups = set(lookup for name, lookup in fields) | set(['id'])
+	rows = list(publications.order_by('-id').values(*lookups)[:limit + 1])
+
+	next_url = None
+	if more or len(rows) > limit:
+		rows = rows[:limit]
+		query = request.GET.copy()
+		query['cursor'] = rows[-1]['id']
+		next_url = request.build_absolute_uri(request.path + '?' + query.urlencode())
+
+	return json_response({
+		'results': list(serialize(rows, fields)),
+		'next': next_url,
+	})
+
+def matching(publications, match, limit):
+	"""
+	Returns the ids of the first C{limit} publications, ordered by descending
+	id, for which C{match} is true. Only the columns needed to construct the
+	publications are loaded, and only until enough publications were found.
+	"""
+
+	publications = publications.order_by('-id').only('id', 'title', 'authors', 'keywords')
+	ids = []
+	for publication in publications.iterator():
+		if match(publication):
+			ids.append(publication.id)
+			if len(ids) == limit:
+				break
+	return ids
+
+@require_GET
+@replica
+def publication_list(request):
+	return paginate(request, Publication.objects.filter(external=False, type__hidden=False))
+
+@require_GET
+@replica
+def publication_detail(request, publication_id):
+	fields = get_fields(request)
+	if fields is None:
+		return error('Unknown field.', 400)
+
+	rows = Publication.objects.filter(pk=publication_id) \
+		.values(*set(lookup for name, lookup in fields))
+	if not rows:
+		return error('Publication not found.', 404)
+	return json_response(next(serialize(rows, fields)))
+
+@require_GET
+@replica
+def by_year(request, year):
+	return paginate(request,
+		Publication.objects.filter(year=year, external=False, type__hidden=False))
+
+@require_GET
+@replica
+def by_keyword(request, keyword):
+	keyword = keyword.lower().replace(' ', '+')
+	candidates = Publication.objects.filter(
+		keywords__icontains=keyword.split('+')[0], external=False)
+	return paginate(request, candidates,
+		lambda publication: keyword in [k[1] for k in publication.keywords_escaped()])
+
+@require_GET
+@replica
+def by_list(request, list):
+	lists = List.objects.filter(list__iexact=list)
+	if not lists:
+		return error('List not found.', 404)
+	return paginate(request, Publication.objects.filter(lists=lists[0]))
+
+@require_GET
+@replica
+def by_author(request, name):
+	return paginate(request, get_publications(name))
+
+@require_POST
+def bulk(request):
+	"""
+	Creates or updates the publications of a bibliography in BibTex format
+	posted as the request body. Publications are updated if their citekey
+	matches the key of an entry.
+	"""
+
+	if not (request.user.is_active and request.user.is_staff
+			and request.user.has_perm('publications.add_publication')
+			and request.user.has_perm('publications.change_publication')):
+		return error('Permission denied.', 403)
+
+	entries, duplicates = parse(request.body)
+	if not entries:
+		return error('No valid BibTex entries found.', 400)
+
+	publications, updated, errors = upsert_publications_from_entries(entries, duplicates)
+
+	return json_response({
+		'created': [publication.citekey for publication in publications],
+		'updated': len(updated),
+		'errors': dict((key, [entry if isinstance(entry, six.string_types) else entry.get('key')
+			for entry in value]) for key, value in errors.items()),
+	})
@@ -2,28 +2,25 @@ __license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
 __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
-from django.shortcuts import render_to_response
-from django.template import RequestContext
+from django.template.response import TemplateResponse
+from publications.caching import cache_view
+from publications.exporters import get_exporter
 from publications.models import Type, Publication
+from publications.routers import replica
 
+@cache_view
+@replica
 def id(request, publication_id):
 	publications = Publication.objects.filter(pk=publication_id)
 
-	if 'ascii' in request.GET:
-		return render_to_response('publications/publications.txt', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/plain; charset=UTF-8')
+	exporter = get_exporter(request)
+	if exporter is not None:
+		return exporter.export(request, publications)
 
-	elif 'bibtex' in request.GET:
-		return render_to_response('publications/publications.bib', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/x-bibtex; charset=UTF-8')
+	for publication in publications:
+		publication.links = publication.customlink_set.all()
+		publication.files = publication.customfile_set.all()
 
-	else:
-		for publication in publications:
-			publication.links = publication.customlink_set.all()
-			publication.files = publication.customfile_set.all()
-
-		return render_to_response('publications/id.html', {
-				'publications': publications
-			}, context_instance=RequestContext(request))
+	return TemplateResponse(request, 'publications/id.html', {
+			'publications': publications
+		})
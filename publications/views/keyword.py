@@ -2,35 +2,37 @@ __license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
 __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
-from django.shortcuts import render_to_response
-from django.template import RequestContext
+from django.template.response import TemplateResponse
+from publications import snapshot
+from publications.caching import cache_view
+from publications.exporters import get_exporter
 from publications.models import Type, Publication
+from publications.routers import replica
 
+@cache_view
+@replica
 def keyword(request, keyword):
 	keyword = keyword.lower().replace(' ', '+')
-	candidates = Publication.objects.filter(keywords__icontains=keyword.split('+')[0], external=False)
-	publications = []
-
-	for i, publication in enumerate(candidates):
-		if keyword in [k[1] for k in publication.keywords_escaped()]:
-			publications.append(publication)
+	if snapshot.enabled():
+		publications = snapshot.get_snapshot().keyword(keyword)
+	else:
+		candidates = Publication.objects.filter(keywords__icontains=keyword.split('+')[0], external=False)
+		publications = []
 
-	if 'ascii' in request.GET:
-		return render_to_response('publications/publications.txt', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/plain; charset=UTF-8')
+		for i, publication in enumerate(candidates):
+			if keyword in [k[1] for k in publication.keywords_escaped()]:
+				publications.append(publication)
 
-	elif 'bibtex' in request.GET:
-		return render_to_response('publications/publications.bib', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/x-bibtex; charset=UTF-8')
+	exporter = get_exporter(request)
+	if exporter is not None:
+		return exporter.export(request, publications)
 
-	else:
+	if not snapshot.enabled():
 		for publication in publications:
 			publication.links = publication.customlink_set.all()
 			publication.files = publication.customfile_set.all()
 
-		return render_to_response('publications/keyword.html', {
-				'publications': publications,
-				'keyword': keyword.replace('+', ' ')
-			}, context_instance=RequestContext(request))
+	return TemplateResponse(request, 'publications/keyword.html', {
+			'publications': publications,
+			'keyword': keyword.replace('+', ' ')
+		})
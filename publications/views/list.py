@@ -3,42 +3,40 @@ __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
 from django.http import Http404
-from django.shortcuts import render_to_response
-from django.template import RequestContext
+from django.template.response import TemplateResponse
+from publications import snapshot
+from publications.caching import cache_view
+from publications.exporters import get_exporter
 from publications.models import List, Type, Publication
+from publications.routers import replica
 
+@cache_view
+@replica
 def list(request, list):
-	list = List.objects.filter(list__iexact=list)
-
-	if not list:
-		raise Http404
-
-	list = list[0]
-	publications = list.publication_set.all()
-	publications = publications.order_by('-year', '-month', '-id')
+	if snapshot.enabled():
+		list, publications = snapshot.get_snapshot().list(list)
+		if list is None:
+			raise Http404
+	else:
+		list = List.objects.filter(list__iexact=list)
 
-	if 'ascii' in request.GET:
-		return render_to_response('publications/publications.txt', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/plain; charset=UTF-8')
+		if not list:
+			raise Http404
 
-	elif 'bibtex' in request.GET:
-		return render_to_response('publications/publications.bib', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/x-bibtex; charset=UTF-8')
+		list = list[0]
+		publications = list.publication_set.all()
+		publications = publications.order_by('-year', '-month', '-id')
 
-	elif 'rss' in request.GET:
-		return render_to_response('publications/publications.rss', {
-				'url': 'http://' + request.META['HTTP_HOST'] + request.path,
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='application/rss+xml; charset=UTF-8')
+	exporter = get_exporter(request)
+	if exporter is not None:
+		return exporter.export(request, publications)
 
-	else:
+	if not snapshot.enabled():
 		for publication in publications:
 			publication.links = publication.customlink_set.all()
 			publication.files = publication.customfile_set.all()
 
-		return render_to_response('publications/list.html', {
-				'list': list,
-				'publications': publications
-			}, context_instance=RequestContext(request))
+	return TemplateResponse(request, 'publications/list.html', {
+			'list': list,
+			'publications': publications
+		})
@@ -4,11 +4,17 @@ __license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
 __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
-from django.shortcuts import render_to_response
-from django.template import RequestContext
-from publications.models import Type, Publication
+from django.template.response import TemplateResponse
+from publications import snapshot
+from publications.authors import get_publications
+from publications.caching import cache_view
+from publications.exporters import get_exporter
+from publications.models import Type
+from publications.routers import replica
 from string import capwords
 
+@cache_view
+@replica
 def person(request, name):
 	author = capwords(name.replace('+', ' '))
 	author = author.replace(' Von ', ' von ').replace(' Van ', ' van ')
@@ -22,44 +28,20 @@ def person(request, name):
 			author = author[:off] + author[off].upper() + author[off + 1:]
 		off = author.find('-', off)
 
-	# split into forename, middlenames and surname
-	names = name.replace(' ', '+').split('+')
-
 	# find publications of this author
-	publications = []
+	if snapshot.enabled():
+		publications = list(snapshot.get_snapshot().author(name))
+	else:
+		publications = list(get_publications(name)
+			.select_related('type').order_by('-year', '-month', '-id'))
 	types = Type.objects.all()
 	types_dict = {}
 
 	for t in types:
 		types_dict[t] = []
 
-	# construct a liberal query
-	surname = names[-1]
-	surname = surname.replace(u'ä', u'%%')
-	surname = surname.replace(u'ae', u'%%')
-	surname = surname.replace(u'ö', u'%%')
-	surname = surname.replace(u'oe', u'%%')
-	surname = surname.replace(u'ü', u'%%')
-	surname = surname.replace(u'ue', u'%%')
-	surname = surname.replace(u'ß', u'%%')
-	surname = surname.replace(u'ss', u'%%')
-	query_str = u'SELECT * FROM {table} WHERE lower(authors) LIKE lower(\'%%{surname}%%\') ORDER BY year DESC, month DESC, id DESC'
-	query = Publication.objects.raw(
-		query_str.format(table=Publication._meta.db_table, surname=surname))
-
-	# further filter results
-	if len(names) > 1:
-		name_simple = Publication.simplify_name(names[0][0] + '. ' + names[-1])
-		for publication in query:
-			if name_simple in publication.authors_list_simple:
-				publications.append(publication)
-				types_dict[publication.type].append(publication)
-
-	elif len(names) > 0:
-		for publication in query:
-			if Publication.simplify_name(names[-1].lower()) in publication.authors_list_simple:
-				publications.append(publication)
-				types_dict[publication.type].append(publication)
+	for publication in publications:
+		types_dict[publication.type].append(publication)
 
 	# remove empty types
 	for t in types:
@@ -70,30 +52,17 @@ def person(request, name):
 	for t in types:
 		t.publications = types_dict[t]
 
-	if 'ascii' in request.GET:
-		return render_to_response('publications/publications.txt', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/plain; charset=UTF-8')
+	exporter = get_exporter(request)
+	if exporter is not None:
+		return exporter.export(request, publications, author=author)
 
-	elif 'bibtex' in request.GET:
-		return render_to_response('publications/publications.bib', {
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='text/x-bibtex; charset=UTF-8')
-
-	elif 'rss' in request.GET:
-		return render_to_response('publications/publications.rss', {
-				'url': 'http://' + request.META['HTTP_HOST'] + request.path,
-				'author': author,
-				'publications': publications
-			}, context_instance=RequestContext(request), content_type='application/rss+xml; charset=UTF-8')
-
-	else:
+	if not snapshot.enabled():
 		for publication in publications:
 			publication.links = publication.customlink_set.all()
 			publication.files = publication.customfile_set.all()
 
-		return render_to_response('publications/person.html', {
-				'publications': publications,
-				'types': types,
-				'author': author
-			}, context_instance=RequestContext(request))
+	return TemplateResponse(request, 'publications/person.html', {
+			'publications': publications,
+			'types': types,
+			'author': author
+		})
@@ -0,0 +1,35 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+from calendar import timegm
+from wsgiref.util import FileWrapper
+
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from publications import thumbnails
+
+# thumbnails never change their content, so browsers may keep them for a year
+MAX_AGE = 60 * 60 * 24 * 365
+
+def thumbnail(request, name):
+	name = thumbnails.DIRECTORY + name
+	if not default_storage.exists(name):
+		raise Http404
+
+	modified = timegm(default_storage.modified_time(name).utctimetuple())
+	if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), modified):
+		response = HttpResponseNotModified()
+	else:
+		handle = default_storage.open(name)
+		# the response closes the wrapper, and with it the file, once it has been sent
+		response = StreamingHttpResponse(FileWrapper(handle, handle.DEFAULT_CHUNK_SIZE),
+			content_type=thumbnails.CONTENT_TYPES.get(name.rsplit('.', 1)[-1], 'application/octet-stream'))
+		response['Content-Length'] = handle.size
+
+	response['Last-Modified'] = http_date(modified)
+	patch_cache_control(response, public=True, max_age=MAX_AGE)
+	return response
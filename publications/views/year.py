@@ -2,46 +2,40 @@ __license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
 __author__ = 'Lucas Theis <lucas@theis.io>'
 __docformat__ = 'epytext'
 
-from django.shortcuts import render_to_response
-from django.template import RequestContext
+from django.template.response import TemplateResponse
+from publications import snapshot
+from publications.caching import cache_view
+from publications.exporters import get_exporter
 from publications.models import Type, Publication
+from publications.routers import replica
 
+@cache_view
+@replica
 def year(request, year=None):
 	years = []
-	if year:
-		publications = Publication.objects.filter(year=year, external=False)
+	if snapshot.enabled():
+		publications = [publication for publication in snapshot.get_snapshot().year(year)
+			if not publication.type.hidden]
 	else:
-		publications = Publication.objects.filter(external=False)
-	publications = publications.order_by('-year', '-month', '-id')
+		publications = Publication.objects.filter(external=False, type__hidden=False)
+		if year:
+			publications = publications.filter(year=year)
+		publications = publications.order_by('-year', '-month', '-id')
+
+	exporter = get_exporter(request)
+	if exporter is not None:
+		return exporter.export(request, publications)
 
 	for publication in publications:
-		if publication.type.hidden:
-			continue
 		if not years or (years[-1][0] != publication.year):
 			years.append((publication.year, []))
 		years[-1][1].append(publication)
 
-	if 'ascii' in request.GET:
-		return render_to_response('publications/publications.txt', {
-				'publications': sum([y[1] for y in years], [])
-			}, context_instance=RequestContext(request), content_type='text/plain; charset=UTF-8')
-
-	elif 'bibtex' in request.GET:
-		return render_to_response('publications/publications.bib', {
-				'publications': sum([y[1] for y in years], [])
-			}, context_instance=RequestContext(request), content_type='text/x-bibtex; charset=UTF-8')
-
-	elif 'rss' in request.GET:
-		return render_to_response('publications/publications.rss', {
-				'url': 'http://' + request.META['HTTP_HOST'] + request.path,
-				'publications': sum([y[1] for y in years], [])
-			}, context_instance=RequestContext(request), content_type='application/rss+xml; charset=UTF-8')
-
-	else:
+	if not snapshot.enabled():
 		for publication in publications:
 			publication.links = publication.customlink_set.all()
 			publication.files = publication.customfile_set.all()
 
-		return render_to_response('publications/years.html', {
-				'years': years
-			}, context_instance=RequestContext(request))
+	return TemplateResponse(request, 'publications/years.html', {
+			'years': years
+		})
@@ -0,0 +1,52 @@
+__license__ = 'MIT License <http://www.opensource.org/licenses/mit-license.php>'
+__author__ = 'Lucas Theis <lucas@theis.io>'
+__docformat__ = 'epytext'
+
+import logging
+import threading
+
+from django.db import connections
+from django.utils.six.moves import queue
+
+
+class Worker(object):
+    """
+    Calls a function in a background thread for every scheduled argument, so
+    that slow work such as rendering images does not delay requests.
+    """
+
+    def __init__(self, name, func):
+        self.name = name
+        self.func = func
+        self.logger = logging.getLogger(name)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, arg):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.work, name=self.name)
+                self._thread.daemon = True
+                self._thread.start()
+        self._queue.put(arg)
+
+    def wait(self):
+        """
+        Blocks until all scheduled calls have finished.
+        """
+
+        self._queue.join()
+
+    def work(self):
+        while True:
+            arg = self._queue.get()
+            try:
+                self.func(arg)
+            except Exception:
+                self.logger.exception('Failed to process %s.', arg)
+            finally:
+                # connections of this thread would otherwise stay open while it waits
+                for connection in connections.all():
+                    connection.close()
+                self._queue.task_done()
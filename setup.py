@@ -10,9 +10,9 @@ setup(
 	author_email='lucas@theis.io',
 	description='A Django app for managing publications.',
 	url='https://github.com/lucastheis/django-publications',
-	packages=find_packages(),
+	packages=find_packages(exclude=('benchmarks',)),
 	include_package_data=True,
-	install_requires=('Python>=2.5.0', 'Django>=1.4.0', 'Pillow>=2.3.0'),
+	install_requires=('Python>=2.7.0', 'Django>=1.6.0', 'Pillow>=2.3.0'),
 	zip_safe=False,
 	license='MIT',
 	classifiers=(